@@ -0,0 +1,175 @@
+"""Synthetic filesystem fixtures for the benchmark suite.
+
+Every builder is deterministic: the same ``scale`` and ``seed`` always produce
+the same tree, so results from two runs (or two machines) are comparable.
+"""
+
+import json
+import os
+import random
+from pathlib import Path
+from typing import Callable, Dict
+
+# Default sizes at scale=1.0
+WIDE_FILE_COUNT = 100_000
+DEEP_DEPTH = 50
+MIXED_DIR_COUNT = 200
+MIXED_FILES_PER_DIR = 40
+SYMLINK_COUNT = 2_000
+
+TEXT_EXTENSIONS = [".py", ".md", ".txt", ".json", ".log", ".csv", ".yaml", ".js"]
+BINARY_EXTENSIONS = [".png", ".bin", ".so", ".gz"]
+
+PNG_HEADER = b"\x89PNG\r\n\x1a\n"
+
+
+def _scaled(value: int, scale: float) -> int:
+    """Scale a fixture size, never dropping below one."""
+    return max(1, int(value * scale))
+
+
+def _touch(path: Path, data: bytes = b"") -> None:
+    """Create a file with the given content."""
+    with open(path, "wb") as f:
+        if data:
+            f.write(data)
+
+
+def build_wide(root: Path, scale: float = 1.0, seed: int = 0) -> Path:
+    """A single directory with a very large number of small files."""
+    target = root / "wide"
+    target.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+
+    for i in range(_scaled(WIDE_FILE_COUNT, scale)):
+        ext = rng.choice(TEXT_EXTENSIONS)
+        _touch(target / f"file_{i:06d}{ext}")
+
+    # A handful of subdirectories so dirs-first sorting has work to do
+    for i in range(_scaled(100, scale)):
+        sub = target / f"dir_{i:04d}"
+        sub.mkdir(exist_ok=True)
+        _touch(sub / "child.txt", b"child\n")
+
+    return target
+
+
+def build_deep(root: Path, scale: float = 1.0, seed: int = 0) -> Path:
+    """A single chain of nested directories with a few files per level."""
+    target = root / "deep"
+    current = target
+
+    # Depth is what this fixture measures, so it is not scaled
+    for level in range(DEEP_DEPTH):
+        current = current / f"level_{level:02d}"
+        current.mkdir(parents=True, exist_ok=True)
+        _touch(current / "notes.md", f"# Level {level}\n".encode())
+        _touch(current / "data.bin", bytes(range(256)))
+
+    return target
+
+
+def build_mixed(root: Path, scale: float = 1.0, seed: int = 0) -> Path:
+    """A repository-like tree with text, binary, hidden and large files."""
+    target = root / "mixed"
+    target.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+
+    for d in range(_scaled(MIXED_DIR_COUNT, scale)):
+        parent = target / f"pkg_{d % 10}" / f"module_{d:03d}"
+        parent.mkdir(parents=True, exist_ok=True)
+
+        for f in range(_scaled(MIXED_FILES_PER_DIR, scale)):
+            if rng.random() < 0.2:
+                ext = rng.choice(BINARY_EXTENSIONS)
+                data = PNG_HEADER + bytes(rng.getrandbits(8) for _ in range(512))
+            else:
+                ext = rng.choice(TEXT_EXTENSIONS)
+                data = ("line %d of a synthetic text file\n" % f).encode() * 20
+            _touch(parent / f"item_{f:03d}{ext}", data)
+
+        _touch(parent / ".hidden_config", b"key = value\n")
+
+    # Well-known sample files used by the single-file benchmarks
+    samples = target / "samples"
+    samples.mkdir(exist_ok=True)
+    source_line = "def function_{0}(value):\n    return value * {0}\n\n"
+    _touch(
+        samples / "source.py",
+        "".join(source_line.format(i) for i in range(400)).encode(),
+    )
+    _touch(
+        samples / "large.log",
+        b"".join(b"2024-01-01 12:00:00 INFO request %06d served\n" % i for i in range(20_000)),
+    )
+    _touch(samples / "README", b"Plain text without an extension.\n" * 50)
+    _touch(samples / "image.png", PNG_HEADER + bytes(4096))
+    _touch(samples / "latin1.txt", "caf\xe9 na\xefve r\xe9sum\xe9\n".encode("latin-1") * 200)
+
+    return target
+
+
+def build_symlinks(root: Path, scale: float = 1.0, seed: int = 0) -> Path:
+    """A directory full of file, directory, broken and cyclic symlinks."""
+    target = root / "symlinks"
+    real = target / "real"
+    links = target / "links"
+    real.mkdir(parents=True, exist_ok=True)
+    links.mkdir(parents=True, exist_ok=True)
+
+    for i in range(_scaled(50, scale)):
+        sub = real / f"dir_{i:03d}"
+        sub.mkdir(exist_ok=True)
+        _touch(sub / "inside.txt", b"inside\n")
+        _touch(real / f"file_{i:03d}.txt", b"real file\n")
+
+    rng = random.Random(seed)
+    real_files = sorted(p for p in real.iterdir() if p.is_file())
+    real_dirs = sorted(p for p in real.iterdir() if p.is_dir())
+
+    for i in range(_scaled(SYMLINK_COUNT, scale)):
+        kind = rng.random()
+        link = links / f"link_{i:05d}"
+        if kind < 0.6:
+            os.symlink(rng.choice(real_files), link)
+        elif kind < 0.9:
+            os.symlink(rng.choice(real_dirs), link)
+        else:
+            os.symlink(target / f"missing_{i}", link)
+
+    # A cycle back to the fixture root
+    os.symlink(target, links / "loop")
+
+    return target
+
+
+FIXTURES: Dict[str, Callable[..., Path]] = {
+    "wide": build_wide,
+    "deep": build_deep,
+    "mixed": build_mixed,
+    "symlinks": build_symlinks,
+}
+
+
+def build_all(root: Path, scale: float = 1.0, seed: int = 0) -> Dict[str, Path]:
+    """Build every fixture under root.
+
+    A marker file records the parameters so a fixtures directory can be
+    reused between runs as long as the parameters match.
+    """
+    marker = root / "fixtures.json"
+    params = {"scale": scale, "seed": seed}
+
+    try:
+        if json.loads(marker.read_text()) == params:
+            return {name: root / name for name in FIXTURES}
+    except (OSError, ValueError):
+        pass
+
+    if root.exists() and any(root.iterdir()):
+        raise ValueError(f"Fixtures directory is not empty: {root}")
+
+    root.mkdir(parents=True, exist_ok=True)
+    built = {name: builder(root, scale=scale, seed=seed) for name, builder in FIXTURES.items()}
+    marker.write_text(json.dumps(params))
+    return built
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Terminal Tree - 启动导入预算检查
+Checks the import graph with ``python -X importtime``.
+
+Fails (exit code 1) when:
+- a measured import fails, or its module is missing from the report
+- ``--version`` or ``--help`` imports Textual or Rich
+- importing the app pulls in the preview stack (Pygments, rich.syntax,
+  the file preview widget) before first use
+- importing the app takes longer than the budget
+
+Usage:
+    python benchmarks/import_budget.py
+    python benchmarks/import_budget.py --budget-ms 250
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that must not be imported just to print --version / --help
+CLI_FORBIDDEN = ["textual", "rich"]
+
+# Modules that must load on first use rather than with the app
+APP_FORBIDDEN = [
+    "pygments",
+    "rich.syntax",
+    "terminal_tree_plugin.widgets.file_preview",
+]
+
+
+class ImportCheckError(Exception):
+    """Raised when a measured child process fails or does not import the module."""
+
+
+def import_times(args: List[str], module: str) -> Dict[str, int]:
+    """Run python -X importtime with args and return cumulative µs per module.
+
+    Raises ImportCheckError, with the child's own output, if it fails or
+    never imports ``module``.
+    """
+    env = dict(os.environ, PYTHONPATH=str(REPO_ROOT))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=str(REPO_ROOT),
+    )
+
+    times = {}
+    output = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            output.append(line)
+        elif "cumulative" not in line:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            times[name.strip()] = int(cumulative)
+
+    if result.returncode != 0 or module not in times:
+        reason = f"exited with {result.returncode}" if result.returncode else f"never imported {module}"
+        details = "\n".join(output[-20:])
+        raise ImportCheckError(f"python {' '.join(args)} {reason}" + (f":\n{details}" if details else ""))
+    return times
+
+
+def find_forbidden(times: Dict[str, int], forbidden: List[str]) -> List[str]:
+    """Return the forbidden modules (or their submodules) that were imported."""
+    return sorted(
+        name
+        for name in times
+        if any(name == f or name.startswith(f + ".") for f in forbidden)
+    )
+
+
+def check(budget_ms: float) -> List[str]:
+    """Run all checks and return a list of failure messages."""
+    failures = []
+
+    for flag in ("--version", "--help"):
+        try:
+            times = import_times(["-m", "terminal_tree_plugin.main", flag], "terminal_tree_plugin")
+        except ImportCheckError as e:
+            failures.append(str(e))
+            continue
+        leaked = find_forbidden(times, CLI_FORBIDDEN)
+        if leaked:
+            failures.append(f"{flag} imported {', '.join(leaked[:5])}")
+
+    try:
+        times = import_times(["-c", "import terminal_tree_plugin.app"], "terminal_tree_plugin.app")
+    except ImportCheckError as e:
+        failures.append(str(e))
+        return failures
+    leaked = find_forbidden(times, APP_FORBIDDEN)
+    if leaked:
+        failures.append(f"app import pulled in {', '.join(leaked[:5])}")
+
+    app_ms = times["terminal_tree_plugin.app"] / 1000
+    print(f"⏱  terminal_tree_plugin.app: {app_ms:.1f}ms (budget {budget_ms:.0f}ms)")
+    for name, total in slowest(times):
+        print(f"   {total / 1000:8.1f}ms  {name}")
+    if app_ms > budget_ms:
+        failures.append(f"app import took {app_ms:.1f}ms, budget is {budget_ms:.0f}ms")
+
+    return failures
+
+
+def slowest(times: Dict[str, int], count: int = 8) -> List[Tuple[str, int]]:
+    """Return the top-level imports with the largest cumulative time."""
+    top_level = {name: t for name, t in times.items() if "." not in name}
+    return sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:count]
+
+
+def main() -> int:
+    """Check the import budget."""
+    parser = argparse.ArgumentParser(description="Terminal Tree import-time budget")
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=500.0,
+        help="Maximum cumulative import time of the app module (default: 500)",
+    )
+    args = parser.parse_args()
+
+    failures = check(args.budget_ms)
+    if failures:
+        print("\n❌ Import budget exceeded:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+
+    print("\n✅ Import budget OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+Terminal Tree - 性能基准测试
+Benchmarks the hot paths against synthetic filesystem fixtures.
+
+Usage:
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --compare baseline.json --threshold 0.2
+    python benchmarks/run_benchmarks.py --input results.json --compare baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Make the package importable when run from a source checkout
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fixtures import build_all  # noqa: E402
+
+from terminal_tree_plugin.utils.file_utils import (  # noqa: E402
+    is_text_file,
+    read_file_content,
+)
+from terminal_tree_plugin.utils.fs_backend import MemoryBackend, set_backend  # noqa: E402
+from terminal_tree_plugin.utils.listing import get_listing_cache, read_listing  # noqa: E402
+from terminal_tree_plugin.utils.path_utils import (  # noqa: E402
+    autocomplete_path,
+    validate_path,
+)
+from terminal_tree_plugin.utils.scan import PROCESSES, THREADS, scan_tree  # noqa: E402
+
+Metrics = Dict[str, Dict[str, float]]
+
+# Autocomplete inputs per fixture, relative to the fixture root
+AUTOCOMPLETE_INPUTS = {
+    "wide": "file_0999",
+    "deep": "level_00/level_01/",
+    "mixed": "pkg_1/module_0",
+    "symlinks": "links/link_00",
+}
+
+# Sample files (relative to the mixed fixture) for single-file benchmarks
+SAMPLE_FILES = [
+    "samples/source.py",
+    "samples/large.log",
+    "samples/README",
+    "samples/image.png",
+    "samples/latin1.txt",
+]
+
+# In-memory tree: (depth, dirs per directory, files per directory), ~1M entries
+MEMORY_TREE = (2, 100, 100)
+
+# Files in the in-memory flat directory
+MEMORY_WIDE = 100_000
+
+# Per-call latency (seconds) of the simulated network mount, and its layout
+SLOW_MOUNT_LATENCY = 0.002
+SLOW_MOUNT_TREE = (1, 5, 20)
+
+# Seconds to wait for a directory listing to reach the tree, and between checks
+LISTING_TIMEOUT = 120.0
+LISTING_POLL = 0.001
+
+
+def measure(
+    func: Callable[[], object],
+    repeat: int,
+    setup: Optional[Callable[[], object]] = None,
+) -> Dict[str, float]:
+    """Time func repeat times and return summary statistics in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    return summarize(samples)
+
+
+async def measure_async(
+    func: Callable[[], Awaitable[object]],
+    repeat: int,
+    setup: Optional[Callable[[], object]] = None,
+) -> Dict[str, float]:
+    """Like measure, but awaits func, so work it hands to workers is included."""
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        await func()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    return summarize(samples)
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Return summary statistics of timings in milliseconds."""
+    repeat = len(samples)
+    samples = sorted(samples)
+    return {
+        "min_ms": round(samples[0], 4),
+        "median_ms": round(statistics.median(samples), 4),
+        "mean_ms": round(statistics.mean(samples), 4),
+        "max_ms": round(samples[-1], 4),
+        "runs": repeat,
+    }
+
+
+def bench_utils(fixtures: Dict[str, Path], repeat: int) -> Metrics:
+    """Benchmark the path and file utility functions."""
+    results: Metrics = {}
+
+    for name, root in fixtures.items():
+        partial = AUTOCOMPLETE_INPUTS[name]
+        results[f"autocomplete_path[{name}]"] = measure(
+            lambda: autocomplete_path(partial, root), repeat
+        )
+        results[f"validate_path[{name}]"] = measure(lambda: validate_path(root), repeat)
+
+    for sample in SAMPLE_FILES:
+        path = fixtures["mixed"] / sample
+        results[f"is_text_file[{path.name}]"] = measure(lambda: is_text_file(path), repeat)
+        results[f"read_file_content[{path.name}]"] = measure(
+            lambda: read_file_content(path), repeat
+        )
+
+    return results
+
+
+def bench_memory(fixtures: Dict[str, Path], repeat: int) -> Metrics:
+    """Benchmark listings against the in-memory backend: a giant tree and a slow mount."""
+    backend = MemoryBackend(mtime_ns=0)
+    backend.populate("/memory/tree", *MEMORY_TREE)
+    backend.populate("/memory/wide", 0, 0, MEMORY_WIDE)
+    backend.add_mount("/memory/slow", SLOW_MOUNT_LATENCY)
+    backend.populate("/memory/slow", *SLOW_MOUNT_TREE)
+
+    results: Metrics = {}
+    previous = set_backend(backend)
+    try:
+        for name in ("tree", "wide", "slow"):
+            root = Path("/memory") / name
+            results[f"read_listing[memory_{name}]"] = measure(lambda: read_listing(root), repeat)
+            results[f"read_listing_fast[memory_{name}]"] = measure(
+                lambda: read_listing(root, detailed=False), repeat
+            )
+            results[f"validate_path[memory_{name}]"] = measure(lambda: validate_path(root), repeat)
+        results["autocomplete_path[memory_tree]"] = measure(
+            lambda: autocomplete_path("dir_00", Path("/memory/tree")), repeat
+        )
+    finally:
+        set_backend(previous)
+        get_listing_cache().invalidate()
+
+    return results
+
+
+def bench_scan(fixtures: Dict[str, Path], repeat: int) -> Metrics:
+    """Benchmark whole-tree scans on threads and on the process pool."""
+    results: Metrics = {}
+    for name, root in fixtures.items():
+        for mode in (THREADS, PROCESSES):
+            results[f"scan_tree[{name},{mode}]"] = measure(
+                lambda: sum(1 for _ in scan_tree(root, mode=mode)), repeat
+            )
+
+    backend = MemoryBackend(mtime_ns=0)
+    backend.add_mount("/memory/slow", SLOW_MOUNT_LATENCY)
+    backend.populate("/memory/slow", *SLOW_MOUNT_TREE)
+    previous = set_backend(backend)
+    try:
+        results["scan_tree[memory_slow,threads]"] = measure(
+            lambda: sum(1 for _ in scan_tree(Path("/memory/slow"), mode=THREADS)), repeat
+        )
+    finally:
+        set_backend(previous)
+
+    return results
+
+
+def bench_preview(fixtures: Dict[str, Path], repeat: int) -> Metrics:
+    """Benchmark building the preview renderable for the sample files."""
+    from terminal_tree_plugin.widgets.file_preview import FilePreview
+
+    results: Metrics = {}
+    preview = FilePreview()
+
+    for sample in SAMPLE_FILES:
+        path = fixtures["mixed"] / sample
+        results[f"FilePreview._get_file_content[{path.name}]"] = measure(
+            lambda: preview._get_file_content(path), repeat
+        )
+
+    return results
+
+
+async def _bench_tree_async(fixtures: Dict[str, Path], repeat: int) -> Metrics:
+    """Benchmark TreeView population and expansion inside a headless app.
+
+    Directories are scanned (and large ones sorted) on workers, so each run
+    waits until the listing's nodes are in the tree, and the shared listing
+    cache is emptied first so every run scans the directory again.
+    """
+    from textual.app import App, ComposeResult
+    from textual.widgets import Tree
+
+    from terminal_tree_plugin.widgets.tree_view import TreeView
+
+    class BenchApp(App):
+        def compose(self) -> ComposeResult:
+            yield TreeView(start_path=fixtures["mixed"], id="tree_view")
+
+    results: Metrics = {}
+    app = BenchApp()
+    listings = get_listing_cache()
+
+    async with app.run_test(headless=True, size=(120, 50)) as pilot:
+        tree_view = app.query_one(TreeView)
+        await pilot.pause()
+
+        async def listed() -> None:
+            """Wait until the root's listing has been added to the tree."""
+            deadline = time.perf_counter() + LISTING_TIMEOUT
+            while tree_view._tree.root.id not in tree_view._pages:
+                if time.perf_counter() > deadline:
+                    raise RuntimeError(f"{tree_view.current_path} was not listed in time")
+                await asyncio.sleep(LISTING_POLL)
+
+        for name, root in fixtures.items():
+            tree_view.current_path = root
+            await pilot.pause()
+            await listed()
+
+            async def populate() -> None:
+                tree_view._populate_tree()
+                await listed()
+
+            results[f"TreeView._populate_tree[{name}]"] = await measure_async(
+                populate, repeat, setup=listings.invalidate
+            )
+
+            node = tree_view._tree.root
+
+            def reset() -> None:
+                listings.invalidate()
+                tree_view._pages.pop(node.id, None)
+                node.remove_children()
+                node.add("📂 Loading...", data=None)
+
+            async def expand() -> None:
+                tree_view.on_tree_node_expanded(Tree.NodeExpanded(node))
+                await listed()
+
+            results[f"TreeView.expand[{name}]"] = await measure_async(expand, repeat, setup=reset)
+
+    listings.invalidate()
+    return results
+
+
+def bench_tree(fixtures: Dict[str, Path], repeat: int) -> Metrics:
+    """Run the TreeView benchmarks."""
+    return asyncio.run(_bench_tree_async(fixtures, repeat))
+
+
+# Each suite, with the names of the functions its metrics are named after
+SUITES = {
+    "utils": (bench_utils, ("autocomplete_path", "validate_path", "is_text_file", "read_file_content")),
+    "memory": (bench_memory, ("read_listing", "read_listing_fast", "validate_path", "autocomplete_path")),
+    "scan": (bench_scan, ("scan_tree",)),
+    "preview": (bench_preview, ("FilePreview._get_file_content",)),
+    "tree": (bench_tree, ("TreeView._populate_tree", "TreeView.expand")),
+}
+
+
+def select_suites(only: Optional[str]) -> List[str]:
+    """Return the suites that can produce metrics matching --only.
+
+    A filter that names no suite or function (e.g. a fixture name) needs
+    every suite.
+    """
+    if not only:
+        return list(SUITES)
+    selected = [
+        suite_name
+        for suite_name, (_, functions) in SUITES.items()
+        if only in suite_name or any(only in function or function in only for function in functions)
+    ]
+    return selected or list(SUITES)
+
+
+def run_suites(fixtures: Dict[str, Path], repeat: int, only: Optional[str]) -> Metrics:
+    """Run the benchmark suites (those matching --only) and collect their metrics."""
+    metrics: Metrics = {}
+    for suite_name in select_suites(only):
+        suite, _ = SUITES[suite_name]
+        print(f"⏱  Running {suite_name} benchmarks...", file=sys.stderr)
+        metrics.update(suite(fixtures, repeat))
+
+    if only:
+        metrics = {key: value for key, value in metrics.items() if only in key}
+
+    return metrics
+
+
+def compare_results(
+    current: Metrics,
+    baseline: Metrics,
+    threshold: float,
+    min_delta_ms: float,
+) -> List[Tuple[str, float, float, float]]:
+    """Return (metric, baseline_ms, current_ms, ratio) for every regression."""
+    regressions = []
+
+    for key, base in sorted(baseline.items()):
+        if key not in current:
+            continue
+
+        base_ms = base["median_ms"]
+        current_ms = current[key]["median_ms"]
+        delta = current_ms - base_ms
+
+        # Ignore changes that are within timer noise
+        if delta < min_delta_ms or base_ms <= 0:
+            continue
+
+        ratio = delta / base_ms
+        if ratio > threshold:
+            regressions.append((key, base_ms, current_ms, ratio))
+
+    return regressions
+
+
+def print_metrics(metrics: Metrics) -> None:
+    """Print a human readable summary table."""
+    width = max((len(key) for key in metrics), default=10)
+    print(f"{'metric':<{width}}  {'median':>10}  {'min':>10}")
+    for key in sorted(metrics):
+        m = metrics[key]
+        print(f"{key:<{width}}  {m['median_ms']:>8.3f}ms  {m['min_ms']:>8.3f}ms")
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Terminal Tree performance benchmarks",
+        prog="run_benchmarks.py",
+    )
+    parser.add_argument("--output", "-o", help="Write results to this JSON file")
+    parser.add_argument("--input", "-i", help="Load results from this JSON file instead of running")
+    parser.add_argument("--compare", "-c", help="Baseline JSON file to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Allowed slowdown as a fraction of the baseline (default: 0.2)",
+    )
+    parser.add_argument(
+        "--min-delta-ms",
+        type=float,
+        default=0.05,
+        help="Ignore regressions smaller than this many milliseconds (default: 0.05)",
+    )
+    parser.add_argument("--repeat", "-r", type=int, default=5, help="Runs per metric (default: 5)")
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="Fixture size multiplier, e.g. 0.01 for a quick run (default: 1.0)",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Fixture random seed (default: 0)")
+    parser.add_argument("--fixtures-dir", help="Build (or reuse) fixtures here instead of a temp dir")
+    parser.add_argument("--only", help="Only keep metrics whose name contains this string")
+    return parser.parse_args()
+
+
+def main() -> int:
+    """Run the benchmarks and optionally compare them with a baseline."""
+    args = parse_args()
+
+    if args.input:
+        with open(args.input) as f:
+            results = json.load(f)
+    else:
+        with tempfile.TemporaryDirectory(prefix="tt-bench-") as tmp:
+            root = Path(args.fixtures_dir) if args.fixtures_dir else Path(tmp)
+            print(f"🌲 Building fixtures in {root} (scale={args.scale})...", file=sys.stderr)
+            fixtures = build_all(root, scale=args.scale, seed=args.seed)
+            metrics = run_suites(fixtures, args.repeat, args.only)
+
+        results = {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "scale": args.scale,
+                "seed": args.seed,
+                "repeat": args.repeat,
+            },
+            "metrics": metrics,
+        }
+
+    print_metrics(results["metrics"])
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"\n💾 Results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+        if baseline.get("meta", {}).get("scale") != results.get("meta", {}).get("scale"):
+            print("⚠️  Baseline was recorded with a different --scale", file=sys.stderr)
+
+        regressions = compare_results(
+            results["metrics"], baseline["metrics"], args.threshold, args.min_delta_ms
+        )
+        if regressions:
+            print(f"\n❌ {len(regressions)} metric(s) regressed by more than {args.threshold:.0%}:")
+            for key, base_ms, current_ms, ratio in regressions:
+                print(f"  {key}: {base_ms:.3f}ms -> {current_ms:.3f}ms (+{ratio:.0%})")
+            return 1
+
+        print(f"\n✅ No regressions beyond {args.threshold:.0%}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,44 +14,28 @@ cat > "$HOME/.local/bin/tree" << EOF
 #!/usr/bin/env python3
 
 import sys
-import os
-from pathlib import Path
+from importlib.util import find_spec
 
 # 添加项目路径
 project_path = "$PROJECT_PATH"
 sys.path.insert(0, project_path)
 
 def main():
-    try:
-        # 检查依赖
-        import textual
-        import rich
-    except ImportError as e:
-        print(f"❌ Missing dependency: {e}")
+    # 检查依赖（只查找不导入，保持 --help/--version 快速返回）
+    missing = [name for name in ("textual", "rich") if find_spec(name) is None]
+    if missing:
+        print(f"❌ Missing dependency: {', '.join(missing)}")
         print("📦 Please install dependencies:")
         print("pip install textual rich")
         return 1
     
     try:
-        from terminal_tree_plugin.app import TerminalTreeApp
-        
-        # 解析命令行参数
-        start_path = Path.cwd()
-        if len(sys.argv) > 1:
-            provided_path = Path(sys.argv[1])
-            if provided_path.exists() and provided_path.is_dir():
-                start_path = provided_path
-            else:
-                print(f"⚠️  Warning: '{provided_path}' is not a valid directory")
-                print(f"📁 Using current directory: {start_path}")
-        
-        # 运行应用
-        app = TerminalTreeApp(start_path=start_path)
-        app.run()
-        
+        # 使用统一入口，Textual 在解析参数之后才会被导入
+        from terminal_tree_plugin.main import main as tree_main
+        return tree_main()
     except KeyboardInterrupt:
         print("\n👋 Goodbye!")
-    except Exception as e:
+    except ImportError as e:
         print(f"❌ Error: {e}")
         print(f"🔍 Make sure the project is available at: {project_path}")
         return 1
@@ -33,6 +33,12 @@ cat >> "$SHELL_CONFIG" << EOF
 tree() {
     local target_path="\${1:-\$(pwd)}"
 
+    # 选项（如 --help、--version、--profile）直接交给应用处理
+    if [[ "\$target_path" == -* && -x "\$HOME/.local/bin/tree" ]]; then
+        "\$HOME/.local/bin/tree" "\$@"
+        return
+    fi
+
     # 验证路径
     if [[ ! -d "\$target_path" ]]; then
         echo "❌ 错误: 目录 '\$target_path' 不存在"
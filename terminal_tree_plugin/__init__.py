@@ -1,9 +1,18 @@
 """Terminal Tree Plugin - A filesystem navigator for the terminal."""
 
+from typing import Any
+
 __version__ = "0.1.0"
 __author__ = "Terminal Tree Plugin"
 __email__ = "plugin@example.com"
 
-from .app import TerminalTreeApp
+__all__ = ["TerminalTreeApp"]
+
+
+def __getattr__(name: str) -> Any:
+    """Import the application lazily so the CLI can start without Textual."""
+    if name == "TerminalTreeApp":
+        from .app import TerminalTreeApp
 
-__all__ = ["TerminalTreeApp"] 
\ No newline at end of file
+        return TerminalTreeApp
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
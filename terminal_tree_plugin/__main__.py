@@ -3,11 +3,12 @@
 
 import sys
 from pathlib import Path
-from .app import TerminalTreeApp
 
 
 def main():
     """Main entry point for the terminal tree plugin."""
+    from .app import TerminalTreeApp
+    
     # Parse command line arguments
     start_path = Path.cwd()
     if len(sys.argv) > 1:
@@ -1,14 +1,26 @@
 """Main application class for the terminal tree plugin."""
 
+import time
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple
 
 from textual import events
 from textual.app import App, ComposeResult
 from textual.containers import Horizontal, Vertical
 from textual.widgets import Footer, Header
 
-from .widgets import FilePreview, PathInput, TreeView
+from .widgets.path_input import PathInput
+from .widgets.tree_view import TreeView
+
+if TYPE_CHECKING:
+    # Loaded on first use to keep them off the startup path
+    from .widgets.compare_view import CompareView
+    from .widgets.duplicates_view import DuplicatesView
+    from .utils.file_ops import FileJob
+    from .widgets.file_preview import FilePreview
+    from .widgets.jobs_bar import JobsBar
+    from .widgets.profile_overlay import ProfileOverlay
+    from .utils.snapshot import SnapshotBackend
 
 
 class TerminalTreeApp(App):
@@ -25,26 +37,86 @@ class TerminalTreeApp(App):
         ("f1", "show_help", "Help"),
         ("f5", "refresh", "Refresh"),
         ("ctrl+h", "toggle_hidden", "Toggle Hidden"),
+        ("s", "cycle_sort", "Sort"),
+        ("r", "reverse_sort", "Reverse"),
+        ("i", "toggle_ignored", "Ignored"),
         ("g", "edit_path", "Edit Path"),
+        ("f6", "toggle_dual_pane", "Dual Pane"),
+        ("f7", "compare_panes", "Compare"),
+        ("f8", "find_duplicates", "Duplicates"),
+        ("ctrl+k", "cycle_checksums", "Checksums"),
+        ("ctrl+y", "copy_checksum", "Copy Checksum"),
+        ("insert,ctrl+t", "toggle_mark", "Mark"),
+        ("f9", "copy_marked", "Copy"),
+        ("f10", "move_marked", "Move"),
+        ("delete", "delete_marked", "Delete"),
+        ("ctrl+x", "cancel_job", "Cancel Job"),
         ("backspace", "go_up", "Parent Dir"),
         ("tab", "focus_next", "Next Panel"),
         ("shift+tab", "focus_previous", "Previous Panel"),
     ]
     
+    # Seconds within which Delete must be pressed again to confirm
+    DELETE_CONFIRM_TIMEOUT = 3.0
+    
     def __init__(
         self,
         start_path: Optional[Path] = None,
         debug: bool = False,
+        profile: bool = False,
+        sort_mode: str = "name",
+        sort_reverse: bool = False,
+        respect_ignore: bool = False,
+        excludes: Sequence[str] = (),
+        git_status: bool = True,
+        evict_after: Optional[float] = None,
+        node_budget: Optional[int] = None,
+        compare: Optional[Tuple[Path, Path]] = None,
+        snapshot: Optional[Path] = None,
         **kwargs,
     ) -> None:
         super().__init__(**kwargs)
         self.start_path = start_path or Path.cwd()
         self._debug = debug
+        self._profile = profile
+        self._sort_mode = sort_mode
+        self._sort_reverse = sort_reverse
+        self._respect_ignore = respect_ignore
+        self._excludes = excludes
+        self._git_status = git_status
+        self._evict_after = evict_after
+        self._node_budget = node_budget
+        self._compare = compare
+        
+        # A snapshot replaces the filesystem; its paths are browsed read-only
+        self.snapshot: Optional["SnapshotBackend"] = None
+        if snapshot is not None:
+            from .utils.fs_backend import set_backend
+            from .utils.snapshot import SnapshotBackend
+            
+            self.snapshot = SnapshotBackend(snapshot)
+            set_backend(self.snapshot)
+            self.start_path = self.snapshot.root
+            self._git_status = False
+            self.sub_title = f"📸 Snapshot of {self.snapshot.describe()}"
         
         # Widget references
         self.tree_view: Optional[TreeView] = None
-        self.file_preview: Optional[FilePreview] = None
+        self.tree_views: List[TreeView] = []
+        self.active_tree: Optional[TreeView] = None
+        self.file_preview: Optional["FilePreview"] = None
+        self.compare_view: Optional["CompareView"] = None
+        self.duplicates_view: Optional["DuplicatesView"] = None
         self.path_input: Optional[PathInput] = None
+        self.profile_overlay: Optional["ProfileOverlay"] = None
+        self.jobs_bar: Optional["JobsBar"] = None
+        
+        # Entries awaiting a second Delete, and when the first was pressed
+        self._delete_pending: List[Path] = []
+        self._delete_pending_at = 0.0
+        
+        if profile:
+            self.bind("f12", "toggle_profile", description="Profile")
     
     def compose(self) -> ComposeResult:
         """Compose the application layout."""
@@ -57,15 +129,24 @@ class TerminalTreeApp(App):
         # Main content area with tree and preview
         with Horizontal(id="main_content"):
             # Left panel: Tree view
-            self.tree_view = TreeView(
-                start_path=self.start_path,
-                id="tree_view"
-            )
+            self.tree_view = self._create_tree_view(self.start_path, "tree_view")
+            self.tree_views.append(self.tree_view)
+            self.active_tree = self.tree_view
             yield self.tree_view
             
-            # Right panel: File preview
-            self.file_preview = FilePreview(id="file_preview")
-            yield self.file_preview
+            # Differences next to the tree in --compare mode
+            if self._compare:
+                self.compare_view = self._create_compare_view(*self._compare)
+                yield self.compare_view
+            
+            # Right panel: File preview is mounted after the first paint
+        
+        # Latency overlay, only available when profiling
+        if self._profile:
+            from .widgets.profile_overlay import ProfileOverlay
+            
+            self.profile_overlay = ProfileOverlay(id="profile_overlay")
+            yield self.profile_overlay
         
         yield Footer()
     
@@ -74,10 +155,55 @@ class TerminalTreeApp(App):
         # Set initial focus to tree view
         if self.tree_view:
             self.tree_view.focus()
+        
+        # Defer the preview (and its Rich/Pygments imports) past first paint
+        self.call_after_refresh(self._mount_file_preview)
+    
+    def _create_tree_view(self, start_path: Path, widget_id: str) -> TreeView:
+        """Create a tree view with the application's settings."""
+        return TreeView(
+            start_path=start_path,
+            sort_mode=self._sort_mode,
+            sort_reverse=self._sort_reverse,
+            respect_ignore=self._respect_ignore,
+            excludes=self._excludes,
+            git_status=self._git_status,
+            evict_after=self._evict_after,
+            node_budget=self._node_budget,
+            id=widget_id,
+        )
+    
+    def _create_compare_view(self, left: Path, right: Path) -> "CompareView":
+        """Create a view of the differences between two directories."""
+        from .widgets.compare_view import CompareView
+        
+        return CompareView(left, right, id="compare_view")
+    
+    def _mount_file_preview(self) -> None:
+        """Create the file preview panel."""
+        from .widgets.file_preview import FilePreview
+        
+        self.file_preview = FilePreview(id="file_preview")
+        self.file_preview.offline = self.snapshot is not None
+        self.query_one("#main_content", Horizontal).mount(self.file_preview)
     
     # Message handlers
+    def on_descendant_focus(self, event: events.DescendantFocus) -> None:
+        """Make the tree view containing the focused widget the active one."""
+        for tree_view in self.tree_views:
+            if event.widget is tree_view or tree_view in event.widget.ancestors:
+                if tree_view is not self.active_tree:
+                    self.active_tree = tree_view
+                    if self.path_input:
+                        self.path_input.current_path = tree_view.current_path
+                break
+    
     def on_tree_view_directory_changed(self, message: TreeView.DirectoryChanged) -> None:
         """Handle directory changes from tree view."""
+        # The path bar follows the active pane only
+        if message.tree_view not in (None, self.active_tree):
+            return
+        
         if self.path_input:
             self.path_input.current_path = message.path
         
@@ -92,8 +218,8 @@ class TerminalTreeApp(App):
     
     def on_path_input_path_changed(self, message: PathInput.PathChanged) -> None:
         """Handle path changes from path input."""
-        if self.tree_view:
-            self.tree_view.navigate_to(message.path)
+        if self.active_tree:
+            self.active_tree.navigate_to(message.path)
     
     def on_path_input_path_edit_started(self, message: PathInput.PathEditStarted) -> None:
         """Handle path edit start."""
@@ -104,8 +230,8 @@ class TerminalTreeApp(App):
     def on_path_input_path_edit_cancelled(self, message: PathInput.PathEditCancelled) -> None:
         """Handle path edit cancellation."""
         # Return focus to tree view
-        if self.tree_view:
-            self.tree_view.focus()
+        if self.active_tree:
+            self.active_tree.focus()
     
     # Action handlers
     def action_quit(self) -> None:
@@ -119,22 +245,156 @@ class TerminalTreeApp(App):
     
     def action_refresh(self) -> None:
         """Refresh the current view."""
-        if self.tree_view:
-            self.tree_view.refresh_tree()
+        if self.active_tree:
+            self.active_tree.refresh_tree()
         
         if self.file_preview:
             self.file_preview.refresh_preview()
     
     def action_toggle_hidden(self) -> None:
         """Toggle showing hidden files."""
-        if self.tree_view:
-            self.tree_view.toggle_hidden()
+        if self.active_tree:
+            self.active_tree.toggle_hidden()
+    
+    def action_cycle_sort(self) -> None:
+        """Switch the tree to the next sort mode."""
+        if self.active_tree:
+            self.active_tree.cycle_sort_mode()
+    
+    def action_reverse_sort(self) -> None:
+        """Reverse the tree's sort order."""
+        if self.active_tree:
+            self.active_tree.toggle_sort_order()
+    
+    def action_toggle_ignored(self) -> None:
+        """Toggle hiding ignored files."""
+        if self.active_tree:
+            self.active_tree.toggle_ignored()
+    
+    def _offline(self, what: str) -> bool:
+        """Whether a snapshot is open, telling the user that ``what`` needs the real files."""
+        if self.snapshot is None:
+            return False
+        self.notify(f"{what} needs the real files, not a snapshot", severity="warning")
+        return True
+    
+    def action_cycle_checksums(self) -> None:
+        """Show, switch or hide the active pane's checksum column."""
+        if self._offline("Checksums"):
+            return
+        if self.active_tree:
+            self.active_tree.cycle_checksums()
+            if self.file_preview:
+                from .utils.hashing import HASH_ALGORITHM
+                
+                self.file_preview.set_checksum_algorithm(self.active_tree.checksum_algorithm or HASH_ALGORITHM)
+    
+    def action_copy_checksum(self) -> None:
+        """Copy the checksum of the entry under the cursor."""
+        if self._offline("Checksums"):
+            return
+        if self.active_tree:
+            self.active_tree.copy_checksum()
+    
+    def action_toggle_mark(self) -> None:
+        """Mark or unmark the entry under the cursor."""
+        if self.active_tree:
+            self.active_tree.toggle_mark()
+    
+    def action_copy_marked(self) -> None:
+        """Copy the marked entries into the other pane's directory."""
+        self._start_transfer("copy")
+    
+    def action_move_marked(self) -> None:
+        """Move the marked entries into the other pane's directory."""
+        self._start_transfer("move")
+    
+    def _start_transfer(self, kind: str) -> None:
+        """Start a copy or move job from the active pane to the other one."""
+        if not self.active_tree or self._offline(kind.capitalize()):
+            return
+        sources = self.active_tree.selected_paths()
+        if not sources:
+            return
+        
+        others = [tree_view for tree_view in self.tree_views if tree_view is not self.active_tree]
+        if not others:
+            self.notify(f"Open a second pane (F6) to {kind} into")
+            return
+        
+        from .utils.file_ops import FileJob
+        
+        self._start_job(FileJob(kind, sources, others[0].current_path))
+    
+    def action_delete_marked(self) -> None:
+        """Delete the marked entries once Delete is pressed a second time."""
+        if not self.active_tree or self._offline("Delete"):
+            return
+        sources = self.active_tree.selected_paths()
+        if not sources:
+            return
+        
+        now = time.monotonic()
+        if sources != self._delete_pending or now - self._delete_pending_at > self.DELETE_CONFIRM_TIMEOUT:
+            self._delete_pending = sources
+            self._delete_pending_at = now
+            what = sources[0].name if len(sources) == 1 else f"{len(sources)} items"
+            self.notify(f"Press Delete again to delete {what}", severity="warning")
+            return
+        self._delete_pending = []
+        
+        from .utils.file_ops import FileJob
+        
+        self._start_job(FileJob("delete", sources))
+    
+    def _start_job(self, job: "FileJob") -> None:
+        """Run a file job in the background, showing its progress."""
+        if self.jobs_bar is None:
+            from .widgets.jobs_bar import JobsBar
+            
+            self.jobs_bar = JobsBar(id="jobs_bar")
+            self.mount(self.jobs_bar, after=self.query_one("#main_content", Horizontal))
+        
+        if self.active_tree:
+            self.active_tree.clear_marks()
+        self.jobs_bar.start(job)
+    
+    def action_cancel_job(self) -> None:
+        """Cancel the most recently started file job."""
+        if self.jobs_bar is None or not self.jobs_bar.cancel_last():
+            self.bell()
+    
+    def on_jobs_bar_job_finished(self, message: "JobsBar.JobFinished") -> None:
+        """Show a finished job's result in every pane."""
+        job = message.job
+        changed = {source.parent for source in job.sources}
+        if job.destination is not None:
+            changed.add(job.destination)
+        for tree_view in self.tree_views:
+            tree_view.reload(changed)
+        
+        if self.file_preview and job.kind != "copy" and self.file_preview.current_file in job.sources:
+            self.file_preview.clear()
+        
+        if job.cancel_requested:
+            self.notify(f"Cancelled: {job.describe()}", severity="warning")
+        elif job.errors:
+            path, reason = job.errors[0]
+            more = f" (and {len(job.errors) - 1} more)" if len(job.errors) > 1 else ""
+            self.notify(f"{path.name}: {reason}{more}", title=job.describe(), severity="error")
+        else:
+            self.notify(f"Done: {job.describe()}")
     
     def action_edit_path(self) -> None:
         """Start editing the current path."""
         if self.path_input and not self.path_input.is_editing:
             self.path_input.start_editing()
     
+    def action_toggle_profile(self) -> None:
+        """Show or hide the profiling overlay."""
+        if self.profile_overlay:
+            self.profile_overlay.toggle()
+    
     def action_focus_next(self) -> None:
         """Focus the next widget."""
         self.focus_next()
@@ -145,8 +405,66 @@ class TerminalTreeApp(App):
     
     def action_go_up(self) -> None:
         """Navigate to parent directory."""
-        if self.tree_view:
-            self.tree_view.go_up()
+        if self.active_tree:
+            self.active_tree.go_up()
+    
+    def action_toggle_dual_pane(self) -> None:
+        """Open or close a second tree pane next to the first."""
+        if len(self.tree_views) > 1:
+            second = self.tree_views.pop()
+            if self.active_tree is second:
+                self.active_tree = self.tree_view
+            second.remove()
+            if self.tree_view:
+                self.tree_view.focus()
+            return
+        
+        # The second pane starts where the active one is; its listings
+        # come from the shared cache rather than a new scan
+        start_path = self.active_tree.current_path if self.active_tree else self.start_path
+        second = self._create_tree_view(start_path, "tree_view_2")
+        self.tree_views.append(second)
+        self.query_one("#main_content", Horizontal).mount(second, after=self.tree_view)
+        second.focus()
+    
+    def action_compare_panes(self) -> None:
+        """Compare the directories of the two panes, or close the comparison."""
+        if self.compare_view is not None:
+            self.compare_view.remove()
+            self.compare_view = None
+            if self.active_tree:
+                self.active_tree.focus()
+            return
+        
+        if len(self.tree_views) < 2:
+            self.notify("Open a second pane (F6) to compare directories")
+            return
+        if self._offline("Comparing"):
+            return
+        
+        left, right = (tree_view.current_path for tree_view in self.tree_views[:2])
+        self.compare_view = self._create_compare_view(left, right)
+        self.query_one("#main_content", Horizontal).mount(self.compare_view, after=self.tree_views[-1])
+        self.compare_view.focus()
+    
+    def action_find_duplicates(self) -> None:
+        """Find duplicate files below the active pane's directory, or close the results."""
+        if self.duplicates_view is not None:
+            self.duplicates_view.remove()
+            self.duplicates_view = None
+            if self.active_tree:
+                self.active_tree.focus()
+            return
+        
+        if not self.active_tree or self._offline("Finding duplicates"):
+            return
+        
+        from .widgets.duplicates_view import DuplicatesView
+        
+        self.duplicates_view = DuplicatesView(self.active_tree.current_path, id="duplicates_view")
+        after = self.compare_view or self.tree_views[-1]
+        self.query_one("#main_content", Horizontal).mount(self.duplicates_view, after=after)
+        self.duplicates_view.focus()
     
     # Key event handlers
     def on_key(self, event: events.Key) -> None:
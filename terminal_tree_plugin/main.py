@@ -6,7 +6,10 @@ import sys
 from pathlib import Path
 from typing import Optional
 
-from .app import TerminalTreeApp
+from . import __version__
+from .utils.fs_monitor import DEFAULT_TIMEOUT, SLOW_THRESHOLD, configure_monitor
+from .utils.profiling import disable_profiling, enable_profiling
+from .utils.sorting import SORT_MODES
 
 
 def parse_args() -> argparse.Namespace:
@@ -20,13 +23,14 @@ def parse_args() -> argparse.Namespace:
         "path",
         nargs="?",
         default=".",
-        help="Starting directory path (default: current directory)",
+        help="Starting directory path, or a snapshot file to browse offline "
+        "(default: current directory)",
     )
 
     parser.add_argument(
         "--version",
         action="version",
-        version="%(prog)s 0.1.0",
+        version=f"%(prog)s {__version__}",
     )
 
     parser.add_argument(
@@ -35,6 +39,114 @@ def parse_args() -> argparse.Namespace:
         help="Enable debug mode",
     )
 
+    parser.add_argument(
+        "--sort",
+        choices=SORT_MODES,
+        default="name",
+        help="Initial sort mode, directories always first (default: name)",
+    )
+
+    parser.add_argument(
+        "--reverse",
+        action="store_true",
+        help="Sort in descending order",
+    )
+
+    parser.add_argument(
+        "--gitignore",
+        action="store_true",
+        help="Hide entries matched by .gitignore/.ignore files (toggle with i)",
+    )
+
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        metavar="PATTERN",
+        help="Hide entries matching a gitignore-style pattern, relative to the "
+        "starting directory; may be repeated and implies --gitignore",
+    )
+
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        metavar=("LEFT", "RIGHT"),
+        help="Show the differences between two directory trees next to the tree of LEFT",
+    )
+
+    parser.add_argument(
+        "--snapshot",
+        metavar="FILE",
+        help="Save a compact snapshot of PATH's tree to FILE (e.g. out.tts) and exit; "
+        "open it later with terminal-tree FILE",
+    )
+
+    parser.add_argument(
+        "--du",
+        action="store_true",
+        help="Print the size of each entry of PATH, largest first, and exit",
+    )
+
+    parser.add_argument(
+        "-x",
+        "--one-file-system",
+        action="store_true",
+        help="With --snapshot or --du, do not descend into other filesystems",
+    )
+
+    parser.add_argument(
+        "--no-git",
+        action="store_true",
+        help="Do not show git status markers",
+    )
+
+    parser.add_argument(
+        "--stat-timeout",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        metavar="SECONDS",
+        help="Give up on a filesystem metadata call after this long "
+        f"(default: {DEFAULT_TIMEOUT})",
+    )
+
+    parser.add_argument(
+        "--slow-threshold",
+        type=float,
+        default=SLOW_THRESHOLD,
+        metavar="SECONDS",
+        help="Median call latency at which a mount switches to degraded mode "
+        f"(default: {SLOW_THRESHOLD})",
+    )
+
+    parser.add_argument(
+        "--evict-after",
+        type=float,
+        metavar="SECONDS",
+        help="Release collapsed directories idle for this long (default: 300)",
+    )
+
+    parser.add_argument(
+        "--node-budget",
+        type=int,
+        metavar="N",
+        help="Release collapsed directories while the tree holds more nodes "
+        "(default: 20000)",
+    )
+
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Record timing spans for the hot paths (F12 shows live latencies)",
+    )
+
+    parser.add_argument(
+        "--profile-output",
+        default="terminal-tree-trace.json",
+        metavar="FILE",
+        help="Chrome trace / Perfetto file written on exit "
+        "(default: terminal-tree-trace.json)",
+    )
+
     return parser.parse_args()
 
 
@@ -54,18 +166,115 @@ def validate_path(path_str: str) -> Optional[Path]:
         return None
 
 
+def save_snapshot(root: Path, output: Path, one_filesystem: bool = False) -> int:
+    """Write a snapshot of a tree, showing progress on stderr."""
+    from .utils.snapshot import write_snapshot
+
+    def progress(count: int) -> None:
+        print(f"\rScanned {count:,} entries", end="", file=sys.stderr, flush=True)
+
+    try:
+        count = write_snapshot(root, output, one_filesystem, progress=progress)
+    except KeyboardInterrupt:
+        print("\nInterrupted by user", file=sys.stderr)
+        return 130
+    except OSError as e:
+        print(f"\nError: {e}", file=sys.stderr)
+        return 1
+
+    size = output.stat().st_size
+    print(f"\nWrote {count:,} entries ({size / (1024 * 1024):.1f} MB) to {output}", file=sys.stderr)
+    return 0
+
+
+def _format_size(size: int) -> str:
+    """Format a size for --du, like du -h."""
+    for unit in ("B", "K", "M", "G", "T"):
+        if size < 1024 or unit == "T":
+            break
+        size /= 1024
+    return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+
+
+def print_totals(root: Path, one_filesystem: bool = False) -> int:
+    """Print the files and bytes below each entry of a tree, largest first."""
+    from .utils.scan import ScanStats, tree_totals
+
+    stats = ScanStats()
+    try:
+        totals = tree_totals(root, one_filesystem, stats=stats)
+    except KeyboardInterrupt:
+        print("\nInterrupted by user", file=sys.stderr)
+        return 130
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    for name, (files, size) in sorted(totals.items(), key=lambda item: (-item[1][1], item[0])):
+        print(f"{_format_size(size):>10}  {files:>10,}  {name}")
+    print(f"{_format_size(stats.bytes):>10}  {stats.files:>10,}  total")
+    if stats.errors:
+        print(f"{stats.errors:,} directories could not be read", file=sys.stderr)
+    return 0
+
+
 def main() -> int:
     """Main entry point."""
     args = parse_args()
 
     # Validate the starting path
-    start_path = validate_path(args.path)
-    if start_path is None:
-        return 1
+    compare = None
+    snapshot = None
+    if args.compare:
+        compare = tuple(validate_path(path) for path in args.compare)
+        if None in compare:
+            return 1
+        start_path = compare[0]
+    else:
+        from .utils.snapshot import is_snapshot
+
+        if not (args.snapshot or args.du) and Path(args.path).is_file() and is_snapshot(Path(args.path)):
+            snapshot = Path(args.path)
+            start_path = None
+        else:
+            start_path = validate_path(args.path)
+            if start_path is None:
+                return 1
+
+    if args.snapshot:
+        return save_snapshot(start_path, Path(args.snapshot), args.one_file_system)
+    if args.du:
+        return print_totals(start_path, args.one_file_system)
+
+    configure_monitor(timeout=args.stat_timeout, slow_threshold=args.slow_threshold)
+
+    if args.profile:
+        enable_profiling()
+
+    # Imported here so --help and --version never load Textual
+    from .app import TerminalTreeApp
 
     try:
         # Create and run the app
-        app = TerminalTreeApp(start_path=start_path, debug=args.debug)
+        app = TerminalTreeApp(
+            start_path=start_path,
+            debug=args.debug,
+            profile=args.profile,
+            sort_mode=args.sort,
+            sort_reverse=args.reverse,
+            respect_ignore=args.gitignore or bool(args.exclude),
+            excludes=args.exclude,
+            git_status=not args.no_git,
+            evict_after=args.evict_after,
+            node_budget=args.node_budget,
+            compare=compare,
+            snapshot=snapshot,
+        )
+        if snapshot is None:
+            # Hashing jobs start their pool from the UI, once stderr is captured
+            from .utils.hashing import start_pool_helpers
+
+            start_pool_helpers()
         app.run()
         return 0
     except KeyboardInterrupt:
@@ -76,6 +285,11 @@ def main() -> int:
             raise
         print(f"Error: {e}", file=sys.stderr)
         return 1
+    finally:
+        profiler = disable_profiling()
+        if profiler:
+            profiler.export_chrome_trace(Path(args.profile_output))
+            print(f"Profile written to {args.profile_output}", file=sys.stderr)
 
 
 if __name__ == "__main__":
@@ -1,14 +1,33 @@
 """Utility functions for the terminal tree plugin."""
 
-from .file_utils import get_file_info, get_syntax_for_file, is_text_file, read_file_content
-from .path_utils import get_path_components, normalize_path, validate_path
+from importlib import import_module
+from typing import Any
 
 __all__ = [
     "get_file_info",
     "get_syntax_for_file",
-    "is_text_file", 
+    "is_text_file",
     "read_file_content",
     "get_path_components",
     "normalize_path",
     "validate_path",
-] 
\ No newline at end of file
+]
+
+# Helpers are imported on first access: file_utils pulls in archives and hashing
+_HELPER_MODULES = {
+    "get_file_info": ".file_utils",
+    "get_syntax_for_file": ".file_utils",
+    "is_text_file": ".file_utils",
+    "read_file_content": ".file_utils",
+    "get_path_components": ".path_utils",
+    "normalize_path": ".path_utils",
+    "validate_path": ".path_utils",
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Import a helper on first access."""
+    if name in _HELPER_MODULES:
+        module = import_module(_HELPER_MODULES[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,444 @@
+"""Read-only browsing of zip, wheel and tar archives as virtual directories.
+
+A member is addressed by a virtual path below the archive file, e.g.
+``/data/dist.whl/pkg/__init__.py``. Building an archive's index reads only
+the zip central directory or the tar headers (plain tars seek over member
+data; compressed tars have to be decompressed as a stream). Indexes are
+memoized by ``(st_dev, st_ino, st_mtime_ns)``, and opening a member
+decompresses that member alone.
+"""
+
+import bz2
+import gzip
+import io
+import lzma
+import os
+import stat
+import struct
+import tarfile
+import threading
+import time
+import zipfile
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import IO, Any, Dict, List, NamedTuple, Optional, Tuple
+
+from .fs_backend import get_backend
+from .listing import DirectoryListing, EntryInfo
+
+# File names browsed as archives
+ARCHIVE_SUFFIXES = (".zip", ".whl", ".jar", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+
+# Substrings every archive path contains, for a quick rejection
+_SUFFIX_MARKERS = (".zip", ".whl", ".jar", ".tar", ".tgz")
+
+# Archive indexes remembered by (dev, ino, mtime)
+MAX_CACHED_INDEXES = 16
+
+_DIR_MODE = stat.S_IFDIR | 0o755
+_FILE_MODE = stat.S_IFREG | 0o644
+
+# Compressed bytes read per step when decompressing a member
+READ_CHUNK = 16 * 1024
+
+# Zip local file header; the name and extra field follow it
+_ZIP_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+_ZIP_LOCAL_MAGIC = b"PK\x03\x04"
+
+# Decompressors for zip members, by compression method
+_ZIP_DECOMPRESSORS = {
+    zipfile.ZIP_STORED: lambda: None,
+    zipfile.ZIP_DEFLATED: lambda: zlib.decompressobj(-zlib.MAX_WBITS),
+    zipfile.ZIP_BZIP2: bz2.BZ2Decompressor,
+}
+
+# Stream openers for compressed tars, by leading magic bytes
+_DECOMPRESSORS = (
+    (b"\x1f\x8b", gzip.open),
+    (b"BZh", bz2.open),
+    (b"\xfd7zXZ\x00", lzma.open),
+)
+
+
+class ArchiveError(OSError):
+    """Raised when an archive or one of its members cannot be read."""
+
+
+class ArchiveMember(NamedTuple):
+    """One entry of an archive index."""
+
+    name: str  # Path inside the archive, without leading or trailing slash
+    is_dir: bool
+    size: int
+    mtime: float
+    mode: int  # st_mode, including the file type bits
+    is_symlink: bool = False
+    # Where the content is stored: (local header offset, method, compressed
+    # size) in a zip, (data offset, size) in a tar; None if unreadable
+    locator: Any = None
+
+    def stat_result(self) -> os.stat_result:
+        """Return the member's metadata as an os.stat_result."""
+        return os.stat_result((self.mode, 0, 0, 1, 0, 0, self.size, self.mtime, self.mtime, self.mtime))
+
+
+def is_archive_name(name: str) -> bool:
+    """Whether a file name has one of the browsable archive suffixes."""
+    return name.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def _clean_name(name: str) -> str:
+    """Normalize a stored member name to a relative slash-separated path."""
+    return "/".join(part for part in name.split("/") if part not in ("", "."))
+
+
+class ArchiveIndex:
+    """The member tree of one archive."""
+
+    def __init__(self, path: Path, kind: str, mtime_ns: int) -> None:
+        self.path = path
+        self.kind = kind
+        self.mtime_ns = mtime_ns
+        self._members: Dict[str, ArchiveMember] = {}
+        # Child names of each directory; "" is the archive root
+        self._children: Dict[str, List[str]] = {"": []}
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def add(self, member: ArchiveMember) -> None:
+        """Record a member, creating parent directories the archive omits."""
+        name = member.name
+        if not name or ".." in name.split("/"):
+            return
+
+        existing = self._members.get(name)
+        if existing is None:
+            parent, _, base = name.rpartition("/")
+            if parent and parent not in self._members:
+                self.add(ArchiveMember(parent, True, 0, member.mtime, _DIR_MODE))
+            siblings = self._children.get(parent)
+            if siblings is None:
+                # The parent is a file member (or was skipped), so it cannot hold children
+                return
+            siblings.append(base)
+        elif existing.is_dir and not member.is_dir:
+            # A file cannot replace a directory that already has children
+            return
+
+        self._members[name] = member
+        if member.is_dir:
+            self._children.setdefault(name, [])
+
+    def member(self, name: str) -> Optional[ArchiveMember]:
+        """Return the member at a path inside the archive."""
+        return self._members.get(name)
+
+    def listing(self, path: Path, name: str) -> DirectoryListing:
+        """Return the listing of a directory inside the archive.
+
+        ``path`` is the directory's virtual path and ``name`` its path
+        inside the archive ("" for the top level).
+        """
+        children = self._children.get(name)
+        if children is None:
+            raise NotADirectoryError(f"Not a directory in archive: {path}")
+
+        prefix = name + "/" if name else ""
+        entries = []
+        for child in children:
+            member = self._members[prefix + child]
+            entries.append(EntryInfo(
+                child,
+                member.is_dir,
+                member.is_symlink,
+                child.startswith("."),
+                member.size,
+                member.mtime,
+                # Files say False, so nested archives are not browsed
+                bool(self._children.get(member.name)),
+            ))
+
+        # Not detailed: members are never stat'ed or classified from disk
+        return DirectoryListing(path, entries, self.mtime_ns, detailed=False)
+
+
+def _read_zip_index(index: ArchiveIndex) -> None:
+    """Fill an index from a zip file's central directory."""
+    with zipfile.ZipFile(index.path) as zf:
+        for info in zf.infolist():
+            is_dir = info.is_dir()
+            mode = info.external_attr >> 16
+            if not stat.S_IFMT(mode):
+                mode = _DIR_MODE if is_dir else _FILE_MODE
+            try:
+                mtime = time.mktime(info.date_time + (0, 0, -1))
+            except (OverflowError, ValueError):
+                mtime = 0.0
+            # Encrypted members and unusual methods cannot be previewed
+            readable = info.compress_type in _ZIP_DECOMPRESSORS and not info.flag_bits & 0x1
+            index.add(ArchiveMember(
+                _clean_name(info.filename),
+                is_dir,
+                0 if is_dir else info.file_size,
+                mtime,
+                mode,
+                stat.S_ISLNK(mode),
+                (info.header_offset, info.compress_type, info.compress_size) if readable else None,
+            ))
+
+
+def _read_tar_index(index: ArchiveIndex) -> None:
+    """Fill an index from the headers of a (possibly compressed) tar file."""
+    with tarfile.open(index.path, mode="r:*") as tf:
+        info = tf.next()
+        while info is not None:
+            name = _clean_name(info.name)
+            locator = None
+            size = info.size
+            if info.isreg() and not info.sparse:
+                locator = (info.offset_data, info.size)
+            elif info.islnk():
+                # Hard links share the content of an earlier member
+                target = index.member(_clean_name(info.linkname))
+                if target is not None:
+                    locator, size = target.locator, target.size
+
+            type_bits = stat.S_IFDIR if info.isdir() else stat.S_IFLNK if info.issym() else stat.S_IFREG
+            index.add(ArchiveMember(
+                name,
+                info.isdir(),
+                0 if info.isdir() else size,
+                float(info.mtime),
+                type_bits | (info.mode & 0o7777),
+                info.issym(),
+                locator,
+            ))
+            # Headers are not kept: the index has everything needed
+            tf.members.clear()
+            info = tf.next()
+
+
+def _build_index(path: Path, mtime_ns: int) -> ArchiveIndex:
+    """Read an archive's index from disk."""
+    try:
+        if zipfile.is_zipfile(path):
+            index = ArchiveIndex(path, "zip", mtime_ns)
+            _read_zip_index(index)
+        else:
+            index = ArchiveIndex(path, "tar", mtime_ns)
+            _read_tar_index(index)
+    except ArchiveError:
+        raise
+    except (OSError, EOFError, zipfile.BadZipFile, tarfile.TarError, lzma.LZMAError) as e:
+        raise ArchiveError(f"Cannot read archive {path.name}: {e}") from e
+    return index
+
+
+class _IndexCache:
+    """A bounded, thread-safe map from (dev, ino, mtime_ns) to ArchiveIndex."""
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._indexes: "OrderedDict[Tuple[int, int, int], ArchiveIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[int, int, int]) -> Optional[ArchiveIndex]:
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                self._indexes.move_to_end(key)
+            return index
+
+    def put(self, key: Tuple[int, int, int], index: ArchiveIndex) -> None:
+        with self._lock:
+            self._indexes[key] = index
+            if len(self._indexes) > self.max_size:
+                self._indexes.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._indexes.clear()
+
+
+_cache = _IndexCache(MAX_CACHED_INDEXES)
+
+
+def load_archive_index(path: Path) -> ArchiveIndex:
+    """Return the index of an archive, reading it only if it changed."""
+    st = os.stat(path)
+    key = (st.st_dev, st.st_ino, st.st_mtime_ns)
+    index = _cache.get(key)
+    if index is None:
+        index = _build_index(path, st.st_mtime_ns)
+        _cache.put(key, index)
+    return index
+
+
+def split_archive_path(path: Path) -> Optional[Tuple[Path, str]]:
+    """Split a path into (archive file, path inside it), or None if it is not in one.
+
+    The archive itself splits into (path, ""). Only components with an
+    archive suffix are stat'ed.
+    """
+    lowered = str(path).lower()
+    if not any(marker in lowered for marker in _SUFFIX_MARKERS):
+        return None
+
+    for candidate in (path, *path.parents):
+        if is_archive_name(candidate.name) and get_backend().is_file(candidate):
+            if candidate == path:
+                return path, ""
+            return candidate, path.relative_to(candidate).as_posix()
+    return None
+
+
+def find_archive_member(path: Path) -> Optional[ArchiveMember]:
+    """Return the archive member at a virtual path, if it is one."""
+    location = split_archive_path(path)
+    if location is None or not location[1]:
+        return None
+    try:
+        return load_archive_index(location[0]).member(location[1])
+    except OSError:
+        return None
+
+
+def read_archive_listing(path: Path) -> DirectoryListing:
+    """List an archive, or a directory inside one, from the archive's index."""
+    location = split_archive_path(path)
+    if location is None:
+        raise FileNotFoundError(f"Not inside an archive: {path}")
+    archive, name = location
+    return load_archive_index(archive).listing(path, name)
+
+
+class _MemberReader(io.RawIOBase):
+    """Reads one member's content from an archive stream positioned at it.
+
+    ``size`` bytes are taken from the stream and passed through the
+    decompressor, if any, a chunk at a time.
+    """
+
+    def __init__(self, stream: IO[bytes], size: int, decompressor: Any = None) -> None:
+        super().__init__()
+        self._stream = stream
+        self._remaining = size
+        self._decompressor = decompressor
+        self._pending = b""
+        self._offset = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        while self._offset >= len(self._pending):
+            if self._remaining <= 0:
+                return 0
+            try:
+                data = self._stream.read(min(READ_CHUNK, self._remaining))
+                if not data:
+                    return 0
+                self._remaining -= len(data)
+                self._pending = self._decompressor.decompress(data) if self._decompressor else data
+            except (EOFError, zlib.error, lzma.LZMAError) as e:
+                raise ArchiveError(f"Corrupt archive member: {e}") from e
+            self._offset = 0
+
+        chunk = self._pending[self._offset:self._offset + len(buffer)]
+        buffer[:len(chunk)] = chunk
+        self._offset += len(chunk)
+        return len(chunk)
+
+    def close(self) -> None:
+        if not self.closed:
+            self._stream.close()
+        super().close()
+
+
+def _open_zip_member(archive: Path, locator: Tuple[int, int, int]) -> _MemberReader:
+    """Open a zip member from its local header, without reading the central directory."""
+    header_offset, method, compressed_size = locator
+    f = open(archive, "rb")
+    try:
+        f.seek(header_offset)
+        header = f.read(_ZIP_LOCAL_HEADER.size)
+        if len(header) != _ZIP_LOCAL_HEADER.size or not header.startswith(_ZIP_LOCAL_MAGIC):
+            raise ArchiveError(f"Bad zip member header in {archive.name}")
+        fields = _ZIP_LOCAL_HEADER.unpack(header)
+        # The data follows the name and extra field
+        f.seek(fields[10] + fields[11], os.SEEK_CUR)
+    except BaseException:
+        f.close()
+        raise
+    return _MemberReader(f, compressed_size, _ZIP_DECOMPRESSORS[method]())
+
+
+def _open_tar_stream(path: Path) -> IO[bytes]:
+    """Open a tar file's content stream, decompressing it if needed."""
+    with open(path, "rb") as f:
+        magic = f.read(6)
+    for prefix, opener in _DECOMPRESSORS:
+        if magic.startswith(prefix):
+            return opener(path, "rb")
+    return open(path, "rb")
+
+
+def open_archive_member(path: Path) -> IO[bytes]:
+    """Open the archive member at a virtual path for binary reading."""
+    location = split_archive_path(path)
+    if location is None or not location[1]:
+        raise FileNotFoundError(f"Not an archive member: {path}")
+
+    archive, name = location
+    index = load_archive_index(archive)
+    member = index.member(name)
+    if member is None:
+        raise FileNotFoundError(f"No such archive member: {path}")
+    if member.is_dir:
+        raise IsADirectoryError(f"Archive member is a directory: {path}")
+    if member.locator is None:
+        raise ArchiveError(f"Unsupported archive member: {path.name}")
+
+    try:
+        if index.kind == "zip":
+            return _open_zip_member(archive, member.locator)
+
+        offset, size = member.locator
+        stream = _open_tar_stream(archive)
+        try:
+            # Compressed streams decompress up to the member, not past it
+            stream.seek(offset)
+        except BaseException:
+            stream.close()
+            raise
+        return _MemberReader(stream, size)
+    except ArchiveError:
+        raise
+    except (OSError, EOFError, lzma.LZMAError) as e:
+        raise ArchiveError(f"Cannot read {path.name}: {e}") from e
+
+
+def stat_path(path: Path) -> os.stat_result:
+    """Stat a file, or an archive member given by its virtual path."""
+    try:
+        return get_backend().stat(path)
+    except OSError:
+        member = find_archive_member(path)
+        if member is None:
+            raise
+        return member.stat_result()
+
+
+def open_path(path: Path) -> IO[bytes]:
+    """Open a file, or an archive member given by its virtual path, for binary reading."""
+    location = split_archive_path(path)
+    if location is None or not location[1]:
+        return get_backend().open(path)
+    return open_archive_member(path)
+
+
+def clear_archive_cache() -> None:
+    """Forget every memoized archive index."""
+    _cache.clear()
@@ -0,0 +1,243 @@
+"""Recursive comparison of two directory trees.
+
+Both trees are listed directory by directory on a thread pool, with the
+two sides of each directory read in parallel. Entries that exist on one
+side only, change type or differ in size are reported as soon as their
+directory has been listed. Files of equal size are then compared by
+content hash on the hashing process pool. Their mtimes are not trusted,
+since copies get new ones, but they are part of the digest cache key, so
+unchanged files are not read again.
+"""
+
+import os
+import stat
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .hashing import HASH_ALGORITHM, hash_files
+
+# Statuses of a difference
+CHANGED = "changed"
+LEFT_ONLY = "left"
+RIGHT_ONLY = "right"
+ERROR = "error"
+
+# Threads listing directories
+COMPARE_WORKERS = 8
+
+# Seconds between cancellation checks while waiting on listings
+POLL_INTERVAL = 0.1
+
+# Differences found while hashing are reported in batches of up to this many,
+# or at least this often (seconds)
+REPORT_BATCH = 64
+REPORT_INTERVAL = 0.1
+
+
+class CompareEntry(NamedTuple):
+    """One difference between the two trees."""
+
+    relative: str  # Slash-separated path below both roots
+    status: str
+    is_dir: bool
+    left_size: Optional[int] = None
+    right_size: Optional[int] = None
+
+
+class CompareStats:
+    """Running totals of a comparison, read by the UI while it runs."""
+
+    def __init__(self) -> None:
+        self.directories = 0
+        self.files = 0
+        self.hashed = 0
+        self.to_hash = 0
+        self.differences = 0
+        self.done = False
+
+
+class _Entry(NamedTuple):
+    """One side's metadata for a directory entry (not following symlinks)."""
+
+    is_dir: bool
+    is_symlink: bool
+    size: int
+    dev: int
+    ino: int
+
+
+def _list_side(path: Path) -> Dict[str, _Entry]:
+    """List one side of a directory."""
+    entries = {}
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            entries[entry.name] = _Entry(
+                stat.S_ISDIR(st.st_mode),
+                stat.S_ISLNK(st.st_mode),
+                st.st_size,
+                st.st_dev,
+                st.st_ino,
+            )
+    return entries
+
+
+def _same_link(left: Path, right: Path) -> bool:
+    """Whether two symlinks point at the same target."""
+    try:
+        return os.readlink(left) == os.readlink(right)
+    except OSError:
+        return False
+
+
+def compare_trees(
+    left: Path,
+    right: Path,
+    on_diff: Callable[[List[CompareEntry]], None],
+    cancelled: Optional[Callable[[], bool]] = None,
+    stats: Optional[CompareStats] = None,
+    algorithm: str = HASH_ALGORITHM,
+) -> CompareStats:
+    """Compare two directory trees, passing differences to on_diff as they are found.
+
+    Directories present on one side only are reported once and not
+    descended into; symlinks are compared by target and never followed.
+    """
+    stats = stats or CompareStats()
+    is_cancelled = cancelled or (lambda: False)
+    # Same-size file pairs still to be compared by content, with their size
+    ties: List[Tuple[str, int]] = []
+
+    with ThreadPoolExecutor(max_workers=COMPARE_WORKERS, thread_name_prefix="compare") as pool:
+        pending: Dict[Future, Tuple[str, int]] = {}
+        partial: Dict[str, List[Optional[Future]]] = {}
+
+        def submit(relative: str) -> None:
+            partial[relative] = [None, None]
+            for side, root in enumerate((left, right)):
+                pending[pool.submit(_list_side, root / relative)] = (relative, side)
+
+        submit("")
+        while pending:
+            done, _ = wait(pending, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            if is_cancelled():
+                for future in pending:
+                    future.cancel()
+                return stats
+
+            for future in done:
+                relative, side = pending.pop(future)
+                sides = partial[relative]
+                sides[side] = future
+                if None in sides:
+                    continue
+                del partial[relative]
+
+                diffs = _compare_directory(left, right, relative, sides, stats, ties, submit)
+                if diffs:
+                    stats.differences += len(diffs)
+                    on_diff(diffs)
+
+    _compare_contents(left, right, ties, on_diff, is_cancelled, stats, algorithm)
+    stats.done = not is_cancelled()
+    return stats
+
+
+def _compare_directory(
+    left: Path,
+    right: Path,
+    relative: str,
+    sides: List[Optional[Future]],
+    stats: CompareStats,
+    ties: List[Tuple[str, int]],
+    submit: Callable[[str], None],
+) -> List[CompareEntry]:
+    """Compare the two listings of one directory by metadata."""
+    try:
+        left_entries = sides[0].result()
+        right_entries = sides[1].result()
+    except OSError:
+        return [CompareEntry(relative, ERROR, True)]
+
+    diffs = []
+    for name in sorted(left_entries.keys() | right_entries.keys()):
+        child = f"{relative}/{name}" if relative else name
+        a = left_entries.get(name)
+        b = right_entries.get(name)
+
+        if b is None:
+            diffs.append(CompareEntry(child, LEFT_ONLY, a.is_dir, None if a.is_dir else a.size))
+            continue
+        if a is None:
+            diffs.append(CompareEntry(child, RIGHT_ONLY, b.is_dir, None, None if b.is_dir else b.size))
+            continue
+
+        if a.is_dir and b.is_dir:
+            stats.directories += 1
+            submit(child)
+            continue
+
+        stats.files += 1
+        if a.is_dir != b.is_dir or a.is_symlink != b.is_symlink or (a.size != b.size and not a.is_symlink):
+            diffs.append(CompareEntry(child, CHANGED, a.is_dir or b.is_dir, a.size, b.size))
+        elif a.is_symlink:
+            if not _same_link(left / child, right / child):
+                diffs.append(CompareEntry(child, CHANGED, False, a.size, b.size))
+        elif (a.dev, a.ino) != (b.dev, b.ino):
+            # The same inode on both sides (a hardlink or bind mount) needs no hashing
+            ties.append((child, a.size))
+            stats.to_hash += 1
+
+    return diffs
+
+
+def _compare_contents(
+    left: Path,
+    right: Path,
+    ties: List[Tuple[str, int]],
+    on_diff: Callable[[List[CompareEntry]], None],
+    is_cancelled: Callable[[], bool],
+    stats: CompareStats,
+    algorithm: str,
+) -> None:
+    """Hash same-size file pairs and report those whose contents differ."""
+    owners: Dict[Path, Tuple[str, int]] = {}
+    paths: List[Path] = []
+    for tie in ties:
+        for root in (left, right):
+            path = root / tie[0]
+            owners[path] = tie
+            paths.append(path)
+
+    first: Dict[str, Optional[str]] = {}
+    diffs: List[CompareEntry] = []
+    reported_at = time.monotonic()
+
+    for path, digest in hash_files(paths, algorithm, is_cancelled):
+        relative, size = owners[path]
+        if relative not in first:
+            first[relative] = digest
+            continue
+
+        other = first.pop(relative)
+        stats.hashed += 1
+        if digest is None or other is None:
+            diffs.append(CompareEntry(relative, ERROR, False))
+        elif digest != other:
+            diffs.append(CompareEntry(relative, CHANGED, False, size, size))
+
+        now = time.monotonic()
+        if diffs and (len(diffs) >= REPORT_BATCH or now - reported_at >= REPORT_INTERVAL):
+            stats.differences += len(diffs)
+            on_diff(diffs)
+            diffs = []
+            reported_at = now
+
+    if diffs:
+        stats.differences += len(diffs)
+        on_diff(diffs)
@@ -0,0 +1,184 @@
+"""Duplicate file detection over a directory tree, in narrowing stages.
+
+1. Scan the tree in parallel and group regular files by size. Hard links
+   to an inode already seen are skipped, since they take no extra space.
+2. For sizes shared by several files, hash the first and last
+   ``EDGE_BYTES`` of each on a thread pool (small files whole).
+3. Fully hash only the files whose edges still match, on the hashing
+   process pool.
+
+A group is reported as soon as its last member has been hashed, so
+results stream in while larger files are still being read.
+"""
+
+import hashlib
+import os
+import stat
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, DefaultDict, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from .hashing import HASH_ALGORITHM, hash_files
+from .scan import scan_tree
+
+# Bytes hashed from each end of a file in the second stage
+EDGE_BYTES = 64 * 1024
+
+# Threads hashing file edges, and the most edge reads queued at once
+EDGE_WORKERS = 8
+EDGE_WINDOW = 1024
+
+# Files smaller than this are ignored (empty files reclaim nothing)
+MIN_SIZE = 1
+
+
+class DuplicateGroup(NamedTuple):
+    """Files with identical content."""
+
+    size: int
+    digest: str
+    paths: Tuple[Path, ...]
+
+    @property
+    def reclaimable(self) -> int:
+        """Bytes freed by keeping a single copy."""
+        return self.size * (len(self.paths) - 1)
+
+
+class DuplicateStats:
+    """Running totals of a search, read by the UI while it runs."""
+
+    def __init__(self) -> None:
+        self.files = 0
+        self.bytes_total = 0
+        self.size_candidates = 0
+        self.edge_candidates = 0
+        self.hashed = 0
+        self.bytes_read = 0
+        self.groups = 0
+        self.reclaimable = 0
+        self.stage = "scanning"
+        self.done = False
+
+
+def _walk_by_size(
+    root: Path,
+    stats: DuplicateStats,
+    cancelled: Callable[[], bool],
+) -> Dict[int, List[Path]]:
+    """Group the regular files below root by size, skipping extra hard links."""
+    by_size: DefaultDict[int, List[str]] = defaultdict(list)
+
+    for batch in scan_tree(root, unique_files=True, cancelled=cancelled):
+        prefix = os.path.join(batch.path, "")
+        for name, mode, size in zip(batch.names, batch.modes, batch.sizes):
+            if not stat.S_ISREG(mode) or size < MIN_SIZE:
+                continue
+            stats.files += 1
+            stats.bytes_total += size
+            by_size[size].append(prefix + name)
+
+    return {size: [Path(path) for path in paths] for size, paths in by_size.items() if len(paths) > 1}
+
+
+def hash_edges(path: Path, size: int, algorithm: str = HASH_ALGORITHM) -> Optional[str]:
+    """Hash the first and last EDGE_BYTES of a file (the whole file if it is small)."""
+    digest = hashlib.new(algorithm)
+    try:
+        with open(path, "rb") as f:
+            if size <= 2 * EDGE_BYTES:
+                digest.update(f.read())
+            else:
+                digest.update(f.read(EDGE_BYTES))
+                f.seek(-EDGE_BYTES, os.SEEK_END)
+                digest.update(f.read(EDGE_BYTES))
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def _groups_of(digests: Dict[Path, Optional[str]]) -> Dict[str, List[Path]]:
+    """Bucket files by digest, keeping buckets with more than one file."""
+    buckets: DefaultDict[str, List[Path]] = defaultdict(list)
+    for path, digest in digests.items():
+        if digest is not None:
+            buckets[digest].append(path)
+    return {digest: paths for digest, paths in buckets.items() if len(paths) > 1}
+
+
+def find_duplicates(
+    root: Path,
+    on_group: Callable[[DuplicateGroup], None],
+    cancelled: Optional[Callable[[], bool]] = None,
+    stats: Optional[DuplicateStats] = None,
+    algorithm: str = HASH_ALGORITHM,
+) -> DuplicateStats:
+    """Find files with identical content below root, reporting each group as it is confirmed."""
+    stats = stats or DuplicateStats()
+    is_cancelled = cancelled or (lambda: False)
+
+    def report(size: int, digest: str, paths: List[Path]) -> None:
+        group = DuplicateGroup(size, digest, tuple(sorted(paths)))
+        stats.groups += 1
+        stats.reclaimable += group.reclaimable
+        on_group(group)
+
+    by_size = _walk_by_size(root, stats, is_cancelled)
+    stats.size_candidates = sum(len(paths) for paths in by_size.values())
+
+    # Stage 2: edges; small files are hashed whole and are final here
+    stats.stage = "comparing edges"
+    full: List[Tuple[int, List[Path]]] = []
+    window: Deque[Tuple[int, List[Path], List[Future]]] = deque()
+    in_flight = 0
+
+    def settle() -> None:
+        nonlocal in_flight
+        size, paths, futures = window.popleft()
+        in_flight -= len(futures)
+        edges = {path: future.result() for path, future in zip(paths, futures)}
+        stats.bytes_read += len(paths) * min(size, 2 * EDGE_BYTES)
+        for digest, matches in _groups_of(edges).items():
+            if size <= 2 * EDGE_BYTES:
+                report(size, digest, matches)
+            else:
+                full.append((size, matches))
+                stats.edge_candidates += len(matches)
+
+    with ThreadPoolExecutor(max_workers=EDGE_WORKERS, thread_name_prefix="dupes") as pool:
+        # Largest sizes first: they reclaim the most
+        for size in sorted(by_size, reverse=True):
+            if is_cancelled():
+                for _, _, futures in window:
+                    for future in futures:
+                        future.cancel()
+                return stats
+            paths = by_size[size]
+            window.append((size, paths, [pool.submit(hash_edges, path, size, algorithm) for path in paths]))
+            in_flight += len(paths)
+            while in_flight > EDGE_WINDOW:
+                settle()
+        while window:
+            settle()
+
+    # Stage 3: full hashes of the remaining candidates
+    stats.stage = "hashing"
+    owners = {path: index for index, (_, paths) in enumerate(full) for path in paths}
+    digests: Dict[int, Dict[Path, Optional[str]]] = defaultdict(dict)
+
+    for path, digest in hash_files(list(owners), algorithm, is_cancelled):
+        index = owners[path]
+        size, paths = full[index]
+        stats.bytes_read += size
+        stats.hashed += 1
+        hashed = digests[index]
+        hashed[path] = digest
+        if len(hashed) == len(paths):
+            del digests[index]
+            for full_digest, matches in _groups_of(hashed).items():
+                report(size, full_digest, matches)
+
+    stats.stage = "done"
+    stats.done = not is_cancelled()
+    return stats
@@ -0,0 +1,122 @@
+"""Text encoding detection from a single sample of a file.
+
+The checks run in order of cost: byte order mark, UTF-8 validity, then
+byte-pair statistics that tell GB18030, Big5 and Shift-JIS apart, and
+finally a Western single-byte fallback. The caller decodes the file once
+with the detected codec, reusing the sample bytes.
+"""
+
+import codecs
+from typing import Iterator, Tuple
+
+from .file_types import BOMS
+
+# Bytes examined for detection
+SAMPLE_SIZE = 64 * 1024
+
+# Codecs that consume their own byte order mark
+_BOM_CODECS = {
+    "utf-8-sig": "utf-8-sig",
+    "utf-16-le": "utf-16",
+    "utf-16-be": "utf-16",
+    "utf-32-le": "utf-32",
+    "utf-32-be": "utf-32",
+}
+
+# Minimum double-byte pairs before the statistics are trusted
+_MIN_PAIRS = 4
+
+
+def _decodes(sample: bytes, encoding: str) -> bool:
+    """Whether a sample decodes cleanly, allowing a truncated last character."""
+    decoder = codecs.getincrementaldecoder(encoding)(errors="strict")
+    try:
+        decoder.decode(sample, final=False)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def _pair_stats(sample: bytes) -> Tuple[int, int, int, int]:
+    """Count double-byte pairs and how many have a high trail, kana lead or low trail byte.
+
+    In Chinese text most pairs are two high bytes, while accented Latin
+    text has lone high bytes followed by ASCII. Leads 0x81-0x83 are the
+    Shift-JIS punctuation, hiragana and katakana rows, which GB, Big5 and
+    cp1252 text almost never produce; trails 0x40-0x7E occur in Big5 but
+    never in the GB2312 range of GB18030.
+    """
+    pairs = high_pairs = kana = low_trail = 0
+    i, n = 0, len(sample) - 1
+
+    while i < n:
+        lead = sample[i]
+        if lead < 0x81 or lead == 0xFF:
+            i += 1
+            continue
+        trail = sample[i + 1]
+        pairs += 1
+        if trail >= 0x80:
+            high_pairs += 1
+        if lead <= 0x83:
+            kana += 1
+        if 0x40 <= trail <= 0x7E:
+            low_trail += 1
+        i += 2
+
+    return pairs, high_pairs, kana, low_trail
+
+
+def detect_encoding(sample: bytes) -> str:
+    """Return the codec name to decode a file whose first bytes are sample."""
+    for bom, name in BOMS:
+        if sample.startswith(bom):
+            return _BOM_CODECS[name]
+
+    if _decodes(sample, "utf-8"):
+        return "utf-8"
+
+    pairs, high_pairs, kana, low_trail = _pair_stats(sample)
+    if pairs >= _MIN_PAIRS:
+        if kana * 4 > pairs and _decodes(sample, "cp932"):
+            return "cp932"
+        if high_pairs * 2 >= pairs:
+            if low_trail * 10 > pairs and _decodes(sample, "cp950"):
+                return "cp950"
+            if _decodes(sample, "gb18030"):
+                return "gb18030"
+            if _decodes(sample, "cp950"):
+                return "cp950"
+
+    if _decodes(sample, "cp1252"):
+        return "cp1252"
+    # Decodes anything
+    return "latin-1"
+
+
+def iter_decoded_lines(
+    f,
+    encoding: str,
+    head: bytes = b"",
+    chunk_size: int = SAMPLE_SIZE,
+) -> Iterator[str]:
+    """Yield lines from a binary file with one incremental decoder.
+
+    ``head`` holds bytes already read from f (e.g. the detection sample);
+    further bytes are read only as lines are consumed. Line endings are
+    stripped and undecodable bytes are replaced.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    pending = ""
+    data = head or f.read(chunk_size)
+
+    while data:
+        parts = (pending + decoder.decode(data)).split("\n")
+        pending = parts.pop()
+        for part in parts:
+            yield part.rstrip("\r")
+        data = f.read(chunk_size)
+
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
@@ -0,0 +1,351 @@
+"""Copy, move and delete jobs that run off the UI thread.
+
+Files are copied inside the kernel where possible: ``os.copy_file_range``
+(Linux), then ``os.sendfile``, then a loop through one reused buffer.
+Large files are split into ranges copied by several threads at once with
+positional copies. A move within one filesystem is a rename; across
+filesystems it is a copy followed by a delete. Cancellation is checked
+between chunks, and a partly written file is removed.
+"""
+
+import errno
+import os
+import shutil
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Kinds of job
+COPY = "copy"
+MOVE = "move"
+DELETE = "delete"
+
+# Bytes per kernel copy call, between cancellation checks
+COPY_CHUNK = 8 * 1024 * 1024
+
+# Bytes per read in the buffered fallback
+BUFFER_SIZE = 1024 * 1024
+
+# Files at least this large are copied as PARALLEL_PARTS ranges at once
+PARALLEL_THRESHOLD = 64 * 1024 * 1024
+PARALLEL_PARTS = 4
+
+# Errors meaning a kernel copy method does not apply to these two files
+_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF, errno.ENOTSUP}
+
+_copy_file_range = getattr(os, "copy_file_range", None)
+_sendfile = getattr(os, "sendfile", None)
+_positional = hasattr(os, "preadv") and hasattr(os, "pwrite")
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when it is cancelled."""
+
+
+class FileJob:
+    """A copy, move or delete of a set of paths, with its progress.
+
+    The counters are written by the job's thread and read by the UI.
+    """
+
+    def __init__(self, kind: str, sources: Sequence[Path], destination: Optional[Path] = None) -> None:
+        self.kind = kind
+        self.sources = tuple(sources)
+        self.destination = destination
+        self.total_bytes = 0
+        self.done_bytes = 0
+        self.source_bytes: Dict[Path, int] = {}
+        self.total_files = 0
+        self.done_files = 0
+        self.errors: List[Tuple[Path, str]] = []
+        self.started: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.counted = False
+        self.cancel_requested = False
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        """Whether the job has stopped (finished or cancelled)."""
+        return self.finished_at is not None
+
+    def cancel(self) -> None:
+        """Ask the job to stop at the next chunk."""
+        self.cancel_requested = True
+
+    def advance(self, size: int) -> None:
+        """Count copied bytes (called from several threads for large files)."""
+        with self._lock:
+            self.done_bytes += size
+
+    def fraction(self) -> float:
+        """Return how much of the job is done, from 0 to 1."""
+        if not self.counted:
+            return 0.0
+        if self.kind == DELETE:
+            return self.done_files / self.total_files if self.total_files else 1.0
+        return self.done_bytes / self.total_bytes if self.total_bytes else 1.0
+
+    def throughput(self) -> float:
+        """Return the bytes copied per second so far."""
+        if self.started is None:
+            return 0.0
+        elapsed = (self.finished_at or time.monotonic()) - self.started
+        return self.done_bytes / elapsed if elapsed > 0 else 0.0
+
+    def eta(self) -> Optional[float]:
+        """Return the estimated seconds left, if it can be told."""
+        rate = self.throughput()
+        if self.kind == DELETE or not self.counted or rate <= 0:
+            return None
+        return max(self.total_bytes - self.done_bytes, 0) / rate
+
+    def describe(self) -> str:
+        """Return a short description such as "Copying 3 items to /tmp"."""
+        what = self.sources[0].name if len(self.sources) == 1 else f"{len(self.sources)} items"
+        if self.kind == DELETE:
+            return f"Deleting {what}"
+        verb = "Copying" if self.kind == COPY else "Moving"
+        return f"{verb} {what} to {self.destination}"
+
+
+def run_job(job: FileJob, cancelled: Optional[Callable[[], bool]] = None) -> FileJob:
+    """Run a job to completion (or cancellation), recording per-source errors."""
+    def is_cancelled() -> bool:
+        return job.cancel_requested or bool(cancelled and cancelled())
+
+    job.started = time.monotonic()
+    try:
+        _measure(job, is_cancelled)
+        for source in job.sources:
+            if is_cancelled():
+                break
+            try:
+                if job.kind == DELETE:
+                    _delete(source, job, is_cancelled)
+                else:
+                    _transfer(source, job, is_cancelled)
+            except OSError as error:
+                job.errors.append((source, error.strerror or str(error)))
+    except JobCancelled:
+        pass
+    finally:
+        job.cancel_requested = job.cancel_requested or bool(cancelled and cancelled())
+        job.finished_at = time.monotonic()
+    return job
+
+
+def _measure(job: FileJob, is_cancelled: Callable[[], bool]) -> None:
+    """Count the files and bytes a job will process, per source."""
+    for source in job.sources:
+        size = 0
+        stack = [source]
+        while stack:
+            if is_cancelled():
+                raise JobCancelled()
+            path = stack.pop()
+            try:
+                st = os.lstat(path)
+            except OSError:
+                continue
+            job.total_files += 1
+            if stat.S_ISDIR(st.st_mode):
+                try:
+                    with os.scandir(path) as it:
+                        stack.extend(Path(entry.path) for entry in it)
+                except OSError:
+                    pass
+            elif stat.S_ISREG(st.st_mode):
+                size += st.st_size
+        job.source_bytes[source] = size
+        job.total_bytes += size
+    job.counted = True
+
+
+def _transfer(source: Path, job: FileJob, is_cancelled: Callable[[], bool]) -> None:
+    """Copy or move one source into the job's destination directory."""
+    target = job.destination / source.name
+    if os.path.lexists(target):
+        raise FileExistsError(errno.EEXIST, "Destination already exists", str(target))
+    if source == job.destination or source in job.destination.parents:
+        raise OSError(errno.EINVAL, "Cannot copy a directory into itself", str(source))
+
+    if job.kind == MOVE and os.lstat(source).st_dev == os.stat(job.destination).st_dev:
+        # Same filesystem: a rename, whatever the size
+        os.rename(source, target)
+        job.advance(job.source_bytes.get(source, 0))
+        return
+
+    errors = len(job.errors)
+    _copy_tree(source, target, job, is_cancelled)
+    if job.kind == MOVE:
+        if len(job.errors) > errors:
+            # Never delete what was not copied
+            raise OSError(errno.EIO, "Not all files could be copied; the source was kept", str(source))
+        _delete(source, job, is_cancelled)
+
+
+def _copy_tree(source: Path, target: Path, job: FileJob, is_cancelled: Callable[[], bool]) -> None:
+    """Copy a file, symlink or directory tree, keeping modes and times."""
+    if is_cancelled():
+        raise JobCancelled()
+    st = os.lstat(source)
+    if stat.S_ISLNK(st.st_mode):
+        os.symlink(os.readlink(source), target)
+    elif stat.S_ISDIR(st.st_mode):
+        os.mkdir(target)
+        with os.scandir(source) as it:
+            children = [Path(entry.path) for entry in it]
+        for child in children:
+            try:
+                _copy_tree(child, target / child.name, job, is_cancelled)
+            except (OSError, shutil.Error) as error:
+                job.errors.append((child, getattr(error, "strerror", None) or str(error)))
+        shutil.copystat(source, target, follow_symlinks=False)
+    elif stat.S_ISREG(st.st_mode):
+        copy_file(source, target, job, is_cancelled)
+    else:
+        raise OSError(errno.EINVAL, "Not a regular file", str(source))
+    job.done_files += 1
+
+
+def copy_file(
+    source: Path,
+    target: Path,
+    job: Optional[FileJob] = None,
+    cancelled: Optional[Callable[[], bool]] = None,
+) -> None:
+    """Copy one regular file to a new path, in the kernel where possible."""
+    job = job or FileJob(COPY, (source,), target.parent)
+    is_cancelled = cancelled or (lambda: False)
+
+    with open(source, "rb", buffering=0) as fsrc, open(target, "xb", buffering=0) as fdst:
+        try:
+            size = os.fstat(fsrc.fileno()).st_size
+            if size >= PARALLEL_THRESHOLD and _positional:
+                _copy_parallel(fsrc.fileno(), fdst.fileno(), size, job, is_cancelled)
+            else:
+                _copy_stream(fsrc.fileno(), fdst.fileno(), job, is_cancelled)
+        except BaseException:
+            fdst.close()
+            try:
+                os.unlink(target)
+            except OSError:
+                pass
+            raise
+    shutil.copystat(source, target)
+
+
+def _copy_stream(src: int, dst: int, job: FileJob, is_cancelled: Callable[[], bool]) -> None:
+    """Copy from the current offsets to EOF, trying each method in turn."""
+    for method in (_copy_file_range, _sendfile):
+        if method is None:
+            continue
+        copied = 0
+        try:
+            while True:
+                if is_cancelled():
+                    raise JobCancelled()
+                if method is _sendfile:
+                    n = _sendfile(dst, src, None, COPY_CHUNK)
+                else:
+                    n = _copy_file_range(src, dst, COPY_CHUNK)
+                if not n:
+                    break
+                copied += n
+                job.advance(n)
+            if copied or os.fstat(src).st_size == 0:
+                return
+            # Some filesystems report 0 bytes instead of failing
+        except OSError as error:
+            if copied or error.errno not in _UNSUPPORTED:
+                raise
+
+    buffer = memoryview(bytearray(BUFFER_SIZE))
+    with open(src, "rb", buffering=0, closefd=False) as fsrc, open(dst, "wb", buffering=0, closefd=False) as fdst:
+        while True:
+            if is_cancelled():
+                raise JobCancelled()
+            n = fsrc.readinto(buffer)
+            if not n:
+                break
+            view = buffer[:n]
+            while view:
+                view = view[fdst.write(view):]
+            job.advance(n)
+
+
+def _copy_range(
+    src: int,
+    dst: int,
+    offset: int,
+    length: int,
+    job: FileJob,
+    is_cancelled: Callable[[], bool],
+) -> None:
+    """Copy one byte range of a file to the same offset, positionally."""
+    end = offset + length
+    if _copy_file_range is not None:
+        try:
+            while offset < end:
+                if is_cancelled():
+                    raise JobCancelled()
+                n = _copy_file_range(src, dst, min(COPY_CHUNK, end - offset), offset, offset)
+                if not n:
+                    break
+                offset += n
+                job.advance(n)
+            if offset >= end:
+                return
+        except OSError as error:
+            if error.errno not in _UNSUPPORTED:
+                raise
+
+    buffer = memoryview(bytearray(BUFFER_SIZE))
+    while offset < end:
+        if is_cancelled():
+            raise JobCancelled()
+        n = os.preadv(src, [buffer[:min(BUFFER_SIZE, end - offset)]], offset)
+        if not n:
+            break
+        view = buffer[:n]
+        position = offset
+        while view:
+            written = os.pwrite(dst, view, position)
+            view = view[written:]
+            position += written
+        offset += n
+        job.advance(n)
+
+
+def _copy_parallel(src: int, dst: int, size: int, job: FileJob, is_cancelled: Callable[[], bool]) -> None:
+    """Copy a large file as PARALLEL_PARTS ranges on their own threads."""
+    os.ftruncate(dst, size)
+    part = -(-size // PARALLEL_PARTS)
+    with ThreadPoolExecutor(max_workers=PARALLEL_PARTS, thread_name_prefix="copy") as pool:
+        futures = [
+            pool.submit(_copy_range, src, dst, offset, min(part, size - offset), job, is_cancelled)
+            for offset in range(0, size, part)
+        ]
+        for future in futures:
+            future.result()
+
+
+def _delete(path: Path, job: FileJob, is_cancelled: Callable[[], bool]) -> None:
+    """Delete a file, symlink or directory tree, counting each entry."""
+    if is_cancelled():
+        raise JobCancelled()
+    st = os.lstat(path)
+    if stat.S_ISDIR(st.st_mode):
+        with os.scandir(path) as it:
+            children = [Path(entry.path) for entry in it]
+        for child in children:
+            _delete(child, job, is_cancelled)
+        os.rmdir(path)
+    else:
+        os.unlink(path)
+    if job.kind == DELETE:
+        job.done_files += 1
@@ -0,0 +1,265 @@
+"""Content-based file type detection from signature (magic) bytes.
+
+Only the first ``SNIFF_SIZE`` bytes of a regular file are read. Results
+are memoized by ``(st_dev, st_ino, st_mtime_ns)`` so a file is read again
+only after it changes, and whole directories can be classified at once on
+a thread pool.
+"""
+
+import os
+import stat
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from .fs_backend import get_backend
+
+# Bytes read from the start of each file (tar's magic sits at offset 257)
+SNIFF_SIZE = 1024
+
+# Classified files remembered by (dev, ino, mtime)
+MAX_CACHED_TYPES = 65_536
+
+# Files per batch handed to one pool worker
+CLASSIFY_CHUNK = 64
+CLASSIFY_WORKERS = 8
+
+# Categories
+EXECUTABLE = "executable"
+IMAGE = "image"
+AUDIO = "audio"
+VIDEO = "video"
+ARCHIVE = "archive"
+DOCUMENT = "document"
+DATABASE = "database"
+TEXT = "text"
+BINARY = "binary"
+EMPTY = "empty"
+SPECIAL = "special"
+UNKNOWN = "unknown"
+
+
+class FileType(NamedTuple):
+    """The detected type of a file."""
+
+    kind: str
+    category: str
+    description: str
+    encoding: Optional[str] = None  # Set for text files with a BOM
+
+    @property
+    def is_text(self) -> bool:
+        """Whether the content looks like text."""
+        return self.category in (TEXT, EMPTY)
+
+
+# (offset, signature, kind, category, description), checked in order.
+# Short printable signatures (BZh, ID3, fLaC, OggS) could start a text file,
+# so they are only trusted with the header bytes that follow them; see
+# classify_bytes.
+SIGNATURES: Tuple[Tuple[int, bytes, str, str, str], ...] = (
+    (0, b"\x7fELF", "elf", EXECUTABLE, "ELF executable"),
+    (0, b"\xcf\xfa\xed\xfe", "macho", EXECUTABLE, "Mach-O executable"),
+    (0, b"\xce\xfa\xed\xfe", "macho", EXECUTABLE, "Mach-O executable"),
+    (0, b"\xca\xfe\xba\xbe", "macho", EXECUTABLE, "Mach-O universal binary / Java class"),
+    (0, b"\x00asm", "wasm", EXECUTABLE, "WebAssembly module"),
+    (0, b"\x89PNG\r\n\x1a\n", "png", IMAGE, "PNG image"),
+    (0, b"\xff\xd8\xff", "jpeg", IMAGE, "JPEG image"),
+    (0, b"GIF87a", "gif", IMAGE, "GIF image"),
+    (0, b"GIF89a", "gif", IMAGE, "GIF image"),
+    (0, b"\x00\x00\x01\x00", "ico", IMAGE, "Windows icon"),
+    (0, b"II*\x00", "tiff", IMAGE, "TIFF image"),
+    (0, b"MM\x00*", "tiff", IMAGE, "TIFF image"),
+    (0, b"%PDF-", "pdf", DOCUMENT, "PDF document"),
+    (0, b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "ole", DOCUMENT, "Microsoft Office document"),
+    (0, b"SQLite format 3\x00", "sqlite", DATABASE, "SQLite database"),
+    (0, b"PK\x03\x04", "zip", ARCHIVE, "Zip archive"),
+    (0, b"PK\x05\x06", "zip", ARCHIVE, "Zip archive (empty)"),
+    (0, b"\x1f\x8b", "gzip", ARCHIVE, "gzip compressed data"),
+    (0, b"\xfd7zXZ\x00", "xz", ARCHIVE, "xz compressed data"),
+    (0, b"\x28\xb5\x2f\xfd", "zstd", ARCHIVE, "Zstandard compressed data"),
+    (0, b"7z\xbc\xaf\x27\x1c", "7z", ARCHIVE, "7-Zip archive"),
+    (0, b"Rar!\x1a\x07", "rar", ARCHIVE, "RAR archive"),
+    (257, b"ustar", "tar", ARCHIVE, "tar archive"),
+    (0, b"\x1aE\xdf\xa3", "matroska", VIDEO, "Matroska / WebM video"),
+    (4, b"ftyp", "mp4", VIDEO, "MPEG-4 media"),
+)
+
+# RIFF containers carry their format at offset 8
+_RIFF_FORMATS = {
+    b"WAVE": ("wav", AUDIO, "WAV audio"),
+    b"AVI ": ("avi", VIDEO, "AVI video"),
+    b"WEBP": ("webp", IMAGE, "WebP image"),
+}
+
+# Magic of bzip2's first block and of its end of stream
+_BZIP2_BLOCKS = (b"1AY&SY", b"\x17rE8P\x90")
+
+# Byte order marks, longest first so UTF-32 LE wins over UTF-16 LE
+BOMS: Tuple[Tuple[bytes, str], ...] = (
+    (b"\x00\x00\xfe\xff", "utf-32-be"),
+    (b"\xff\xfe\x00\x00", "utf-32-le"),
+    (b"\xef\xbb\xbf", "utf-8-sig"),
+    (b"\xfe\xff", "utf-16-be"),
+    (b"\xff\xfe", "utf-16-le"),
+)
+
+# Control bytes that still occur in text files
+_TEXT_CONTROLS = frozenset(b"\t\n\r\f\b\x1b")
+_BINARY_BYTES = bytes(b for b in range(32) if b not in _TEXT_CONTROLS) + b"\x7f"
+
+_EMPTY_TYPE = FileType("empty", EMPTY, "empty file")
+_TEXT_TYPE = FileType("text", TEXT, "text")
+_BINARY_TYPE = FileType("data", BINARY, "binary data")
+_SPECIAL_TYPE = FileType("special", SPECIAL, "special file")
+
+
+def classify_bytes(head: bytes) -> FileType:
+    """Classify file content from its first bytes."""
+    if not head:
+        return _EMPTY_TYPE
+
+    for offset, signature, kind, category, description in SIGNATURES:
+        if head.startswith(signature, offset):
+            return FileType(kind, category, description)
+
+    if head.startswith(b"RIFF") and head[8:12] in _RIFF_FORMATS:
+        return FileType(*_RIFF_FORMATS[head[8:12]])
+
+    # Two-byte signatures are confirmed by their headers' zero fields
+    if head.startswith(b"MZ") and len(head) >= 64 and b"\x00" in head[2:64]:
+        return FileType("pe", EXECUTABLE, "Windows executable")
+    if head.startswith(b"BM") and head[6:10] == b"\x00\x00\x00\x00":
+        return FileType("bmp", IMAGE, "BMP image")
+
+    # Printable signatures are confirmed by the header fields after them:
+    # the block size and first block (or end of stream) magic of bzip2,
+    # the ID3v2 version, FLAC's leading STREAMINFO block, Ogg's version
+    if head.startswith(b"BZh") and head[3:4].isdigit() and head[4:10] in _BZIP2_BLOCKS:
+        return FileType("bzip2", ARCHIVE, "bzip2 compressed data")
+    if head.startswith(b"ID3") and head[3:4] in (b"\x02", b"\x03", b"\x04") and head[4:5] == b"\x00":
+        return FileType("mp3", AUDIO, "MP3 audio")
+    if head.startswith(b"fLaC") and head[4:8] in (b"\x00\x00\x00\x22", b"\x80\x00\x00\x22"):
+        return FileType("flac", AUDIO, "FLAC audio")
+    if head.startswith(b"OggS\x00") and len(head) > 5 and head[5] < 8:
+        return FileType("ogg", AUDIO, "Ogg media")
+
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return FileType("text", TEXT, f"text ({encoding})", encoding)
+
+    if b"\x00" in head:
+        return _BINARY_TYPE
+
+    try:
+        # The sample may end inside a multi-byte sequence
+        head.decode("utf-8")
+        return _TEXT_TYPE
+    except UnicodeDecodeError as e:
+        if e.start >= len(head) - 3 and e.reason == "unexpected end of data":
+            return _TEXT_TYPE
+
+    # Legacy 8-bit or multi-byte encodings: text if control bytes are rare
+    controls = len(head) - len(head.translate(None, _BINARY_BYTES))
+    return _TEXT_TYPE if controls * 100 <= len(head) else _BINARY_TYPE
+
+
+class _TypeCache:
+    """A bounded, thread-safe map from (dev, ino, mtime_ns) to FileType."""
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._types: "OrderedDict[Tuple[int, int, int], FileType]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[int, int, int]) -> Optional[FileType]:
+        with self._lock:
+            file_type = self._types.get(key)
+            if file_type is not None:
+                self._types.move_to_end(key)
+            return file_type
+
+    def put(self, key: Tuple[int, int, int], file_type: FileType) -> None:
+        with self._lock:
+            self._types[key] = file_type
+            if len(self._types) > self.max_size:
+                self._types.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._types.clear()
+
+
+_cache = _TypeCache(MAX_CACHED_TYPES)
+
+
+def classify_file(path: Path, st: Optional[os.stat_result] = None) -> FileType:
+    """Classify one file by its content, using the memo when it is unchanged.
+
+    Only regular files are opened; devices, FIFOs and sockets are reported
+    as special without reading them.
+    """
+    try:
+        if st is None:
+            st = get_backend().stat(path)
+        if not stat.S_ISREG(st.st_mode):
+            return _SPECIAL_TYPE
+        if st.st_size == 0:
+            return _EMPTY_TYPE
+
+        key = (st.st_dev, st.st_ino, st.st_mtime_ns)
+        file_type = _cache.get(key)
+        if file_type is not None:
+            return file_type
+
+        with get_backend().open(path) as f:
+            head = f.read(SNIFF_SIZE)
+    except OSError:
+        return FileType("unknown", UNKNOWN, "unreadable")
+
+    file_type = classify_bytes(head)
+    _cache.put(key, file_type)
+    return file_type
+
+
+def _classify_chunk(paths: Sequence[Path]) -> List[FileType]:
+    """Classify a chunk of files on one worker."""
+    return [classify_file(path) for path in paths]
+
+
+def classify_many(
+    paths: Iterable[Path],
+    on_chunk: Optional[Callable[[Dict[Path, FileType]], None]] = None,
+    cancelled: Optional[Callable[[], bool]] = None,
+    workers: int = CLASSIFY_WORKERS,
+) -> Dict[Path, FileType]:
+    """Classify many files on a thread pool.
+
+    Files are handed out in chunks; ``on_chunk`` receives each chunk's
+    results as they complete (in order), and ``cancelled`` is checked
+    between chunks to stop early.
+    """
+    paths = list(paths)
+    chunks = [paths[i:i + CLASSIFY_CHUNK] for i in range(0, len(paths), CLASSIFY_CHUNK)]
+    results: Dict[Path, FileType] = {}
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="classify") as pool:
+        futures = [pool.submit(_classify_chunk, chunk) for chunk in chunks]
+        for chunk, future in zip(chunks, futures):
+            if cancelled and cancelled():
+                for pending in futures:
+                    pending.cancel()
+                break
+            chunk_types = dict(zip(chunk, future.result()))
+            results.update(chunk_types)
+            if on_chunk:
+                on_chunk(chunk_types)
+
+    return results
+
+
+def clear_type_cache() -> None:
+    """Forget every memoized classification."""
+    _cache.clear()
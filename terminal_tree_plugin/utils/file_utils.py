@@ -1,18 +1,28 @@
 """File operation utilities."""
 
-import mimetypes
 import os
 import stat
 from pathlib import Path
-from typing import Dict, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
 
-from rich.syntax import Syntax
+from .archive import find_archive_member, open_path, stat_path
+from .encoding import SAMPLE_SIZE, detect_encoding, iter_decoded_lines
+from .file_types import SNIFF_SIZE, TEXT, UNKNOWN, FileType, classify_bytes, classify_file
+from .hashing import HASH_ALGORITHM, cached_digest
 
+if TYPE_CHECKING:
+    # Imported at call time: rich.syntax pulls in Pygments
+    from rich.syntax import Syntax
 
-def get_file_info(path: Path) -> Dict[str, str]:
-    """Get file information including size, permissions, and modification time."""
+
+def get_file_info(path: Path, algorithm: str = HASH_ALGORITHM) -> Dict[str, str]:
+    """Get file information including size, permissions, and modification time.
+    
+    The checksum is the memoized digest of a regular file, or empty if the
+    file has not been hashed since it last changed.
+    """
     try:
-        stat_info = path.stat()
+        stat_info = stat_path(path)
         
         # File size
         size = stat_info.st_size
@@ -34,11 +44,14 @@ def get_file_info(path: Path) -> Dict[str, str]:
         mtime = datetime.datetime.fromtimestamp(stat_info.st_mtime)
         mtime_str = mtime.strftime("%Y-%m-%d %H:%M:%S")
         
+        checksum = cached_digest(path, algorithm, stat_info) if stat.S_ISREG(mode) else None
+        
         return {
             "size": size_str,
             "permissions": permissions,
             "modified": mtime_str,
-            "type": "directory" if path.is_dir() else "file",
+            "type": "directory" if stat.S_ISDIR(mode) else "file",
+            "checksum": checksum or "",
         }
     except (OSError, ValueError):
         return {
@@ -46,22 +59,39 @@ def get_file_info(path: Path) -> Dict[str, str]:
             "permissions": "Unknown",
             "modified": "Unknown",
             "type": "unknown",
+            "checksum": "",
         }
 
 
+def classify_path(path: Path, st: Optional[os.stat_result] = None) -> FileType:
+    """Classify a file, or an archive member given by its virtual path, by content."""
+    if find_archive_member(path) is None:
+        return classify_file(path, st)
+    
+    try:
+        with open_path(path) as f:
+            return classify_bytes(f.read(SNIFF_SIZE))
+    except OSError:
+        return FileType("unknown", UNKNOWN, "unreadable")
+
+
 def is_text_file(path: Path, max_size: int = 1024 * 1024) -> bool:
     """Check if a file is likely to be a text file."""
-    if not path.is_file():
-        return False
-    
     # Check file size (skip very large files)
     try:
-        if path.stat().st_size > max_size:
+        st = stat_path(path)
+        if not stat.S_ISREG(st.st_mode) or st.st_size > max_size:
             return False
     except OSError:
         return False
     
-    # Check MIME type
+    # A known binary signature wins over the name (e.g. a PNG named .txt)
+    file_type = classify_path(path, st)
+    if file_type.category not in (TEXT, UNKNOWN) and not file_type.is_text:
+        return False
+    
+    # Check MIME type (mimetypes reads the system tables on first use)
+    import mimetypes
     mime_type, _ = mimetypes.guess_type(str(path))
     if mime_type and mime_type.startswith("text/"):
         return True
@@ -88,20 +118,8 @@ def is_text_file(path: Path, max_size: int = 1024 * 1024) -> bool:
     if path.name.lower() in text_names:
         return True
     
-    # Try to read a small portion and check for binary content
-    try:
-        with open(path, "rb") as f:
-            chunk = f.read(1024)
-            if b"\x00" in chunk:  # Null bytes indicate binary
-                return False
-            # Check if most characters are printable
-            try:
-                chunk.decode("utf-8")
-                return True
-            except UnicodeDecodeError:
-                return False
-    except (OSError, PermissionError):
-        return False
+    # Otherwise trust the content sniff
+    return file_type.is_text
 
 
 def read_file_content(path: Path, max_lines: int = 1000) -> Optional[str]:
@@ -109,29 +127,29 @@ def read_file_content(path: Path, max_lines: int = 1000) -> Optional[str]:
     if not is_text_file(path):
         return None
     
-    encodings = ["utf-8", "utf-16", "latin-1", "cp1252"]
-    
-    for encoding in encodings:
-        try:
-            with open(path, "r", encoding=encoding) as f:
-                lines = []
-                for i, line in enumerate(f):
-                    if i >= max_lines:
-                        lines.append(f"\n... (truncated after {max_lines} lines)")
-                        break
-                    lines.append(line.rstrip("\n\r"))
-                return "\n".join(lines)
-        except (UnicodeDecodeError, OSError):
-            continue
-    
-    return None
+    try:
+        with open_path(path) as f:
+            # One read serves both detection and the start of the content
+            sample = f.read(SAMPLE_SIZE)
+            encoding = detect_encoding(sample)
+            lines = []
+            for i, line in enumerate(iter_decoded_lines(f, encoding, sample)):
+                if i >= max_lines:
+                    lines.append(f"\n... (truncated after {max_lines} lines)")
+                    break
+                lines.append(line)
+            return "\n".join(lines)
+    except OSError:
+        return None
 
 
-def get_syntax_for_file(path: Path, content: str) -> Optional[Syntax]:
+def get_syntax_for_file(path: Path, content: str) -> Optional["Syntax"]:
     """Get Rich Syntax object for file content with appropriate highlighting."""
     if not content:
         return None
     
+    from rich.syntax import Syntax
+    
     # Map file extensions to lexer names
     extension_map = {
         ".py": "python",
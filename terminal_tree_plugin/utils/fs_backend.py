@@ -0,0 +1,551 @@
+"""Filesystem access behind a swappable backend.
+
+Listing, stat, open and mmap calls go through the process-wide backend
+returned by get_backend(). LocalBackend, the default, calls the os module
+directly. MemoryBackend keeps a synthetic tree in compact per-directory
+arrays, so it can hold millions of entries, and can delay every call to
+model a slow network mount. Benchmarks use it to exercise the hot paths
+deterministically without touching the disk.
+
+Archive contents, content hashing (which runs in other processes) and
+git metadata are always read from the local disk.
+"""
+
+import io
+import mmap
+import os
+import stat
+import threading
+import time
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import IO, Any, ContextManager, Dict, Iterator, List, Optional, Tuple, Union
+
+PathArg = Union[str, "os.PathLike[str]"]
+
+# Kinds of entry in a MemoryBackend
+FILE = 0
+DIRECTORY = 1
+SYMLINK = 2
+
+_MODES = {
+    FILE: stat.S_IFREG | 0o644,
+    DIRECTORY: stat.S_IFDIR | 0o755,
+    SYMLINK: stat.S_IFLNK | 0o777,
+}
+
+# Symlinks followed at most this many times before ELOOP
+MAX_SYMLINK_DEPTH = 40
+
+
+class MappedBytes(bytes):
+    """Bytes standing in for a read-only mmap (empty or in-memory files)."""
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "MappedBytes":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        pass
+
+
+class FilesystemBackend:
+    """The filesystem calls made while browsing. Paths are str or Path.
+
+    Subclasses implement scandir, stat, open and mmap; the rest are
+    built on them.
+    """
+
+    def scandir(self, path: PathArg) -> ContextManager[Iterator[Any]]:
+        """List a directory like os.scandir: a context manager over DirEntry-like objects."""
+        raise NotImplementedError
+
+    def stat(self, path: PathArg, follow_symlinks: bool = True) -> os.stat_result:
+        """Stat a path like os.stat, raising OSError if it cannot be."""
+        raise NotImplementedError
+
+    def open(self, path: PathArg) -> IO[bytes]:
+        """Open a file for binary reading."""
+        raise NotImplementedError
+
+    def mmap(self, path: PathArg) -> Union[mmap.mmap, MappedBytes]:
+        """Map a file read-only. The result supports len(), slicing and close()."""
+        raise NotImplementedError
+
+    def lstat(self, path: PathArg) -> os.stat_result:
+        """Stat a path without following a final symlink."""
+        return self.stat(path, follow_symlinks=False)
+
+    def exists(self, path: PathArg) -> bool:
+        """Whether a path exists (following symlinks)."""
+        try:
+            self.stat(path)
+        except (OSError, ValueError):
+            return False
+        return True
+
+    def lexists(self, path: PathArg) -> bool:
+        """Whether a path exists, counting broken symlinks."""
+        try:
+            self.lstat(path)
+        except (OSError, ValueError):
+            return False
+        return True
+
+    def is_dir(self, path: PathArg) -> bool:
+        """Whether a path is a directory (following symlinks)."""
+        try:
+            return stat.S_ISDIR(self.stat(path).st_mode)
+        except (OSError, ValueError):
+            return False
+
+    def is_file(self, path: PathArg) -> bool:
+        """Whether a path is a regular file (following symlinks)."""
+        try:
+            return stat.S_ISREG(self.stat(path).st_mode)
+        except (OSError, ValueError):
+            return False
+
+    def iterdir(self, path: PathArg) -> List[Path]:
+        """Return the paths of a directory's entries."""
+        with self.scandir(path) as it:
+            return [Path(entry.path) for entry in it]
+
+
+class LocalBackend(FilesystemBackend):
+    """The local disk, through the os module."""
+
+    def scandir(self, path: PathArg) -> ContextManager[Iterator["os.DirEntry[str]"]]:
+        return os.scandir(path)
+
+    def stat(self, path: PathArg, follow_symlinks: bool = True) -> os.stat_result:
+        return os.stat(path, follow_symlinks=follow_symlinks)
+
+    def open(self, path: PathArg) -> IO[bytes]:
+        return open(path, "rb")
+
+    def mmap(self, path: PathArg) -> Union[mmap.mmap, MappedBytes]:
+        with open(path, "rb") as f:
+            # Empty files cannot be mapped
+            if os.fstat(f.fileno()).st_size == 0:
+                return MappedBytes()
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def exists(self, path: PathArg) -> bool:
+        return os.path.exists(path)
+
+    def lexists(self, path: PathArg) -> bool:
+        return os.path.lexists(path)
+
+    def is_dir(self, path: PathArg) -> bool:
+        return os.path.isdir(path)
+
+    def is_file(self, path: PathArg) -> bool:
+        return os.path.isfile(path)
+
+
+def _stat_result(kind: int, ino: int, dev: int, size: int, mtime_ns: int) -> os.stat_result:
+    """Build an os.stat_result, including the nanosecond times."""
+    seconds = mtime_ns / 1e9
+    whole = int(seconds)
+    return os.stat_result((
+        _MODES[kind], ino, dev, 1, 0, 0, size, whole, whole, whole,
+        seconds, seconds, seconds, mtime_ns, mtime_ns, mtime_ns,
+    ))
+
+
+class _MemoryDir:
+    """One directory of a MemoryBackend: its entries as parallel arrays."""
+
+    __slots__ = ("names", "kinds", "sizes", "mtimes", "inos", "index", "ino", "mtime_ns")
+
+    def __init__(self, ino: int, mtime_ns: int) -> None:
+        self.names: List[str] = []
+        self.kinds = bytearray()
+        self.sizes = array("q")
+        self.mtimes = array("q")
+        self.inos = array("q")
+        # Name -> position, built on the first lookup by name
+        self.index: Optional[Dict[str, int]] = None
+        self.ino = ino
+        self.mtime_ns = mtime_ns
+
+    def find(self, name: str) -> Optional[int]:
+        if self.index is None:
+            self.index = {entry: i for i, entry in enumerate(self.names)}
+        return self.index.get(name)
+
+    def append(self, name: str, kind: int, size: int, mtime_ns: int, ino: int) -> None:
+        if self.index is not None:
+            self.index[name] = len(self.names)
+        self.names.append(name)
+        self.kinds.append(kind)
+        self.sizes.append(size)
+        self.mtimes.append(mtime_ns)
+        self.inos.append(ino)
+        self.mtime_ns = max(self.mtime_ns, mtime_ns)
+
+    def extend(self, names: List[str], kind: int, size: int, mtime_ns: int, first_ino: int) -> None:
+        """Append many entries of one kind and size at once."""
+        if self.index is not None:
+            self.index.update((name, i) for i, name in enumerate(names, len(self.names)))
+        count = len(names)
+        self.names.extend(names)
+        self.kinds.extend(bytes((kind,)) * count)
+        self.sizes.extend(array("q", (size,)) * count)
+        self.mtimes.extend(array("q", (mtime_ns,)) * count)
+        self.inos.extend(range(first_ino, first_ino + count))
+        self.mtime_ns = max(self.mtime_ns, mtime_ns)
+
+
+class MemoryEntry:
+    """A MemoryBackend directory entry, shaped like os.DirEntry."""
+
+    __slots__ = ("name", "path", "_backend", "_dir", "_position", "_stat")
+
+    def __init__(self, backend: "MemoryBackend", directory: _MemoryDir, prefix: str, position: int) -> None:
+        self.name = directory.names[position]
+        self.path = prefix + self.name
+        self._backend = backend
+        self._dir = directory
+        self._position = position
+        self._stat: Optional[os.stat_result] = None
+
+    def inode(self) -> int:
+        return self._dir.inos[self._position]
+
+    def is_symlink(self) -> bool:
+        return self._dir.kinds[self._position] == SYMLINK
+
+    def is_dir(self, follow_symlinks: bool = True) -> bool:
+        kind = self._dir.kinds[self._position]
+        if kind == SYMLINK and follow_symlinks:
+            return self._backend.is_dir(self.path)
+        return kind == DIRECTORY
+
+    def is_file(self, follow_symlinks: bool = True) -> bool:
+        kind = self._dir.kinds[self._position]
+        if kind == SYMLINK and follow_symlinks:
+            return self._backend.is_file(self.path)
+        return kind == FILE
+
+    def stat(self, follow_symlinks: bool = True) -> os.stat_result:
+        if follow_symlinks and self.is_symlink():
+            return self._backend.stat(self.path)
+        if self._stat is None:
+            # Like os.DirEntry, the first stat is a call and later ones are cached
+            self._backend._call("stat", self.path)
+            self._stat = self._backend._entry_stat(self.path, self._dir, self._position)
+        return self._stat
+
+    def __fspath__(self) -> str:
+        return self.path
+
+    def __repr__(self) -> str:
+        return f"<MemoryEntry {self.name!r}>"
+
+
+class _Listing:
+    """The iterator returned by MemoryBackend.scandir."""
+
+    def __init__(self, backend: "MemoryBackend", directory: _MemoryDir, parent: str) -> None:
+        self._backend = backend
+        self._dir = directory
+        self._prefix = parent.rstrip(os.sep) + os.sep
+        self._position = 0
+
+    def __iter__(self) -> "_Listing":
+        return self
+
+    def __next__(self) -> MemoryEntry:
+        if self._position >= len(self._dir.names):
+            raise StopIteration
+        entry = MemoryEntry(self._backend, self._dir, self._prefix, self._position)
+        self._position += 1
+        return entry
+
+    def close(self) -> None:
+        self._position = len(self._dir.names)
+
+    def __enter__(self) -> "_Listing":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class _ZeroFile(io.RawIOBase):
+    """A read-only file of zeros, the content of files added without data."""
+
+    def __init__(self, size: int) -> None:
+        super().__init__()
+        self._size = size
+        self._offset = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        view = memoryview(buffer).cast("B")
+        n = max(min(len(view), self._size - self._offset), 0)
+        view[:n] = bytes(n)
+        self._offset += n
+        return n
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        base = {os.SEEK_SET: 0, os.SEEK_CUR: self._offset, os.SEEK_END: self._size}[whence]
+        self._offset = max(base + offset, 0)
+        return self._offset
+
+    def tell(self) -> int:
+        return self._offset
+
+
+class MemoryBackend(FilesystemBackend):
+    """A synthetic filesystem held in memory.
+
+    Only directories get a dict entry; files are a slot in their parent's
+    arrays, so a tree of millions of files costs a few dozen bytes per
+    entry. Every call sleeps for ``latency`` seconds, or the latency of
+    the mount it falls under (see add_mount), and is counted in ``calls``.
+    Files added without data read as zeros.
+    """
+
+    def __init__(self, latency: float = 0.0, mtime_ns: Optional[int] = None) -> None:
+        self.latency = latency
+        self.mtime_ns = time.time_ns() if mtime_ns is None else mtime_ns
+        self.calls: Counter = Counter()
+        self._dirs: Dict[str, _MemoryDir] = {}
+        self._data: Dict[str, bytes] = {}
+        self._links: Dict[str, str] = {}
+        # (path prefix, st_dev, latency), longest prefix first
+        self._mounts: List[Tuple[str, int, float]] = []
+        self._next_ino = 2
+        self._lock = threading.Lock()
+        self._dirs[os.sep] = _MemoryDir(1, self.mtime_ns)
+
+    # Building the tree
+
+    def add_dir(self, path: PathArg, mtime_ns: Optional[int] = None) -> str:
+        """Create a directory and any missing parents; return its key."""
+        key = self._key(path)
+        if key in self._dirs:
+            return key
+        parent, name = os.path.split(key)
+        directory = self._dirs.get(parent) or self._dirs[self.add_dir(parent)]
+        if directory.find(name) is not None:
+            raise FileExistsError(f"File exists: {key}")
+        mtime_ns = self.mtime_ns if mtime_ns is None else mtime_ns
+        ino = self._take_ino()
+        directory.append(name, DIRECTORY, 4096, mtime_ns, ino)
+        self._dirs[key] = _MemoryDir(ino, mtime_ns)
+        return key
+
+    def add_file(
+        self,
+        path: PathArg,
+        data: Optional[bytes] = None,
+        size: int = 0,
+        mtime_ns: Optional[int] = None,
+    ) -> None:
+        """Create a file with the given content, or ``size`` zero bytes."""
+        key = self._key(path)
+        parent, name = os.path.split(key)
+        directory = self._dirs.get(parent) or self._dirs[self.add_dir(parent)]
+        if directory.find(name) is not None:
+            raise FileExistsError(f"File exists: {key}")
+        if data is not None:
+            self._data[key] = data
+            size = len(data)
+        directory.append(name, FILE, size, self.mtime_ns if mtime_ns is None else mtime_ns, self._take_ino())
+
+    def add_symlink(self, path: PathArg, target: str) -> None:
+        """Create a symlink; a relative target is taken from the link's directory."""
+        key = self._key(path)
+        parent, name = os.path.split(key)
+        directory = self._dirs.get(parent) or self._dirs[self.add_dir(parent)]
+        if directory.find(name) is not None:
+            raise FileExistsError(f"File exists: {key}")
+        self._links[key] = target
+        directory.append(name, SYMLINK, len(target), self.mtime_ns, self._take_ino())
+
+    def add_mount(self, path: PathArg, latency: float) -> int:
+        """Make a subtree a separate device with its own latency; return its st_dev."""
+        key = self.add_dir(path)
+        dev = len(self._mounts) + 2
+        self._mounts.append((key, dev, latency))
+        self._mounts.sort(key=lambda mount: len(mount[0]), reverse=True)
+        return dev
+
+    def populate(
+        self,
+        root: PathArg,
+        depth: int,
+        dirs_per_dir: int,
+        files_per_dir: int,
+        file_size: int = 1024,
+    ) -> int:
+        """Fill a directory with a regular synthetic tree; return the entries added.
+
+        Each directory down to ``depth`` levels gets ``dirs_per_dir``
+        subdirectories and ``files_per_dir`` files of ``file_size`` bytes.
+        The file names are shared between directories.
+        """
+        added = 0
+        names = [f"file_{i:06d}.dat" for i in range(files_per_dir)]
+        level = [self.add_dir(root)]
+        for remaining in range(depth, -1, -1):
+            below = []
+            for parent in level:
+                self._dirs[parent].extend(names, FILE, file_size, self.mtime_ns, self._take_ino(files_per_dir))
+                added += files_per_dir
+                if remaining:
+                    for i in range(dirs_per_dir):
+                        below.append(self.add_dir(os.path.join(parent, f"dir_{i:04d}")))
+                    added += dirs_per_dir
+            level = below
+        return added
+
+    def __len__(self) -> int:
+        return sum(len(directory.names) for directory in self._dirs.values())
+
+    # FilesystemBackend
+
+    def scandir(self, path: PathArg) -> _Listing:
+        key = self._key(path)
+        self._call("scandir", key)
+        resolved = self._resolve(key)
+        directory = self._dirs.get(resolved)
+        if directory is None:
+            self._lookup(resolved)
+            raise NotADirectoryError(f"Not a directory: {key}")
+        return _Listing(self, directory, key)
+
+    def stat(self, path: PathArg, follow_symlinks: bool = True) -> os.stat_result:
+        key = self._key(path)
+        self._call("stat", key)
+        if follow_symlinks:
+            key = self._resolve(key)
+        elif self._links and key != os.sep:
+            parent, name = os.path.split(key)
+            key = os.path.join(self._resolve(parent), name)
+        if key == os.sep:
+            return _stat_result(DIRECTORY, 1, self._device(key), 4096, self._dirs[key].mtime_ns)
+        directory, position = self._lookup(key)
+        return self._entry_stat(key, directory, position)
+
+    def open(self, path: PathArg) -> IO[bytes]:
+        key = self._key(path)
+        self._call("open", key)
+        key = self._resolve(key)
+        if key in self._dirs:
+            raise IsADirectoryError(f"Is a directory: {key}")
+        directory, position = self._lookup(key)
+        data = self._data.get(key)
+        if data is not None:
+            return io.BytesIO(data)
+        return io.BufferedReader(_ZeroFile(directory.sizes[position]))
+
+    def mmap(self, path: PathArg) -> MappedBytes:
+        key = self._key(path)
+        self._call("mmap", key)
+        key = self._resolve(key)
+        if key in self._dirs:
+            raise IsADirectoryError(f"Is a directory: {key}")
+        directory, position = self._lookup(key)
+        data = self._data.get(key)
+        return MappedBytes(data if data is not None else bytes(directory.sizes[position]))
+
+    # Internals
+
+    def _key(self, path: PathArg) -> str:
+        key = os.path.normpath(os.path.abspath(os.fspath(path)))
+        # normpath keeps a leading double slash
+        return os.sep + key.lstrip(os.sep)
+
+    def _take_ino(self, count: int = 1) -> int:
+        """Reserve ``count`` consecutive inode numbers and return the first."""
+        with self._lock:
+            ino = self._next_ino
+            self._next_ino += count
+        return ino
+
+    def _mount_of(self, key: str) -> Optional[Tuple[str, int, float]]:
+        for mount in self._mounts:
+            prefix = mount[0]
+            if key == prefix or key.startswith(prefix + os.sep):
+                return mount
+        return None
+
+    def _device(self, key: str) -> int:
+        mount = self._mount_of(key)
+        return mount[1] if mount else 1
+
+    def _call(self, name: str, key: str) -> None:
+        """Count a call and apply its latency."""
+        self.calls[name] += 1
+        mount = self._mount_of(key) if self._mounts else None
+        delay = mount[2] if mount else self.latency
+        if delay > 0:
+            time.sleep(delay)
+
+    def _lookup(self, key: str) -> Tuple[_MemoryDir, int]:
+        """Return the parent directory and position of an entry, or raise ENOENT."""
+        parent, name = os.path.split(key)
+        directory = self._dirs.get(parent)
+        position = directory.find(name) if directory is not None else None
+        if position is None:
+            raise FileNotFoundError(f"No such file or directory: {key}")
+        return directory, position
+
+    def _resolve(self, key: str) -> str:
+        """Follow symlinks in every component of a path."""
+        if not self._links:
+            return key
+        for _ in range(MAX_SYMLINK_DEPTH):
+            parts = key.split(os.sep)
+            for i in range(2, len(parts) + 1):
+                prefix = os.sep.join(parts[:i]) or os.sep
+                target = self._links.get(prefix)
+                if target is not None:
+                    base = os.path.dirname(prefix)
+                    key = self._key(os.path.join(base, target, *parts[i:]))
+                    break
+            else:
+                return key
+        raise OSError(f"Too many levels of symbolic links: {key}")
+
+    def _entry_stat(self, key: str, directory: _MemoryDir, position: int) -> os.stat_result:
+        kind = directory.kinds[position]
+        mtime_ns = directory.mtimes[position]
+        if kind == DIRECTORY:
+            # Directories' times move as entries are added to them
+            below = self._dirs.get(key) or self._dirs.get(self._resolve(key))
+            if below is not None:
+                mtime_ns = below.mtime_ns
+        return _stat_result(kind, directory.inos[position], self._device(key), directory.sizes[position], mtime_ns)
+
+
+_backend: FilesystemBackend = LocalBackend()
+
+
+def get_backend() -> FilesystemBackend:
+    """Return the process-wide filesystem backend."""
+    return _backend
+
+
+def set_backend(backend: FilesystemBackend) -> FilesystemBackend:
+    """Switch the process-wide backend and return the previous one.
+
+    Listings cached from the previous backend are not dropped; callers
+    switching mid-session should invalidate the listing cache.
+    """
+    global _backend
+    previous, _backend = _backend, backend
+    return previous
@@ -0,0 +1,262 @@
+"""Per-mount filesystem latency tracking with timeouts for metadata calls.
+
+Metadata calls run on daemon worker threads and the caller waits at most
+``timeout`` seconds, so a hung NFS/SSHFS/FUSE mount produces a
+``FilesystemTimeout`` instead of freezing the UI. Each device (``st_dev``)
+has its own workers, so calls stuck on one mount never hold up another.
+Latencies are recorded per device; a mount whose recent calls are slow, or
+that has timed out, is reported as degraded so callers can skip expensive
+work.
+"""
+
+import queue
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from .fs_backend import get_backend
+
+# Defaults, overridable per monitor
+DEFAULT_TIMEOUT = 2.0
+SLOW_THRESHOLD = 0.5
+LATENCY_WINDOW = 32
+MAX_WORKERS = 8
+
+
+class FilesystemTimeout(OSError):
+    """Raised when a filesystem call does not finish within the timeout."""
+
+
+class _DaemonPool:
+    """A minimal thread pool whose workers never block interpreter exit.
+
+    ``concurrent.futures.ThreadPoolExecutor`` joins its workers at exit,
+    which would hang on a stuck mount; these threads are daemons instead.
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        self._tasks: "queue.Queue[Tuple[Future, Callable[..., Any], tuple]]" = queue.Queue()
+        self.max_workers = max_workers
+        self._workers = 0
+        self._idle = 0
+        # Calls that timed out and are still queued or running
+        self.overdue = 0
+        self._lock = threading.Lock()
+
+    def submit(self, func: Callable[..., Any], *args: Any) -> Future:
+        """Schedule func(*args) and return a future for its result."""
+        future: Future = Future()
+        self._tasks.put((future, func, args))
+
+        with self._lock:
+            if self._idle == 0 and self._workers < self.max_workers:
+                self._workers += 1
+                threading.Thread(target=self._run, name="fs-monitor", daemon=True).start()
+
+        return future
+
+    def mark_overdue(self, future: Future) -> None:
+        """Count a timed-out call until it finishes (a hung call never does)."""
+        if future.cancel():
+            return
+        with self._lock:
+            self.overdue += 1
+        future.add_done_callback(self._finish_overdue)
+
+    def _finish_overdue(self, future: Future) -> None:
+        """Stop counting a timed-out call once it has finished."""
+        with self._lock:
+            self.overdue -= 1
+
+    def _run(self) -> None:
+        """Worker loop."""
+        while True:
+            with self._lock:
+                self._idle += 1
+            future, func, args = self._tasks.get()
+            with self._lock:
+                self._idle -= 1
+
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(func(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+
+class MountStats:
+    """Recent latencies and state for one device."""
+
+    def __init__(self, window: int) -> None:
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.timeouts = 0
+        self.degraded = False
+
+    @property
+    def median(self) -> float:
+        """Median of the recorded latencies in seconds."""
+        return statistics.median(self.latencies) if self.latencies else 0.0
+
+
+class FilesystemMonitor:
+    """Runs metadata calls with a timeout and tracks latency per mount."""
+
+    def __init__(
+        self,
+        timeout: float = DEFAULT_TIMEOUT,
+        slow_threshold: float = SLOW_THRESHOLD,
+        window: int = LATENCY_WINDOW,
+        max_workers: int = MAX_WORKERS,
+    ) -> None:
+        self.timeout = timeout
+        self.slow_threshold = slow_threshold
+        self._window = window
+        self._max_workers = max_workers
+        self._pools: Dict[Optional[int], _DaemonPool] = {}
+        self._mounts: Dict[Optional[int], MountStats] = {}
+        self._devices: Dict[str, int] = {}
+        # Device lookups still running, by path
+        self._lookups: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _pool(self, dev: Optional[int]) -> _DaemonPool:
+        """Get (or create) the workers for a device (None for unknown devices)."""
+        with self._lock:
+            pool = self._pools.get(dev)
+            if pool is None:
+                pool = self._pools[dev] = _DaemonPool(self._max_workers)
+            return pool
+
+    def _stats(self, dev: Optional[int]) -> MountStats:
+        """Get (or create) the stats for a device."""
+        with self._lock:
+            stats = self._mounts.get(dev)
+            if stats is None:
+                stats = self._mounts[dev] = MountStats(self._window)
+            return stats
+
+    def record(self, dev: Optional[int], seconds: float) -> None:
+        """Record the latency of a call on a device and update its mode."""
+        stats = self._stats(dev)
+        stats.latencies.append(seconds)
+
+        if stats.median > self.slow_threshold:
+            stats.degraded = True
+        elif stats.degraded and len(stats.latencies) == stats.latencies.maxlen:
+            # Recover only after a full window of fast calls
+            if stats.median < self.slow_threshold / 4:
+                stats.degraded = False
+                stats.timeouts = 0
+
+    def record_timeout(self, dev: Optional[int]) -> None:
+        """Record a call on a device that did not finish in time."""
+        stats = self._stats(dev)
+        stats.timeouts += 1
+        stats.degraded = True
+        stats.latencies.append(self.timeout)
+
+    def call(self, dev: Optional[int], func: Callable[..., Any], *args: Any) -> Any:
+        """Run func(*args) on one of the device's workers, waiting at most ``timeout`` seconds.
+
+        Raises FilesystemTimeout if the call does not finish in time; the
+        mount is then marked degraded. Once every worker of the device is
+        stuck, calls fail at once instead of queueing. Calls on an unknown
+        device (None) share their own workers and are not recorded.
+        Exceptions from func propagate.
+        """
+        pool = self._pool(dev)
+        if pool.overdue >= pool.max_workers:
+            raise FilesystemTimeout("Filesystem not responding")
+
+        start = time.perf_counter()
+        future = pool.submit(func, *args)
+
+        try:
+            result = future.result(timeout=self.timeout)
+        except FutureTimeout:
+            pool.mark_overdue(future)
+            if dev is not None:
+                self.record_timeout(dev)
+            raise FilesystemTimeout(f"Filesystem call timed out after {self.timeout:.1f}s")
+        except OSError:
+            if dev is not None:
+                self.record(dev, time.perf_counter() - start)
+            raise
+
+        if dev is not None:
+            self.record(dev, time.perf_counter() - start)
+        return result
+
+    def device_of(self, path: Path) -> Optional[int]:
+        """Return the st_dev of a directory, or None if it cannot be stat'ed in time.
+
+        Results are cached per path since directories rarely change mounts.
+        A lookup that is still running is waited on again rather than
+        repeated, so a hung mount point holds at most one worker.
+        """
+        key = str(path)
+        dev = self._devices.get(key)
+        if dev is not None:
+            return dev
+
+        pool = self._pool(None)
+        with self._lock:
+            future = self._lookups.get(key)
+            started = future is None
+            if started:
+                future = self._lookups[key] = pool.submit(get_backend().stat, key)
+        if started:
+            future.add_done_callback(lambda _: self._lookups.pop(key, None))
+
+        try:
+            dev = future.result(timeout=self.timeout).st_dev
+        except (FutureTimeout, OSError):
+            return None
+
+        self._devices[key] = dev
+        return dev
+
+    def is_degraded(self, dev: Optional[int]) -> bool:
+        """Whether a device is currently in degraded (slow) mode."""
+        stats = self._mounts.get(dev)
+        return bool(stats and stats.degraded)
+
+    def mount_summary(self) -> Dict[Optional[int], Dict[str, float]]:
+        """Return median latency, timeouts and mode for each known device."""
+        with self._lock:
+            mounts = dict(self._mounts)
+        return {
+            dev: {
+                "median_ms": stats.median * 1000,
+                "timeouts": stats.timeouts,
+                "degraded": stats.degraded,
+            }
+            for dev, stats in mounts.items()
+        }
+
+
+_monitor: Optional[FilesystemMonitor] = None
+
+
+def get_monitor() -> FilesystemMonitor:
+    """Return the process-wide filesystem monitor."""
+    global _monitor
+    if _monitor is None:
+        _monitor = FilesystemMonitor()
+    return _monitor
+
+
+def configure_monitor(
+    timeout: float = DEFAULT_TIMEOUT,
+    slow_threshold: float = SLOW_THRESHOLD,
+) -> FilesystemMonitor:
+    """Replace the process-wide monitor with one using the given settings."""
+    global _monitor
+    _monitor = FilesystemMonitor(timeout=timeout, slow_threshold=slow_threshold)
+    return _monitor
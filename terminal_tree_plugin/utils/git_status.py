@@ -0,0 +1,189 @@
+"""Git status for tree decorations, from one batched ``git status`` call.
+
+``git status --porcelain=v2 -z`` is run once per repository and parsed
+into a prefix map keyed by path components, so a file's status or a
+directory's aggregate dirty flag is found in O(depth).
+"""
+
+import os
+import subprocess
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+# Status markers shown next to entries
+MODIFIED = "M"
+ADDED = "A"
+DELETED = "D"
+RENAMED = "R"
+UNTRACKED = "?"
+IGNORED = "!"
+CONFLICT = "U"
+
+GIT_TIMEOUT = 30.0
+
+
+class _StatusNode:
+    """One path component in the status prefix map."""
+
+    __slots__ = ("children", "status", "subtree", "dirty")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_StatusNode"] = {}
+        self.status: Optional[str] = None
+        # Set for directory records ("dir/"): applies to everything below
+        self.subtree: Optional[str] = None
+        self.dirty = False
+
+
+class GitStatusMap:
+    """Per-path git status for one repository."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._root_node = _StatusNode()
+
+    def add(self, relative: str, status: str) -> None:
+        """Record the status of a path relative to the repository root."""
+        is_dir = relative.endswith("/")
+        parts = [part for part in relative.split("/") if part]
+        dirty = status != IGNORED
+
+        node = self._root_node
+        for part in parts:
+            if dirty:
+                node.dirty = True
+            node = node.children.setdefault(part, _StatusNode())
+
+        node.status = status
+        if is_dir:
+            node.subtree = status
+            node.dirty = node.dirty or dirty
+
+    def _relative_parts(self, path: Path) -> Optional[Tuple[str, ...]]:
+        """Return path's components relative to the root, or None if outside."""
+        try:
+            return path.relative_to(self.root).parts
+        except ValueError:
+            return None
+
+    def lookup(self, path: Path) -> Optional[str]:
+        """Return the status marker of a path, if it has one."""
+        parts = self._relative_parts(path)
+        if parts is None:
+            return None
+
+        node = self._root_node
+        for part in parts:
+            if node.subtree:
+                return node.subtree
+            child = node.children.get(part)
+            if child is None:
+                return None
+            node = child
+        return node.status
+
+    def is_dirty(self, path: Path) -> bool:
+        """Whether anything at or below a directory is modified or untracked."""
+        parts = self._relative_parts(path)
+        if parts is None:
+            return False
+
+        node = self._root_node
+        for part in parts:
+            if node.subtree:
+                return node.subtree != IGNORED
+            child = node.children.get(part)
+            if child is None:
+                return False
+            node = child
+        return node.dirty
+
+
+def find_repo_root(path: Path) -> Optional[Path]:
+    """Return the nearest ancestor (or path itself) containing .git."""
+    for candidate in (path, *path.parents):
+        if (candidate / ".git").exists():
+            return candidate
+    return None
+
+
+def git_index_path(root: Path) -> Path:
+    """Return the index file of a repository, following .git files (worktrees)."""
+    dot_git = root / ".git"
+    if dot_git.is_file():
+        try:
+            content = dot_git.read_text(encoding="utf-8").strip()
+        except OSError:
+            return dot_git / "index"
+        if content.startswith("gitdir:"):
+            git_dir = Path(content[len("gitdir:"):].strip())
+            if not git_dir.is_absolute():
+                git_dir = root / git_dir
+            return git_dir / "index"
+    return dot_git / "index"
+
+
+def _status_marker(xy: str) -> str:
+    """Map a porcelain XY code to a single marker."""
+    if "D" in xy:
+        return DELETED
+    if "R" in xy or "C" in xy:
+        return RENAMED
+    if xy[0] == "A":
+        return ADDED
+    return MODIFIED
+
+
+def parse_porcelain_v2(output: bytes) -> Iterator[Tuple[str, str]]:
+    """Yield (relative path, marker) pairs from ``git status --porcelain=v2 -z``."""
+    records = output.decode("utf-8", errors="surrogateescape").split("\0")
+    i = 0
+
+    while i < len(records):
+        record = records[i]
+        i += 1
+        if not record:
+            continue
+
+        kind = record[0]
+        if kind == "1":
+            # 1 XY sub mH mI mW hH hI path
+            fields = record.split(" ", 8)
+            yield fields[8], _status_marker(fields[1])
+        elif kind == "2":
+            # 2 XY sub mH mI mW hH hI Xscore path, then the original path
+            fields = record.split(" ", 9)
+            yield fields[9], _status_marker(fields[1])
+            i += 1
+        elif kind == "u":
+            # u XY sub m1 m2 m3 mW h1 h2 h3 path
+            yield record.split(" ", 10)[10], CONFLICT
+        elif kind == "?":
+            yield record[2:], UNTRACKED
+        elif kind == "!":
+            yield record[2:], IGNORED
+
+
+def load_git_status(root: Path) -> Optional[GitStatusMap]:
+    """Run git status once for a repository and build its status map.
+
+    Returns None if git is unavailable or the command fails.
+    """
+    env = dict(os.environ, GIT_OPTIONAL_LOCKS="0")
+    try:
+        result = subprocess.run(
+            ["git", "-C", str(root), "status", "--porcelain=v2", "-z", "--ignored=matching"],
+            capture_output=True,
+            env=env,
+            timeout=GIT_TIMEOUT,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+    if result.returncode != 0:
+        return None
+
+    status_map = GitStatusMap(root)
+    for relative, marker in parse_porcelain_v2(result.stdout):
+        status_map.add(relative, marker)
+    return status_map
@@ -0,0 +1,408 @@
+"""Content hashing on a process pool, memoized by file identity.
+
+Files are read in fixed-size chunks into one reused buffer per worker.
+Digests are remembered by ``(st_dev, st_ino, st_size, st_mtime_ns)`` and
+the algorithm, so a file is only hashed again after it changes. The memo
+is kept on disk as an append-only log in the user's cache directory, so
+it survives restarts.
+"""
+
+import hashlib
+import multiprocessing
+import os
+import stat
+import threading
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import resource_tracker
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+HASH_ALGORITHM = "blake2b"
+HASH_ALGORITHMS = ("blake2b", "sha256")
+
+# Bytes read per chunk
+HASH_CHUNK = 1024 * 1024
+
+# Files handed to one pool task, bounded by count and total size
+HASH_BATCH_FILES = 64
+HASH_BATCH_BYTES = 64 * 1024 * 1024
+
+# Batches smaller than this are hashed in the calling thread
+INLINE_BYTES = 256 * 1024
+
+# Digests remembered by file identity
+MAX_CACHED_HASHES = 262_144
+
+# Seconds between cancellation checks while waiting on the pool
+POLL_INTERVAL = 0.1
+
+# The on-disk log is rewritten once it holds this many times more lines
+# than there are live digests
+COMPACT_RATIO = 2
+
+HashKey = Tuple[str, int, int, int, int]
+
+
+def hash_key(st: os.stat_result, algorithm: str = HASH_ALGORITHM) -> HashKey:
+    """Return the cache key of a file's digest."""
+    return (algorithm, st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def hash_file(
+    path: Union[str, Path],
+    algorithm: str = HASH_ALGORITHM,
+    buffer: Optional[memoryview] = None,
+) -> Optional[str]:
+    """Return the hex digest of a file, or None if it cannot be read."""
+    if buffer is None:
+        buffer = memoryview(bytearray(HASH_CHUNK))
+    digest = hashlib.new(algorithm)
+    try:
+        with open(path, "rb", buffering=0) as f:
+            while True:
+                n = f.readinto(buffer)
+                if not n:
+                    break
+                digest.update(buffer[:n])
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def _hash_batch(paths: Sequence[str], algorithm: str) -> List[Optional[str]]:
+    """Hash a batch of files on one worker, sharing a single read buffer."""
+    buffer = memoryview(bytearray(HASH_CHUNK))
+    return [hash_file(path, algorithm, buffer) for path in paths]
+
+
+def default_cache_file() -> Path:
+    """Return where digests are kept between runs."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "terminal-tree" / "hashes.log"
+
+
+class _HashCache:
+    """A bounded, thread-safe map from HashKey to hex digest.
+
+    With a backing file, digests are loaded from it on first use and new
+    ones are appended as they are stored.
+    """
+
+    def __init__(self, max_size: int, path: Optional[Path] = None) -> None:
+        self.max_size = max_size
+        self.path = path
+        self._digests: "OrderedDict[HashKey, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loaded = path is None
+
+    def get(self, key: HashKey) -> Optional[str]:
+        with self._lock:
+            self._load()
+            digest = self._digests.get(key)
+            if digest is not None:
+                self._digests.move_to_end(key)
+            return digest
+
+    def put_many(self, items: Sequence[Tuple[HashKey, str]]) -> None:
+        with self._lock:
+            self._load()
+            for key, digest in items:
+                self._digests[key] = digest
+                if len(self._digests) > self.max_size:
+                    self._digests.popitem(last=False)
+            self._append(items)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._digests.clear()
+            self._loaded = True
+            if self.path is not None:
+                try:
+                    self.path.unlink()
+                except OSError:
+                    pass
+
+    def _load(self) -> None:
+        """Read the backing file once (lock held)."""
+        if self._loaded:
+            return
+        self._loaded = True
+        lines = 0
+        try:
+            with open(self.path, encoding="ascii", errors="replace") as f:
+                for line in f:
+                    lines += 1
+                    fields = line.split()
+                    if len(fields) != 6:
+                        continue
+                    try:
+                        key = (fields[0], int(fields[1]), int(fields[2]), int(fields[3]), int(fields[4]))
+                    except ValueError:
+                        continue
+                    self._digests[key] = fields[5]
+                    self._digests.move_to_end(key)
+                    if len(self._digests) > self.max_size:
+                        self._digests.popitem(last=False)
+        except OSError:
+            return
+        if lines > COMPACT_RATIO * max(len(self._digests), 1024):
+            self._compact()
+
+    def _append(self, items: Sequence[Tuple[HashKey, str]]) -> None:
+        """Append digests to the backing file (lock held)."""
+        if self.path is None or not items:
+            return
+        data = "".join(
+            f"{algorithm} {dev} {ino} {size} {mtime_ns} {digest}\n"
+            for (algorithm, dev, ino, size, mtime_ns), digest in items
+        )
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="ascii") as f:
+                f.write(data)
+        except OSError:
+            # The cache directory is not writable; keep digests in memory only
+            self.path = None
+
+    def _compact(self) -> None:
+        """Rewrite the backing file with only the live digests (lock held)."""
+        temp = self.path.with_name(self.path.name + f".{os.getpid()}.tmp")
+        try:
+            with open(temp, "w", encoding="ascii") as f:
+                for (algorithm, dev, ino, size, mtime_ns), digest in self._digests.items():
+                    f.write(f"{algorithm} {dev} {ino} {size} {mtime_ns} {digest}\n")
+            os.replace(temp, self.path)
+        except OSError:
+            try:
+                temp.unlink()
+            except OSError:
+                pass
+
+
+_cache = _HashCache(MAX_CACHED_HASHES, default_cache_file())
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_hash_pool() -> ProcessPoolExecutor:
+    """Return the process pool shared by every hashing job.
+
+    Workers are started with forkserver (or spawn) rather than fork, since
+    the parent runs threads.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            methods = multiprocessing.get_all_start_methods()
+            method = "forkserver" if "forkserver" in methods else "spawn"
+            _pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context(method),
+                initializer=_silence_output,
+            )
+        return _pool
+
+
+def start_pool_helpers() -> None:
+    """Start multiprocessing's resource tracker before an app takes over stderr.
+
+    The tracker passes sys.stderr's descriptor on to its process, and inside
+    a running Textual app sys.stderr reports -1, so a pool first started
+    from the UI could not start the tracker.
+    """
+    if os.name == "posix":
+        resource_tracker.ensure_running()
+
+
+def _silence_output() -> None:
+    """Point a worker's stdout and stderr at /dev/null, so it cannot draw over the UI."""
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.dup2(devnull, 2)
+    os.close(devnull)
+
+
+def _reset_pool() -> None:
+    """Drop a broken pool so the next job starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        _pool = None
+
+
+def cached_digest(
+    path: Path,
+    algorithm: str = HASH_ALGORITHM,
+    st: Optional[os.stat_result] = None,
+) -> Optional[str]:
+    """Return a file's memoized digest if it has not changed since."""
+    if st is None:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+    return _cache.get(hash_key(st, algorithm))
+
+
+def _batches(
+    files: Sequence[Tuple[Path, os.stat_result]],
+) -> Iterator[List[Tuple[Path, os.stat_result]]]:
+    """Split files into pool tasks by count and total size."""
+    batch: List[Tuple[Path, os.stat_result]] = []
+    size = 0
+    for item in files:
+        batch.append(item)
+        size += item[1].st_size
+        if len(batch) >= HASH_BATCH_FILES or size >= HASH_BATCH_BYTES:
+            yield batch
+            batch, size = [], 0
+    if batch:
+        yield batch
+
+
+def hash_files(
+    paths: Iterable[Path],
+    algorithm: str = HASH_ALGORITHM,
+    cancelled: Optional[Callable[[], bool]] = None,
+) -> Iterator[Tuple[Path, Optional[str]]]:
+    """Yield (path, hex digest) for files as their digests become available.
+
+    Memoized digests come first; the rest are hashed in batches on the
+    process pool and yielded in completion order. Unreadable files yield
+    None. Stopping the iteration (or ``cancelled`` returning True) cancels
+    the batches that have not started.
+    """
+    pending: List[Tuple[Path, os.stat_result]] = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            yield path, None
+            continue
+        digest = _cache.get(hash_key(st, algorithm))
+        if digest is not None:
+            yield path, digest
+        else:
+            pending.append((path, st))
+
+    futures: Dict[Future, List[Tuple[Path, os.stat_result]]] = {}
+    try:
+        for batch in _batches(pending):
+            if sum(st.st_size for _, st in batch) < INLINE_BYTES:
+                # Not worth a round trip to the pool
+                digests = _hash_batch([str(path) for path, _ in batch], algorithm)
+                yield from _store(batch, digests, algorithm)
+            else:
+                future = get_hash_pool().submit(_hash_batch, [str(path) for path, _ in batch], algorithm)
+                futures[future] = batch
+            if cancelled and cancelled():
+                return
+
+        while futures:
+            done, _ = wait(futures, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            if cancelled and cancelled():
+                return
+            for future in done:
+                batch = futures.pop(future)
+                try:
+                    digests = future.result()
+                except BrokenProcessPool:
+                    # A worker died (e.g. killed); finish here and start a new pool next time
+                    _reset_pool()
+                    digests = _hash_batch([str(path) for path, _ in batch], algorithm)
+                yield from _store(batch, digests, algorithm)
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def _store(
+    batch: Sequence[Tuple[Path, os.stat_result]],
+    digests: Sequence[Optional[str]],
+    algorithm: str,
+) -> Iterator[Tuple[Path, Optional[str]]]:
+    """Memoize a batch's digests and yield them."""
+    _cache.put_many([
+        (hash_key(st, algorithm), digest)
+        for (_, st), digest in zip(batch, digests)
+        if digest is not None
+    ])
+    for (path, _), digest in zip(batch, digests):
+        yield path, digest
+
+
+class DirectoryHashStats:
+    """Progress of a directory hash, read by the UI while it runs."""
+
+    def __init__(self) -> None:
+        self.files = 0
+        self.hashed = 0
+        self.bytes_total = 0
+        self.bytes_hashed = 0
+        self.errors = 0
+        self.listed = False
+
+
+def hash_directory(
+    path: Path,
+    algorithm: str = HASH_ALGORITHM,
+    cancelled: Optional[Callable[[], bool]] = None,
+    stats: Optional[DirectoryHashStats] = None,
+) -> Optional[str]:
+    """Return one digest for a directory's contents, or None if cancelled or unreadable.
+
+    The digest covers the relative path and content digest of every file
+    below the directory, and the target of every symlink (which are not
+    followed), so two trees with the same files and names hash alike.
+    """
+    stats = stats or DirectoryHashStats()
+    files: Dict[Path, str] = {}
+    links: Dict[str, str] = {}
+    sizes: Dict[Path, int] = {}
+
+    for directory, dirnames, filenames in os.walk(path, onerror=lambda error: None):
+        if cancelled and cancelled():
+            return None
+        dirnames.sort()
+        for name in dirnames + filenames:
+            child = os.path.join(directory, name)
+            relative = os.path.relpath(child, path).replace(os.sep, "/")
+            try:
+                st = os.lstat(child)
+            except OSError:
+                stats.errors += 1
+                continue
+            if stat.S_ISLNK(st.st_mode):
+                try:
+                    links[relative] = os.readlink(child)
+                except OSError:
+                    stats.errors += 1
+            elif stat.S_ISREG(st.st_mode):
+                files[Path(child)] = relative
+                sizes[Path(child)] = st.st_size
+                stats.files += 1
+                stats.bytes_total += st.st_size
+    stats.listed = True
+
+    lines: List[str] = [f"{relative}\0->{target}\n" for relative, target in links.items()]
+    for child, digest in hash_files(list(files), algorithm, cancelled):
+        if digest is None:
+            stats.errors += 1
+        else:
+            lines.append(f"{files[child]}\0{digest}\n")
+        stats.hashed += 1
+        stats.bytes_hashed += sizes[child]
+
+    if (cancelled and cancelled()) or stats.errors:
+        return None
+    digest = hashlib.new(algorithm)
+    for line in sorted(lines):
+        digest.update(line.encode("utf-8", "surrogateescape"))
+    return digest.hexdigest()
+
+
+def clear_hash_cache() -> None:
+    """Forget every memoized digest, on disk too."""
+    _cache.clear()
@@ -0,0 +1,250 @@
+"""Ignore-file support (.gitignore, .ignore and user exclude patterns).
+
+Patterns use gitignore syntax. Each directory's rules compile into a few
+combined regular expressions, and the matcher for a directory stacks its
+own rules on top of its ancestors', so checking an entry costs at most one
+regex match per group of rules per level. ``.gitignore`` files are only
+honoured inside a git repository, and rules never cross a repository root.
+"""
+
+import re
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Pattern, Sequence, Tuple
+
+# Ignore files read in each directory; later files take precedence
+IGNORE_FILES = (".gitignore", ".ignore")
+
+# Always excluded while filtering is enabled
+DEFAULT_EXCLUDES = (".git/",)
+
+
+class IgnoreRule(NamedTuple):
+    """One parsed ignore pattern."""
+
+    regex: str
+    negate: bool
+    dir_only: bool
+
+
+def _translate_glob(pattern: str) -> str:
+    """Translate a gitignore glob (without leading/trailing slash) to a regex."""
+    i, n = 0, len(pattern)
+    out = []
+
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**", i):
+                end = i + 2
+                if end < n and pattern[end] == "/":
+                    # "**/" matches zero or more directories
+                    out.append("(?:.*/)?")
+                    i = end + 1
+                else:
+                    out.append(".*")
+                    i = end
+                continue
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            # "]" right after "[" (or "[!") is part of the class
+            start = i + 2 if pattern.startswith("[!", i) else i + 1
+            close = pattern.find("]", start + 1)
+            if close == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:close].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = close + 1
+                continue
+        elif c == "\\" and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+            continue
+        else:
+            out.append(re.escape(c))
+        i += 1
+
+    return "".join(out)
+
+
+def parse_pattern(line: str) -> Optional[IgnoreRule]:
+    """Parse one line of an ignore file, or return None for blanks and comments."""
+    line = line.rstrip("\r\n")
+    if not line or line.startswith("#"):
+        return None
+
+    # Trailing spaces are ignored unless escaped
+    stripped = line.rstrip(" ")
+    if stripped.endswith("\\") and len(stripped) < len(line):
+        stripped += " "
+    line = stripped
+
+    negate = line.startswith("!")
+    if negate:
+        line = line[1:]
+    elif line.startswith(("\\!", "\\#")):
+        line = line[1:]
+
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+
+    # A slash anywhere but the end anchors the pattern to its directory
+    anchored = "/" in line
+    body = _translate_glob(line.lstrip("/"))
+    regex = body if anchored else "(?:.*/)?" + body
+    return IgnoreRule(regex, negate, dir_only)
+
+
+class IgnoreRules:
+    """The compiled rules of one directory level.
+
+    Consecutive rules with the same polarity are merged into one regex;
+    groups are checked last to first because the last match wins.
+    """
+
+    def __init__(self, base: Path, rules: Sequence[IgnoreRule]) -> None:
+        self.base = base
+        self.groups: List[Tuple[bool, Optional[Pattern[str]], Optional[Pattern[str]]]] = []
+
+        i = 0
+        while i < len(rules):
+            negate = rules[i].negate
+            j = i
+            while j < len(rules) and rules[j].negate == negate:
+                j += 1
+            group = rules[i:j]
+            self.groups.append((
+                negate,
+                self._compile([rule.regex for rule in group]),
+                self._compile([rule.regex for rule in group if not rule.dir_only]),
+            ))
+            i = j
+
+    @staticmethod
+    def _compile(regexes: List[str]) -> Optional[Pattern[str]]:
+        """Combine regexes into one anchored alternation."""
+        if not regexes:
+            return None
+        return re.compile("^(?:" + "|".join(regexes) + ")$")
+
+    def match(self, relative: str, is_dir: bool) -> Optional[bool]:
+        """Return True (ignored), False (re-included) or None (no rule matched)."""
+        for negate, dir_regex, file_regex in reversed(self.groups):
+            regex = dir_regex if is_dir else file_regex
+            if regex is not None and regex.match(relative):
+                return not negate
+        return None
+
+
+def load_rules(base: Path, lines: Sequence[str]) -> Optional[IgnoreRules]:
+    """Compile the lines of one or more ignore files, or None if there are no rules."""
+    rules = [rule for rule in map(parse_pattern, lines) if rule is not None]
+    return IgnoreRules(base, rules) if rules else None
+
+
+class IgnoreMatcher:
+    """The ignore rules in effect for the entries of one directory."""
+
+    def __init__(
+        self,
+        directory: Path,
+        levels: Tuple[IgnoreRules, ...],
+        excludes: Optional[IgnoreRules],
+        in_repo: bool,
+    ) -> None:
+        self.directory = directory
+        self.levels = levels
+        self.excludes = excludes
+        self.in_repo = in_repo
+
+        # Path of this directory relative to each level, deepest first
+        self._prefixes = [
+            (rules, self._prefix(directory, rules.base)) for rules in reversed(levels)
+        ]
+        # Outside the excludes' root only their unanchored patterns can match
+        if excludes is not None and (directory == excludes.base or excludes.base in directory.parents):
+            self._exclude_prefix = self._prefix(directory, excludes.base)
+        else:
+            self._exclude_prefix = directory.as_posix().lstrip("/") + "/"
+
+    @staticmethod
+    def _prefix(directory: Path, base: Path) -> str:
+        """Return directory relative to base as a prefix ending in '/'."""
+        if directory == base:
+            return ""
+        return directory.relative_to(base).as_posix() + "/"
+
+    def is_ignored(self, name: str, is_dir: bool) -> bool:
+        """Check whether an entry of this directory is ignored."""
+        if self.excludes and self.excludes.match(self._exclude_prefix + name, is_dir):
+            return True
+
+        for rules, prefix in self._prefixes:
+            result = rules.match(prefix + name, is_dir)
+            if result is not None:
+                return result
+
+        return False
+
+
+class IgnoreFilter:
+    """Builds and caches an IgnoreMatcher per directory."""
+
+    def __init__(self, excludes: Sequence[str] = (), root: Path = Path("/")) -> None:
+        # User excludes are matched against the path below root, like the
+        # rules of a .gitignore there; patterns without a slash match names
+        # at any depth
+        self._excludes = load_rules(root, [*DEFAULT_EXCLUDES, *excludes])
+        self._matchers: Dict[str, IgnoreMatcher] = {}
+
+    def _read_rules(self, directory: Path, in_repo: bool, repo_root: bool) -> Optional[IgnoreRules]:
+        """Read the ignore files of one directory."""
+        lines: List[str] = []
+        names = list(IGNORE_FILES if in_repo else IGNORE_FILES[1:])
+        if repo_root:
+            names.insert(0, ".git/info/exclude")
+
+        for name in names:
+            try:
+                with open(directory / name, encoding="utf-8", errors="replace") as f:
+                    lines.extend(f.read().splitlines())
+            except OSError:
+                continue
+
+        return load_rules(directory, lines)
+
+    def matcher_for(self, directory: Path) -> IgnoreMatcher:
+        """Return the matcher for the entries of a directory."""
+        key = str(directory)
+        matcher = self._matchers.get(key)
+        if matcher is not None:
+            return matcher
+
+        repo_root = (directory / ".git").exists()
+        parent = directory.parent
+
+        if repo_root or parent == directory:
+            # Rules never cross a repository root
+            levels: Tuple[IgnoreRules, ...] = ()
+            in_repo = repo_root
+        else:
+            parent_matcher = self.matcher_for(parent)
+            levels = parent_matcher.levels
+            in_repo = parent_matcher.in_repo
+
+        rules = self._read_rules(directory, in_repo, repo_root)
+        if rules is not None:
+            levels = levels + (rules,)
+
+        matcher = self._matchers[key] = IgnoreMatcher(directory, levels, self._excludes, in_repo)
+        return matcher
+
+    def invalidate(self) -> None:
+        """Forget every matcher so ignore files are read again."""
+        self._matchers.clear()
@@ -0,0 +1,354 @@
+"""Lazy structural access to large JSON and JSON Lines files.
+
+The file is memory-mapped and never parsed as a whole. Listing the
+children of an object or array scans only that container: scalars are
+matched in place and nested containers are skipped by counting brackets
+outside strings, a chunk at a time once a container proves large. The
+end offset of every container skipped is kept, so listing it later
+starts from known bounds. Children are listed a page at a time, so the
+first page of a huge array is available at once.
+
+JSON Lines records are read a page at a time from the offset where the
+previous page ended; count_lines counts the lines in a separate pass.
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .fs_backend import get_backend
+
+# Suffixes of JSON documents and of JSON Lines files
+JSON_SUFFIXES = {".json", ".geojson", ".har"}
+JSON_LINES_SUFFIXES = {".jsonl", ".ndjson"}
+
+# Kinds of values, from their first byte
+OBJECT = "object"
+ARRAY = "array"
+STRING = "string"
+NUMBER = "number"
+LITERAL = "literal"  # true, false or null
+
+_KINDS = {ord("{"): OBJECT, ord("["): ARRAY, ord('"'): STRING, ord("t"): LITERAL, ord("f"): LITERAL, ord("n"): LITERAL}
+
+# Bytes read per step when counting lines
+COUNT_CHUNK = 4 * 1024 * 1024
+
+# Bytes scanned bracket by bracket, and counted at once, when skipping a container
+SKIP_CHUNK = 64 * 1024
+
+# Longest key decoded in full
+MAX_KEY_BYTES = 1024
+
+_WHITESPACE = re.compile(rb"[ \t\r\n]*")
+_STRING_BODY = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_SCALAR = re.compile(rb"[^,\]}\s]*")
+_BRACKET = re.compile(rb"[\[\]{}]")
+_QUOTED = re.compile(rb'"[^"]*"')
+_NOT_STRUCTURE = bytes(b for b in range(256) if b not in b'"[]{}')
+_ESCAPE_OR_QUOTE = re.compile(rb'\\.|"', re.DOTALL)
+
+# A child's position in its container: (offset, index) of the next child
+Resume = Tuple[int, int]
+
+
+class JsonError(ValueError):
+    """The document is not valid JSON where it was read."""
+
+
+class _Cancelled(Exception):
+    """Raised inside a long skip when the caller gives up."""
+
+
+class JsonValue(NamedTuple):
+    """One value of a document, by its byte range."""
+
+    key: Optional[str]  # member name, None for array items and records
+    index: int  # position in the container, or line number of a record
+    start: int
+    end: int
+    kind: str
+
+    @property
+    def is_container(self) -> bool:
+        return self.kind in (OBJECT, ARRAY)
+
+
+def is_json_file(path: Path) -> bool:
+    """Whether a file is a JSON document or JSON Lines file, by its suffix."""
+    suffix = path.suffix.lower()
+    return suffix in JSON_SUFFIXES or suffix in JSON_LINES_SUFFIXES
+
+
+def is_json_lines(path: Path) -> bool:
+    """Whether a file holds one JSON record per line, by its suffix."""
+    return path.suffix.lower() in JSON_LINES_SUFFIXES
+
+
+class JsonDocument:
+    """A memory-mapped JSON document whose containers are listed on demand."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._map = get_backend().mmap(path)
+        self.size = len(self._map)
+        # End offsets of the containers skipped so far, by start offset
+        self._ends: Dict[int, int] = {}
+
+    def close(self) -> None:
+        """Release the mapping (left to the garbage collector while a scan holds it)."""
+        try:
+            self._map.close()
+        except BufferError:
+            pass
+
+    def _skip_whitespace(self, pos: int) -> int:
+        return _WHITESPACE.match(self._map, pos).end()
+
+    def _kind(self, pos: int) -> str:
+        if pos >= self.size:
+            raise JsonError(f"unexpected end of file at byte {pos:,}")
+        first = self._map[pos]
+        if first in _KINDS:
+            return _KINDS[first]
+        if first == ord("-") or ord("0") <= first <= ord("9"):
+            return NUMBER
+        raise JsonError(f"unexpected {chr(first)!r} at byte {pos:,}")
+
+    def root(self) -> JsonValue:
+        """Return the top-level value; a container's end is not looked for."""
+        pos = 3 if self._map[:3] == b"\xef\xbb\xbf" else 0
+        start = self._skip_whitespace(pos)
+        kind = self._kind(start)
+        end = self.size if kind in (OBJECT, ARRAY) else self._value_end(start, kind)
+        return JsonValue(None, 0, start, end, kind)
+
+    def _value_end(self, start: int, kind: str, cancelled: Optional[Callable[[], bool]] = None) -> int:
+        """Return the offset just past the value starting at start."""
+        if kind in (OBJECT, ARRAY):
+            return self._container_end(start, cancelled)
+        if kind == STRING:
+            match = _STRING_BODY.match(self._map, start + 1)
+            if match is None:
+                raise JsonError(f"unterminated string at byte {start:,}")
+            return match.end()
+        return _SCALAR.match(self._map, start).end()
+
+    def _container_end(self, start: int, cancelled: Optional[Callable[[], bool]] = None) -> int:
+        """Skip a container by counting the brackets outside strings.
+
+        Small containers are scanned bracket by bracket. Past SKIP_CHUNK
+        bytes, whole chunks are counted at once (strings removed first)
+        for as long as the container cannot end inside them.
+        """
+        end = self._ends.get(start)
+        if end is not None:
+            return end
+
+        data = self._map
+        pos, depth = self._scan_brackets(start, 0, start + SKIP_CHUNK)
+        while depth:
+            if cancelled and cancelled():
+                raise _Cancelled()
+            chunk = data[pos:pos + SKIP_CHUNK]
+            if not chunk:
+                raise JsonError(f"unterminated container at byte {start:,}")
+            # Keep only quotes and brackets (escaped quotes dropped first), then drop strings
+            text = chunk.replace(b"\\\\", b"").replace(b'\\"', b"") if b"\\" in chunk else chunk
+            structure = text.translate(None, _NOT_STRUCTURE)
+            brackets = _QUOTED.sub(b"", structure) if b'"' in structure else structure
+            # A quote left over means the chunk ends inside a string
+            if b'"' not in brackets:
+                # Drop matched pairs, leaving the unmatched closes then opens
+                length = 0
+                while length != len(brackets):
+                    length = len(brackets)
+                    brackets = brackets.replace(b"[]", b"").replace(b"{}", b"")
+                closes = len(brackets) - len(brackets.lstrip(b"]}"))
+                if closes < depth:
+                    depth += len(brackets) - 2 * closes
+                    pos += len(chunk)
+                    continue
+            pos, depth = self._scan_brackets(pos, depth, pos + len(chunk))
+
+        self._ends[start] = pos
+        return pos
+
+    def _scan_brackets(self, pos: int, depth: int, limit: int) -> Tuple[int, int]:
+        """Follow brackets from pos (outside any string) until depth reaches 0 or pos passes limit.
+
+        Returns the offset after the last bracket and the depth there.
+        """
+        data = self._map
+        in_string = False
+        while True:
+            match = _BRACKET.search(data, pos)
+            if match is None:
+                raise JsonError(f"unterminated container before byte {pos:,}")
+            bracket = match.start()
+            region = data[pos:bracket]
+            quotes = region.count(b'"')
+            if quotes and b"\\" in region:
+                # Escaped quotes do not open or close strings
+                quotes = sum(1 for token in _ESCAPE_OR_QUOTE.findall(region) if token == b'"')
+            in_string ^= bool(quotes & 1)
+            pos = bracket + 1
+            if in_string:
+                continue
+            depth += 1 if data[bracket] in (ord("["), ord("{")) else -1
+            if depth == 0 or pos >= limit:
+                return pos, depth
+
+    def _key(self, pos: int) -> Tuple[str, int]:
+        """Decode the member name starting at pos; return it and the offset past it."""
+        if self._map[pos:pos + 1] != b'"':
+            raise JsonError(f"expected a member name at byte {pos:,}")
+        match = _STRING_BODY.match(self._map, pos + 1)
+        if match is None:
+            raise JsonError(f"unterminated string at byte {pos:,}")
+        end = match.end()
+        if end - pos > MAX_KEY_BYTES:
+            return self._map[pos + 1:pos + MAX_KEY_BYTES].decode("utf-8", "replace") + "…", end
+        raw = self._map[pos:end]
+        try:
+            return json.loads(raw), end
+        except ValueError:
+            return raw[1:-1].decode("utf-8", "replace"), end
+
+    def children(
+        self,
+        value: JsonValue,
+        resume: Optional[Resume] = None,
+        limit: int = 200,
+        cancelled: Optional[Callable[[], bool]] = None,
+    ) -> Tuple[List[JsonValue], Optional[Resume]]:
+        """List up to limit children of a container, from resume or the first.
+
+        Returns the children and where to resume, or None after the last.
+        Once cancelled, returns the children found so far.
+        """
+        data = self._map
+        is_object = value.kind == OBJECT
+        close = ord("}") if is_object else ord("]")
+        pos, index = resume or (self._skip_whitespace(value.start + 1), 0)
+        if index == 0 and pos < self.size and data[pos] == close:
+            return [], None
+
+        result: List[JsonValue] = []
+        while len(result) < limit:
+            if cancelled and cancelled():
+                break
+            child = pos
+            key = None
+            if is_object:
+                key, pos = self._key(pos)
+                pos = self._skip_whitespace(pos)
+                if data[pos:pos + 1] != b":":
+                    raise JsonError(f"expected ':' at byte {pos:,}")
+                pos = self._skip_whitespace(pos + 1)
+            kind = self._kind(pos)
+            try:
+                end = self._value_end(pos, kind, cancelled)
+            except _Cancelled:
+                return result, (child, index)
+            result.append(JsonValue(key, index, pos, end, kind))
+            index += 1
+
+            pos = self._skip_whitespace(end)
+            following = data[pos] if pos < self.size else None
+            if following == ord(","):
+                pos = self._skip_whitespace(pos + 1)
+            elif following == close:
+                return result, None
+            else:
+                raise JsonError(f"expected ',' or {chr(close)!r} at byte {pos:,}")
+        return result, (pos, index)
+
+    def preview(self, value: JsonValue, limit: int = 80) -> str:
+        """Return the start of a value's text, whitespace collapsed, cut at limit characters."""
+        end = min(value.end, value.start + limit * 4)
+        text = self._map[value.start:end].decode("utf-8", "replace")
+        if value.kind != STRING:
+            text = " ".join(text.split())
+        if len(text) > limit or end < value.end:
+            return text[:limit - 1] + "…"
+        return text
+
+    def load(self, value: JsonValue) -> Any:
+        """Parse a value in full."""
+        try:
+            return json.loads(self._map[value.start:value.end])
+        except ValueError as e:
+            raise JsonError(str(e)) from e
+
+
+class JsonLines(JsonDocument):
+    """A memory-mapped JSON Lines file, read a page of records at a time."""
+
+    def __init__(self, path: Path) -> None:
+        super().__init__(path)
+        # Lines counted so far; final once counted is set
+        self.lines = 0
+        self.counted = False
+
+    def records(self, resume: Optional[Resume] = None, limit: int = 50) -> Tuple[List[JsonValue], Optional[Resume]]:
+        """Return up to limit records, from resume or the first line.
+
+        A record's index is its line number; blank lines are skipped.
+        """
+        data = self._map
+        pos, line = resume or (0, 0)
+        if pos == 0 and data[:3] == b"\xef\xbb\xbf":
+            pos = 3
+        result: List[JsonValue] = []
+        while len(result) < limit and pos < self.size:
+            newline = data.find(b"\n", pos)
+            end = self.size if newline == -1 else newline
+            start = _WHITESPACE.match(data, pos, end).end()
+            stop = end
+            while stop > start and data[stop - 1] in b" \t\r":
+                stop -= 1
+            if start < stop:
+                result.append(JsonValue(None, line, start, stop, self._kind(start)))
+            pos = end + 1
+            line += 1
+        return result, ((pos, line) if pos < self.size else None)
+
+    def count_lines(
+        self,
+        cancelled: Optional[Callable[[], bool]] = None,
+    ) -> bool:
+        """Count the lines of the file; return False if cancelled."""
+        lines = 0
+        tail = b""
+        with get_backend().open(self.path) as f:
+            while True:
+                if cancelled and cancelled():
+                    return False
+                chunk = f.read(COUNT_CHUNK)
+                if not chunk:
+                    break
+                lines += chunk.count(b"\n")
+                tail = chunk[-1:]
+                self.lines = lines
+        self.lines = lines + (1 if tail and tail != b"\n" else 0)
+        self.counted = True
+        return True
+
+
+def open_json(path: Path) -> Optional[JsonDocument]:
+    """Open a JSON or JSON Lines file, or return None if it does not look like one."""
+    try:
+        document = JsonLines(path) if is_json_lines(path) else JsonDocument(path)
+    except (OSError, ValueError):
+        return None
+    try:
+        if isinstance(document, JsonLines):
+            document.records(limit=1)
+        else:
+            document.root()
+    except (JsonError, IndexError):
+        document.close()
+        return None
+    return document
@@ -0,0 +1,338 @@
+"""Directory listing with per-entry metadata gathered in a single pass."""
+
+import os
+import stat
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from .fs_backend import get_backend
+from .sorting import sort_entries
+
+if TYPE_CHECKING:
+    from .file_types import FileType
+
+
+class EntryInfo(NamedTuple):
+    """Metadata for one directory entry, collected while scanning."""
+
+    name: str
+    is_dir: bool
+    is_symlink: bool
+    hidden: bool
+    size: Optional[int] = None  # None when not stat'ed (degraded mounts)
+    mtime: Optional[float] = None
+    has_children: Optional[bool] = None  # None when not probed
+    readable: bool = True
+
+
+def _is_hidden_entry(entry: "os.DirEntry[str]") -> bool:
+    """Check if a scandir entry is hidden without an extra stat on Unix."""
+    if entry.name.startswith("."):
+        return True
+    if os.name == "nt":
+        # On Windows the attributes come with the directory listing
+        try:
+            return bool(entry.stat().st_file_attributes & stat.FILE_ATTRIBUTE_HIDDEN)
+        except (AttributeError, OSError):
+            pass
+    return False
+
+
+def probe_children(path: str) -> Optional[bool]:
+    """Return whether a directory has any entries, or None if unreadable."""
+    try:
+        with get_backend().scandir(path) as it:
+            return next(it, None) is not None
+    except OSError:
+        return None
+
+
+# Called as skip_probe(name, is_dir); True means the entry is pruned
+ProbeFilter = Callable[[str, bool], bool]
+
+# Entries per batch when a scan is streamed
+SCAN_BATCH_SIZE = 512
+
+
+def _entry_info(
+    entry: "os.DirEntry[str]",
+    detailed: bool,
+    skip_probe: Optional[ProbeFilter],
+) -> Optional[EntryInfo]:
+    """Build the EntryInfo for one scandir entry, or None if it vanished."""
+    try:
+        is_symlink = entry.is_symlink()
+        # Following symlinks needs a stat; d_type alone does not
+        is_dir = entry.is_dir(follow_symlinks=detailed)
+    except OSError:
+        return None
+
+    if not detailed:
+        return EntryInfo(entry.name, is_dir, is_symlink, _is_hidden_entry(entry))
+
+    size = mtime = None
+    try:
+        st = entry.stat()
+        size = st.st_size
+        mtime = st.st_mtime
+    except OSError:
+        pass
+
+    has_children = None
+    readable = True
+    if is_dir and not (skip_probe and skip_probe(entry.name, True)):
+        has_children = probe_children(entry.path)
+        readable = has_children is not None
+
+    return EntryInfo(
+        entry.name,
+        is_dir,
+        is_symlink,
+        _is_hidden_entry(entry),
+        size,
+        mtime,
+        has_children,
+        readable,
+    )
+
+
+def scan_directory(
+    path: Path,
+    detailed: bool = True,
+    skip_probe: Optional[ProbeFilter] = None,
+) -> List[EntryInfo]:
+    """List a directory with the filesystem backend's scandir.
+
+    With ``detailed`` each entry is stat'ed for size and mtime and child
+    directories are probed for contents. Without it only the d_type from
+    the listing itself is used, so no per-entry metadata calls are made.
+    Directories for which ``skip_probe`` returns True (e.g. ignored ones)
+    are never opened.
+    """
+    entries = []
+
+    with get_backend().scandir(path) as it:
+        for entry in it:
+            info = _entry_info(entry, detailed, skip_probe)
+            if info is not None:
+                entries.append(info)
+
+    return entries
+
+
+def iter_scan(
+    path: Path,
+    detailed: bool = True,
+    skip_probe: Optional[ProbeFilter] = None,
+    batch_size: int = SCAN_BATCH_SIZE,
+) -> Iterator[List[EntryInfo]]:
+    """Scan a directory like scan_directory, yielding entries in batches."""
+    batch: List[EntryInfo] = []
+
+    with get_backend().scandir(path) as it:
+        for entry in it:
+            info = _entry_info(entry, detailed, skip_probe)
+            if info is None:
+                continue
+            batch.append(info)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+
+    if batch:
+        yield batch
+
+
+class DirectoryListing:
+    """A scanned directory: its entries plus memoized sort orders."""
+
+    def __init__(
+        self,
+        path: Path,
+        entries: List[EntryInfo],
+        mtime_ns: Optional[int] = None,
+        detailed: bool = True,
+    ) -> None:
+        self.path = path
+        self.entries: Tuple[EntryInfo, ...] = tuple(entries)
+        self.mtime_ns = mtime_ns
+        self.detailed = detailed
+        self._orders: Dict[Tuple[str, bool], Tuple[EntryInfo, ...]] = {}
+        self._ranks: Dict[Tuple[str, bool], Dict[str, int]] = {}
+        self._by_name: Optional[Dict[str, EntryInfo]] = None
+        self._name_index: Optional[Tuple[List[str], Tuple[EntryInfo, ...]]] = None
+        # Content types of the files, filled in by background classification
+        self.file_types: Dict[str, "FileType"] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, name: str) -> Optional[EntryInfo]:
+        """Return the entry with the given name, if present."""
+        if self._by_name is None:
+            self._by_name = {entry.name: entry for entry in self.entries}
+        return self._by_name.get(name)
+
+    def name_index(self) -> Tuple[List[str], Tuple[EntryInfo, ...]]:
+        """Return lowercased names in sorted order and the matching entries.
+
+        The names list can be searched with bisect for prefix lookups.
+        """
+        if self._name_index is None:
+            ordered = tuple(sorted(self.entries, key=lambda entry: entry.name.lower()))
+            self._name_index = ([entry.name.lower() for entry in ordered], ordered)
+        return self._name_index
+
+    def has_order(self, mode: str, reverse: bool = False) -> bool:
+        """Whether the given ordering has already been computed."""
+        return (mode, reverse) in self._orders
+
+    def sorted_entries(self, mode: str = "name", reverse: bool = False) -> Tuple[EntryInfo, ...]:
+        """Return the entries in the given order, sorting only the first time."""
+        key = (mode, reverse)
+        order = self._orders.get(key)
+        if order is None:
+            order = self._orders[key] = tuple(sort_entries(self.entries, mode, reverse))
+        return order
+
+    def sort_ranks(self, mode: str = "name", reverse: bool = False) -> Dict[str, int]:
+        """Return each entry's position in the given order, by name."""
+        key = (mode, reverse)
+        ranks = self._ranks.get(key)
+        if ranks is None:
+            order = self.sorted_entries(mode, reverse)
+            ranks = self._ranks[key] = {entry.name: i for i, entry in enumerate(order)}
+        return ranks
+
+
+def read_listing(
+    path: Path,
+    detailed: bool = True,
+    skip_probe: Optional[ProbeFilter] = None,
+    on_batch: Optional[Callable[[List[EntryInfo]], None]] = None,
+) -> DirectoryListing:
+    """Stat and scan a directory into a DirectoryListing.
+
+    With ``on_batch`` the scan is streamed and each batch of entries is
+    passed to it as soon as it has been read.
+    """
+    mtime_ns = get_backend().stat(path).st_mtime_ns
+    if on_batch is None:
+        entries = scan_directory(path, detailed, skip_probe)
+    else:
+        entries = []
+        for batch in iter_scan(path, detailed, skip_probe):
+            entries.extend(batch)
+            on_batch(batch)
+    return DirectoryListing(path, entries, mtime_ns, detailed)
+
+
+# Total entries kept across all cached listings
+MAX_CACHED_ENTRIES = 500_000
+
+
+class ListingCache:
+    """Directory listings keyed by path, least recently used evicted first.
+
+    The cache holds at most ``max_entries`` entries in total (a single
+    larger listing is still kept). Loads are single-flight: while a
+    directory is being scanned, other callers asking for it wait for that
+    scan instead of starting another.
+    """
+
+    def __init__(self, max_entries: int = MAX_CACHED_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._listings: "OrderedDict[str, DirectoryListing]" = OrderedDict()
+        self._entry_count = 0
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._listings)
+
+    @property
+    def entry_count(self) -> int:
+        """Total number of entries in the cached listings."""
+        return self._entry_count
+
+    def get(self, path: Path) -> Optional[DirectoryListing]:
+        """Return the cached listing for a directory, if any."""
+        key = str(path)
+        with self._lock:
+            listing = self._listings.get(key)
+            if listing is not None:
+                self._listings.move_to_end(key)
+            return listing
+
+    def put(self, listing: DirectoryListing) -> None:
+        """Store a listing, evicting the least recently used ones over budget."""
+        key = str(listing.path)
+        with self._lock:
+            old = self._listings.pop(key, None)
+            if old is not None:
+                self._entry_count -= len(old)
+            self._listings[key] = listing
+            self._entry_count += len(listing)
+
+            while self._entry_count > self.max_entries and len(self._listings) > 1:
+                _, evicted = self._listings.popitem(last=False)
+                self._entry_count -= len(evicted)
+
+    def load(
+        self,
+        path: Path,
+        loader: Callable[..., DirectoryListing],
+        *args: Any,
+    ) -> DirectoryListing:
+        """Run loader(*args) for a directory and cache the result.
+
+        If the directory is already being loaded, wait for that load and
+        return its listing (or raise its exception) instead.
+        """
+        key = str(path)
+        with self._lock:
+            future = self._pending.get(key)
+            owner = future is None
+            if owner:
+                future = self._pending[key] = Future()
+
+        if not owner:
+            return future.result()
+
+        try:
+            listing = loader(*args)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            self.put(listing)
+            future.set_result(listing)
+            return listing
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def invalidate(self, path: Optional[Path] = None) -> None:
+        """Drop one directory's listing, or every listing if path is None."""
+        with self._lock:
+            if path is None:
+                self._listings.clear()
+                self._entry_count = 0
+            else:
+                old = self._listings.pop(str(path), None)
+                if old is not None:
+                    self._entry_count -= len(old)
+
+
+_listing_cache: Optional[ListingCache] = None
+
+
+def get_listing_cache() -> ListingCache:
+    """Return the process-wide listing cache shared by every view."""
+    global _listing_cache
+    if _listing_cache is None:
+        _listing_cache = ListingCache()
+    return _listing_cache
@@ -0,0 +1,107 @@
+"""Interned filesystem entries for tree nodes.
+
+Tree nodes hold a small integer ID instead of a Path. An ID indexes flat
+arrays of parent IDs, names and kinds, and the same (parent, name) always
+maps to the same ID, so sets of IDs (expanded directories, marks) stay
+valid however often the tree is rebuilt. Full paths are only built by
+path(), when something needs one: a message, a scan, a label.
+"""
+
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+# Kinds of entries
+UNKNOWN = 0
+FILE = 1
+DIRECTORY = 2
+ARCHIVE = 3  # browsed like a directory
+
+# Parent ID of the filesystem roots
+NO_PARENT = -1
+
+
+def _parts(path: Path) -> Tuple[str, ...]:
+    """Split a path into the names of its entries, its anchor first.
+
+    Relative paths hang below an unnamed root.
+    """
+    return path.parts if path.anchor else ("",) + path.parts
+
+
+class NodeStore:
+    """Entries of the filesystem namespace, each an integer ID."""
+
+    def __init__(self) -> None:
+        self._parents = array("q")
+        self._names: List[str] = []
+        self._kinds = bytearray()
+        # IDs of each entry's children seen so far, by name
+        self._children: Dict[int, Dict[str, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def intern(self, parent: int, name: str, kind: int = UNKNOWN) -> int:
+        """Return the ID of a parent's child, adding it if it is new."""
+        children = self._children.get(parent)
+        if children is None:
+            children = self._children[parent] = {}
+        node = children.get(name)
+        if node is None:
+            node = children[name] = len(self._names)
+            self._parents.append(parent)
+            self._names.append(name)
+            self._kinds.append(kind)
+        elif kind != UNKNOWN:
+            self._kinds[node] = kind
+        return node
+
+    def intern_path(self, path: Path) -> int:
+        """Return the ID of a path, adding it and its ancestors if they are new."""
+        parts = _parts(path)
+        node = self.intern(NO_PARENT, parts[0], DIRECTORY)
+        for part in parts[1:]:
+            node = self.intern(node, part)
+        return node
+
+    def parent(self, node: int) -> int:
+        """Return the ID of an entry's parent, or NO_PARENT for a root."""
+        return self._parents[node]
+
+    def name(self, node: int) -> str:
+        """Return the name of an entry within its parent."""
+        return self._names[node]
+
+    def kind(self, node: int) -> int:
+        """Return the kind of an entry (FILE, DIRECTORY, ...)."""
+        return self._kinds[node]
+
+    def path(self, node: int) -> Path:
+        """Build the full path of an entry."""
+        names = []
+        while node != NO_PARENT:
+            names.append(self._names[node])
+            node = self._parents[node]
+        names.reverse()
+        return Path(*names)
+
+    def compact(self, keep: Iterable[int]) -> Dict[int, int]:
+        """Forget every entry but keep and their ancestors.
+
+        Returns the new ID of each kept entry, by old ID; other IDs become
+        invalid.
+        """
+        parents, names, kinds = self._parents, self._names, self._kinds
+        self.__init__()
+        moved: Dict[int, int] = {NO_PARENT: NO_PARENT}
+        for node in keep:
+            chain = []
+            while node not in moved:
+                chain.append(node)
+                node = parents[node]
+            parent = moved[node]
+            for old in reversed(chain):
+                parent = moved[old] = self.intern(parent, names[old], kinds[old])
+        del moved[NO_PARENT]
+        return moved
@@ -4,6 +4,9 @@ import os
 from pathlib import Path
 from typing import List, Optional, Tuple
 
+from .fs_backend import get_backend
+from .profiling import profiled
+
 
 def normalize_path(path_str: str) -> Path:
     """Normalize a path string to a Path object."""
@@ -23,16 +26,18 @@ def normalize_path(path_str: str) -> Path:
 
 def validate_path(path: Path) -> Tuple[bool, str]:
     """Validate a path and return (is_valid, error_message)."""
+    backend = get_backend()
     try:
-        if not path.exists():
+        if not backend.exists(path):
             return False, f"Path does not exist: {path}"
         
-        if not path.is_dir():
+        if not backend.is_dir(path):
             return False, f"Path is not a directory: {path}"
         
         # Check if we can read the directory
         try:
-            list(path.iterdir())
+            with backend.scandir(path) as it:
+                next(it, None)
         except PermissionError:
             return False, f"Permission denied: {path}"
         except OSError as e:
@@ -80,7 +85,7 @@ def find_common_prefix(paths: List[Path]) -> Optional[Path]:
         return None
     
     if len(paths) == 1:
-        return paths[0].parent if paths[0].is_file() else paths[0]
+        return paths[0].parent if get_backend().is_file(paths[0]) else paths[0]
     
     # Convert all paths to their parts
     path_parts = [list(path.resolve().parts) for path in paths]
@@ -112,7 +117,7 @@ def is_hidden(path: Path) -> bool:
     try:
         import stat
         if os.name == 'nt':  # Windows
-            attrs = os.stat(path).st_file_attributes
+            attrs = get_backend().stat(path).st_file_attributes
             return bool(attrs & stat.FILE_ATTRIBUTE_HIDDEN)
     except (AttributeError, OSError):
         pass
@@ -129,9 +134,11 @@ def get_relative_path(path: Path, base: Path) -> str:
         return str(path)
 
 
+@profiled("path.autocomplete")
 def autocomplete_path(partial_path: str, base_dir: Path) -> List[str]:
     """Get autocomplete suggestions for a partial path."""
     suggestions = []
+    backend = get_backend()
     
     try:
         # Normalize the partial path
@@ -144,10 +151,10 @@ def autocomplete_path(partial_path: str, base_dir: Path) -> List[str]:
         
         # If the path ends with a separator, list contents of that directory
         if partial_path.endswith(os.sep):
-            if search_path.is_dir():
+            if backend.is_dir(search_path):
                 try:
-                    for item in sorted(search_path.iterdir()):
-                        if item.is_dir():
+                    for item in sorted(backend.iterdir(search_path)):
+                        if backend.is_dir(item):
                             suggestions.append(str(item) + os.sep)
                         else:
                             suggestions.append(str(item))
@@ -158,11 +165,11 @@ def autocomplete_path(partial_path: str, base_dir: Path) -> List[str]:
             parent = search_path.parent
             prefix = search_path.name
             
-            if parent.is_dir():
+            if backend.is_dir(parent):
                 try:
-                    for item in sorted(parent.iterdir()):
+                    for item in sorted(backend.iterdir(parent)):
                         if item.name.startswith(prefix):
-                            if item.is_dir():
+                            if backend.is_dir(item):
                                 suggestions.append(str(item) + os.sep)
                             else:
                                 suggestions.append(str(item))
@@ -0,0 +1,232 @@
+"""Timing spans and filesystem call counters for profiling the hot paths.
+
+Profiling is off unless ``enable_profiling`` is called. While it is off,
+``span`` returns a shared no-op context manager and ``profiled`` wrappers
+cost a single global lookup before calling straight through.
+
+Filesystem calls are counted per thread, so a span's ``fs_calls`` only
+includes the calls made on the thread that ran it, not those of workers
+running at the same time.
+"""
+
+import builtins
+import functools
+import json
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Filesystem entry points counted while profiling ("syscall" counts)
+COUNTED_CALLS = {
+    "stat": (os, "stat"),
+    "lstat": (os, "lstat"),
+    "listdir": (os, "listdir"),
+    "scandir": (os, "scandir"),
+    "open": (builtins, "open"),
+}
+
+# Stop recording individual events after this many to bound memory
+MAX_EVENTS = 1_000_000
+
+_profiler: Optional["Profiler"] = None
+
+
+class Profiler:
+    """Collects timing spans and filesystem call counts."""
+
+    def __init__(self) -> None:
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._events: List[Dict[str, Any]] = []
+        self._durations: Dict[str, List[float]] = defaultdict(list)
+        self._originals: Dict[str, Callable[..., Any]] = {}
+        self.dropped_events = 0
+        # Each thread's call counts, only ever updated by that thread
+        self._local = threading.local()
+        self._thread_calls: List[Counter] = []
+
+    def record(self, name: str, start: float, duration: float, fs_calls: int = 0) -> None:
+        """Record a finished span. Times are perf_counter seconds."""
+        with self._lock:
+            self._durations[name].append(duration)
+            if len(self._events) >= MAX_EVENTS:
+                self.dropped_events += 1
+                return
+            self._events.append({
+                "name": name,
+                "ph": "X",
+                "ts": (start - self._origin) * 1_000_000,
+                "dur": duration * 1_000_000,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": {"fs_calls": fs_calls},
+            })
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Return count, total, p50 and p99 (milliseconds) for each span name."""
+        with self._lock:
+            snapshot = {name: sorted(values) for name, values in self._durations.items()}
+
+        result = {}
+        for name, values in snapshot.items():
+            count = len(values)
+            result[name] = {
+                "count": count,
+                "total_ms": sum(values) * 1000,
+                "p50_ms": values[int(0.50 * (count - 1))] * 1000,
+                "p99_ms": values[int(0.99 * (count - 1))] * 1000,
+            }
+        return result
+
+    @property
+    def fs_calls(self) -> Counter:
+        """Filesystem calls made so far by every thread, by function."""
+        with self._lock:
+            counters = list(self._thread_calls)
+        total: Counter = Counter()
+        for calls in counters:
+            total.update(calls)
+        return total
+
+    def thread_calls(self) -> Counter:
+        """Return the current thread's filesystem call counts."""
+        calls = getattr(self._local, "calls", None)
+        if calls is None:
+            # Every label exists from the start, so other threads can sum
+            # the counts without them changing size
+            calls = self._local.calls = Counter(dict.fromkeys(COUNTED_CALLS, 0))
+            with self._lock:
+                self._thread_calls.append(calls)
+        return calls
+
+    def install_call_counters(self) -> None:
+        """Wrap the filesystem entry points so each call is counted."""
+        for label, (module, attr) in COUNTED_CALLS.items():
+            if label in self._originals:
+                continue
+            original = getattr(module, attr)
+            self._originals[label] = original
+            setattr(module, attr, self._make_counter(label, original))
+
+    def uninstall_call_counters(self) -> None:
+        """Restore the original filesystem entry points."""
+        for label, original in self._originals.items():
+            module, attr = COUNTED_CALLS[label]
+            setattr(module, attr, original)
+        self._originals.clear()
+
+    def _make_counter(self, label: str, original: Callable[..., Any]) -> Callable[..., Any]:
+        """Build a counting wrapper around a filesystem function."""
+
+        @functools.wraps(original)
+        def counted(*args: Any, **kwargs: Any) -> Any:
+            self.thread_calls()[label] += 1
+            return original(*args, **kwargs)
+
+        return counted
+
+    def export_chrome_trace(self, path: Path) -> None:
+        """Write the recorded spans as a Chrome trace / Perfetto JSON file."""
+        with self._lock:
+            events = list(self._events)
+
+        trace = {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "fs_calls": dict(self.fs_calls),
+                "dropped_events": self.dropped_events,
+            },
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(trace, f)
+
+
+class _Span:
+    """Context manager recording one span on the active profiler."""
+
+    __slots__ = ("_profiler", "_name", "_start", "_fs_calls")
+
+    def __init__(self, profiler: Profiler, name: str) -> None:
+        self._profiler = profiler
+        self._name = name
+
+    def __enter__(self) -> "_Span":
+        self._fs_calls = sum(self._profiler.thread_calls().values())
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        duration = time.perf_counter() - self._start
+        fs_calls = sum(self._profiler.thread_calls().values()) - self._fs_calls
+        self._profiler.record(self._name, self._start, duration, fs_calls)
+
+
+class _NullSpan:
+    """Shared no-op span used while profiling is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str) -> Any:
+    """Return a context manager timing the enclosed block."""
+    profiler = _profiler
+    if profiler is None:
+        return _NULL_SPAN
+    return _Span(profiler, name)
+
+
+def profiled(name: str) -> Callable[[F], F]:
+    """Decorator timing every call of the wrapped function as a span."""
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            profiler = _profiler
+            if profiler is None:
+                return func(*args, **kwargs)
+            with _Span(profiler, name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def enable_profiling(count_calls: bool = True) -> Profiler:
+    """Start profiling and return the active profiler."""
+    global _profiler
+    if _profiler is None:
+        _profiler = Profiler()
+        if count_calls:
+            _profiler.install_call_counters()
+    return _profiler
+
+
+def disable_profiling() -> Optional[Profiler]:
+    """Stop profiling and return the profiler that was active, if any."""
+    global _profiler
+    profiler = _profiler
+    _profiler = None
+    if profiler:
+        profiler.uninstall_call_counters()
+    return profiler
+
+
+def get_profiler() -> Optional[Profiler]:
+    """Return the active profiler, or None when profiling is disabled."""
+    return _profiler
@@ -0,0 +1,286 @@
+"""Parallel scanning of whole directory trees.
+
+The tree is handed out as tasks of directories. A worker lists the
+directories of its task depth first until it has read ``TASK_BUDGET``
+entries, then returns its listings along with the directories it did not
+get to, which become new tasks for idle workers. Large subtrees are thus
+shared out however unbalanced the tree is. On local disks the workers
+are processes (the pool shared with hashing); threads are used for slow
+mounts, single-CPU hosts and non-local backends.
+
+Listings come back as ScanBatch columns rather than Path objects. Each
+directory is listed once per ``(st_dev, st_ino)``, and a directory's
+batch is always yielded before the batches of its subdirectories.
+"""
+
+import os
+import stat
+from array import array
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from .fs_backend import LocalBackend, get_backend
+from .fs_monitor import get_monitor
+
+# How scans run: pick per tree, or force processes or threads
+AUTO = "auto"
+PROCESSES = "processes"
+THREADS = "threads"
+SCAN_MODES = (AUTO, PROCESSES, THREADS)
+
+# Entries a worker lists before handing its remaining directories back;
+# threads hand back sooner, since they wait on I/O rather than each other
+TASK_BUDGET = 10_000
+THREAD_TASK_BUDGET = 500
+
+# Most directories in one task
+MAX_TASK_DIRS = 64
+
+# Threads used when the scan is I/O bound
+THREAD_WORKERS = 16
+
+# Seconds between cancellation checks while waiting on workers
+POLL_INTERVAL = 0.1
+
+# A directory to list: (path, st_dev, st_ino)
+DirectoryRef = Tuple[str, int, int]
+
+
+class ScanBatch(NamedTuple):
+    """One listed directory, its entries as columns (lstat results)."""
+
+    path: str
+    dev: int
+    ino: int
+    names: List[str]
+    modes: "array[int]"
+    sizes: "array[int]"
+    mtimes: "array[int]"  # ns
+    inos: "array[int]"
+    nlinks: "array[int]"
+    error: Optional[str] = None  # set when the directory could not be listed
+
+
+class ScanStats:
+    """Running totals of a scan, read by the UI or CLI while it runs."""
+
+    def __init__(self) -> None:
+        self.directories = 0
+        self.files = 0
+        self.bytes = 0
+        self.errors = 0
+        self.workers = 0
+        self.processes = False
+        self.done = False
+
+
+def _empty_batch(path: str, dev: int, ino: int, error: Optional[str] = None) -> ScanBatch:
+    return ScanBatch(path, dev, ino, [], array("I"), array("Q"), array("q"), array("Q"), array("I"), error)
+
+
+def scan_task(
+    directories: List[DirectoryRef],
+    root_dev: int,
+    one_filesystem: bool,
+    budget: int = TASK_BUDGET,
+) -> Tuple[List[ScanBatch], List[DirectoryRef]]:
+    """List directories depth first until ``budget`` entries are read.
+
+    Returns the batches and the directories found but not yet listed.
+    Runs on a worker process or thread.
+    """
+    backend = get_backend()
+    batches: List[ScanBatch] = []
+    stack = directories[::-1]
+    # inode 0 means unknown (scandir on Windows)
+    seen: Set[Tuple[int, int]] = {(dev, ino) for _, dev, ino in directories if ino}
+    listed = 0
+
+    while stack and listed < budget:
+        path, dev, ino = stack.pop()
+        batch = _empty_batch(path, dev, ino)
+        subdirs: List[DirectoryRef] = []
+        try:
+            with backend.scandir(path) as it:
+                for entry in it:
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    batch.names.append(entry.name)
+                    batch.modes.append(st.st_mode)
+                    batch.sizes.append(max(st.st_size, 0))
+                    batch.mtimes.append(st.st_mtime_ns)
+                    batch.inos.append(st.st_ino)
+                    batch.nlinks.append(st.st_nlink)
+                    if not stat.S_ISDIR(st.st_mode) or (one_filesystem and st.st_dev != root_dev):
+                        continue
+                    key = (st.st_dev, st.st_ino)
+                    if st.st_ino and key in seen:
+                        continue
+                    seen.add(key)
+                    subdirs.append((entry.path, st.st_dev, st.st_ino))
+        except OSError as e:
+            batch = _empty_batch(path, dev, ino, e.strerror or str(e))
+        batches.append(batch)
+        stack.extend(reversed(subdirs))
+        listed += len(batch.names) + 1
+
+    return batches, stack[::-1]
+
+
+def _use_processes(mode: str, root: Path) -> bool:
+    """Whether a scan should run on processes rather than threads."""
+    if mode != AUTO:
+        return mode == PROCESSES
+    if not isinstance(get_backend(), LocalBackend) or (os.cpu_count() or 1) < 2:
+        return False
+    # Slow mounts are bound by latency, not CPU
+    monitor = get_monitor()
+    return not monitor.is_degraded(monitor.device_of(root))
+
+
+def _without_seen_links(batch: ScanBatch, seen: Set[Tuple[int, int]]) -> ScanBatch:
+    """Drop files that are hard links to an inode already seen."""
+    keep = []
+    for i, mode in enumerate(batch.modes):
+        if batch.nlinks[i] > 1 and not stat.S_ISDIR(mode) and batch.inos[i]:
+            key = (batch.dev, batch.inos[i])
+            if key in seen:
+                continue
+            seen.add(key)
+        keep.append(i)
+    if len(keep) == len(batch.names):
+        return batch
+
+    def pick(column: "array[int]") -> "array[int]":
+        return array(column.typecode, (column[i] for i in keep))
+
+    return batch._replace(
+        names=[batch.names[i] for i in keep],
+        modes=pick(batch.modes),
+        sizes=pick(batch.sizes),
+        mtimes=pick(batch.mtimes),
+        inos=pick(batch.inos),
+        nlinks=pick(batch.nlinks),
+    )
+
+
+def scan_tree(
+    root: Path,
+    one_filesystem: bool = False,
+    unique_files: bool = False,
+    mode: str = AUTO,
+    cancelled: Optional[Callable[[], bool]] = None,
+    stats: Optional[ScanStats] = None,
+) -> Iterator[ScanBatch]:
+    """Scan the tree below root in parallel, yielding a batch per directory.
+
+    Symlinks are not followed. With ``one_filesystem`` directories on
+    other devices are listed as entries but not entered. With
+    ``unique_files`` hard links to a file already yielded are left out.
+    """
+    is_cancelled = cancelled or (lambda: False)
+    stats = stats or ScanStats()
+    root_st = get_backend().stat(root)
+    if not stat.S_ISDIR(root_st.st_mode):
+        raise NotADirectoryError(f"Not a directory: {root}")
+
+    executor: Executor
+    stats.processes = _use_processes(mode, root)
+    if stats.processes:
+        from .hashing import get_hash_pool
+
+        executor = get_hash_pool()
+        stats.workers = os.cpu_count() or 1
+    else:
+        executor = ThreadPoolExecutor(max_workers=THREAD_WORKERS, thread_name_prefix="scan")
+        stats.workers = THREAD_WORKERS
+
+    futures: Dict[Future, List[DirectoryRef]] = {}
+    seen_dirs: Set[Tuple[int, int]] = set()
+    seen_files: Set[Tuple[int, int]] = set()
+
+    def submit(directories: List[DirectoryRef]) -> None:
+        budget = TASK_BUDGET if stats.processes else THREAD_TASK_BUDGET
+        future = executor.submit(scan_task, directories, root_st.st_dev, one_filesystem, budget)
+        futures[future] = directories
+
+    def share(directories: List[DirectoryRef]) -> None:
+        # Enough tasks to keep every worker busy, none too large
+        size = min(max(-(-len(directories) // stats.workers), 1), MAX_TASK_DIRS)
+        for start in range(0, len(directories), size):
+            submit(directories[start:start + size])
+
+    submit([(str(root), root_st.st_dev, root_st.st_ino)])
+    try:
+        while futures:
+            if is_cancelled():
+                return
+            done, _ = wait(futures, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in done:
+                directories = futures.pop(future)
+                try:
+                    batches, leftover = future.result()
+                except BrokenProcessPool:
+                    # Carry on with threads rather than lose the scan
+                    from .hashing import _reset_pool
+
+                    _reset_pool()
+                    executor = ThreadPoolExecutor(max_workers=THREAD_WORKERS, thread_name_prefix="scan")
+                    stats.processes = False
+                    stats.workers = THREAD_WORKERS
+                    submit(directories)
+                    continue
+
+                share([ref for ref in leftover if not (ref[2] and (ref[1], ref[2]) in seen_dirs)])
+                for batch in batches:
+                    key = (batch.dev, batch.ino)
+                    if batch.ino and key in seen_dirs:
+                        continue
+                    seen_dirs.add(key)
+                    if unique_files:
+                        batch = _without_seen_links(batch, seen_files)
+                    stats.directories += 1
+                    if batch.error:
+                        stats.errors += 1
+                    for mode, size in zip(batch.modes, batch.sizes):
+                        if not stat.S_ISDIR(mode):
+                            stats.files += 1
+                            stats.bytes += size
+                    yield batch
+        stats.done = True
+    finally:
+        for future in futures:
+            future.cancel()
+        if isinstance(executor, ThreadPoolExecutor):
+            executor.shutdown(wait=False)
+
+
+def tree_totals(
+    root: Path,
+    one_filesystem: bool = False,
+    cancelled: Optional[Callable[[], bool]] = None,
+    stats: Optional[ScanStats] = None,
+) -> Dict[str, List[int]]:
+    """Return [files, bytes] below each entry of root, like ``du -s root/*``.
+
+    Files directly in root are counted under their own names. Sizes are
+    apparent sizes, and hard-linked files are counted once.
+    """
+    totals: Dict[str, List[int]] = {}
+    prefix = os.path.join(str(root), "")
+    for batch in scan_tree(root, one_filesystem, True, cancelled=cancelled, stats=stats):
+        if batch.path == str(root):
+            for name, mode, size in zip(batch.names, batch.modes, batch.sizes):
+                totals[name] = [0, 0] if stat.S_ISDIR(mode) else [1, size]
+            continue
+        top = batch.path[len(prefix):].split(os.sep, 1)[0]
+        total = totals.setdefault(top, [0, 0])
+        for mode, size in zip(batch.modes, batch.sizes):
+            if not stat.S_ISDIR(mode):
+                total[0] += 1
+                total[1] += size
+    return totals
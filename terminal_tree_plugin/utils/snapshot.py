@@ -0,0 +1,461 @@
+"""Compact, read-only snapshots of a directory tree for offline browsing.
+
+A snapshot (``.tts``) keeps every entry below a root in column arrays:
+
+- names, front coded: each name stores how many leading bytes it shares
+  with the previous name and the rest; every ``NAME_BLOCK``-th name is
+  stored whole, and its offset is kept, so any name can be decoded
+  without reading the ones before its block
+- the parent, size, mtime (ns) and st_mode of each entry
+
+Directories are written one listing at a time, in the order the scan
+engine delivers them, with each listing's entries sorted by name. An
+entry's parent is the number of the listing it belongs to, so the
+parent column only grows and a directory's children are found by binary
+search: its listing number comes from a (directory entry, listing) table
+sorted by entry. SnapshotBackend maps the file, so opening it costs the
+same whatever its size and only the pages a listing touches are read.
+File contents are not kept.
+"""
+
+import errno
+import os
+import stat
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, List, Optional, Tuple
+
+from .fs_backend import FilesystemBackend, LocalBackend, PathArg, get_backend
+from .scan import scan_tree
+
+SNAPSHOT_SUFFIX = ".tts"
+
+MAGIC = b"TTSNAP\x00\x01"
+VERSION = 2
+
+# Names per front-coding block (a whole name starts each block)
+NAME_BLOCK = 16
+
+# Parent of the root entry
+NO_PARENT = 0xFFFFFFFF
+
+# Set in a directory's mode when it could not be listed
+UNREADABLE = 1 << 16
+
+# Bytes of encoded names buffered before they are written
+WRITE_BUFFER = 1024 * 1024
+
+# Entries between progress callbacks while writing
+PROGRESS_EVERY = 10_000
+
+# Directory paths remembered with their entry index
+MAX_CACHED_PATHS = 100_000
+
+# magic, version, name block, entry count, listing count, created, root
+# length, then the offsets of the names and of each column below
+_HEADER = struct.Struct("<8sIIQQdQQQQQQQQQ")
+
+# Name, array typecode, item size and length ("entries" or "listings")
+# of each column, in file order after the name block offsets
+_COLUMNS = (
+    ("parents", "I", 4, "entries"),
+    ("sizes", "Q", 8, "entries"),
+    ("mtimes", "q", 8, "entries"),
+    ("modes", "I", 4, "entries"),
+    ("listed", "I", 4, "listings"),
+    ("listings", "I", 4, "listings"),
+)
+
+
+class SnapshotError(OSError):
+    """Raised when a snapshot cannot be written or is not valid."""
+
+
+def is_snapshot(path: Path) -> bool:
+    """Whether a local file starts with the snapshot magic."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def _varint(value: int) -> bytes:
+    """Encode a non-negative integer in 7-bit groups, low bits first."""
+    out = bytearray()
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _read_varint(data: Any, pos: int) -> Tuple[int, int]:
+    """Decode a varint at pos; return it and the position after it."""
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+class _NameWriter:
+    """Front codes names into a file, recording where each block starts."""
+
+    def __init__(self, f: IO[bytes]) -> None:
+        self._f = f
+        self._buffer = bytearray()
+        self._written = 0
+        self._previous = b""
+        self.count = 0
+        self.blocks = array("Q")
+
+    def add(self, name: bytes) -> None:
+        if self.count % NAME_BLOCK == 0:
+            self.blocks.append(self._written + len(self._buffer))
+            shared = 0
+        else:
+            shared = len(os.path.commonprefix((self._previous, name)))
+        suffix = name[shared:]
+        self._buffer += _varint(shared) + _varint(len(suffix)) + suffix
+        self._previous = name
+        self.count += 1
+        if len(self._buffer) >= WRITE_BUFFER:
+            self.flush()
+
+    def flush(self) -> None:
+        self._f.write(self._buffer)
+        self._written += len(self._buffer)
+        self._buffer.clear()
+
+
+def _write_column(f: IO[bytes], column: array) -> int:
+    """Write a column little-endian at the next 8-byte boundary; return its offset."""
+    f.write(bytes(-f.tell() % 8))
+    offset = f.tell()
+    if sys.byteorder != "little":
+        column = array(column.typecode, column)
+        column.byteswap()
+    column.tofile(f)
+    return offset
+
+
+def write_snapshot(
+    root: Path,
+    output: Path,
+    one_filesystem: bool = False,
+    cancelled: Optional[Callable[[], bool]] = None,
+    progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """Scan the tree below root into a snapshot file; return the number of entries.
+
+    The tree is read by the parallel scan engine without following
+    symlinks. The snapshot is written next to ``output`` and renamed into
+    place when complete, so a cancelled or failed run leaves no file.
+    """
+    is_cancelled = cancelled or (lambda: False)
+    root_key = str(root)
+    root_bytes = os.fsencode(root_key)
+    root_st = get_backend().stat(root)
+
+    parents = array("I", [NO_PARENT])
+    sizes = array("Q", [0])
+    mtimes = array("q", [root_st.st_mtime_ns])
+    modes = array("I", [root_st.st_mode & 0xFFFF])
+    # Entry index of each listed directory, by listing number
+    listed = array("I")
+    # Directories found but not listed yet, by path
+    pending: Dict[str, int] = {root_key: 0}
+
+    temp = output.with_name(output.name + ".part")
+    try:
+        with open(temp, "wb") as f:
+            f.write(bytes(_HEADER.size))
+            f.write(root_bytes)
+            f.write(bytes(-f.tell() % 8))
+            names_offset = f.tell()
+            names = _NameWriter(f)
+            names.add(b"")
+
+            for batch in scan_tree(root, one_filesystem, cancelled=is_cancelled):
+                index = pending.pop(batch.path, None)
+                if index is None:
+                    continue
+                if batch.error:
+                    modes[index] |= UNREADABLE
+                    continue
+                if len(parents) + len(batch.names) >= NO_PARENT:
+                    raise SnapshotError(errno.EFBIG, "Too many entries for a snapshot")
+
+                listing = len(listed)
+                listed.append(index)
+                encoded = [os.fsencode(name) for name in batch.names]
+                prefix = os.path.join(batch.path, "")
+                for i in sorted(range(len(encoded)), key=encoded.__getitem__):
+                    mode = batch.modes[i]
+                    if stat.S_ISDIR(mode):
+                        pending[prefix + batch.names[i]] = len(parents)
+                    parents.append(listing)
+                    sizes.append(batch.sizes[i])
+                    mtimes.append(batch.mtimes[i])
+                    modes.append(mode & 0xFFFF)
+                    names.add(encoded[i])
+                if progress and len(parents) // PROGRESS_EVERY != (len(parents) - len(encoded)) // PROGRESS_EVERY:
+                    progress(len(parents))
+            if is_cancelled():
+                raise SnapshotError(errno.ECANCELED, "Snapshot cancelled")
+            names.flush()
+
+            # Listings sorted by the entry index of their directory, for bisect
+            order = sorted(range(len(listed)), key=listed.__getitem__)
+            columns = (
+                names.blocks, parents, sizes, mtimes, modes,
+                array("I", (listed[i] for i in order)), array("I", order),
+            )
+            offsets = [_write_column(f, column) for column in columns]
+            f.seek(0)
+            f.write(_HEADER.pack(
+                MAGIC, VERSION, NAME_BLOCK, len(parents), len(listed), time.time(), len(root_bytes),
+                names_offset, *offsets,
+            ))
+        os.replace(temp, output)
+    except BaseException:
+        try:
+            os.unlink(temp)
+        except OSError:
+            pass
+        raise
+
+    if progress:
+        progress(len(parents))
+    return len(parents)
+
+
+class SnapshotEntry:
+    """An entry of a snapshot directory, shaped like os.DirEntry."""
+
+    __slots__ = ("name", "path", "_snapshot", "_index")
+
+    def __init__(self, snapshot: "SnapshotBackend", index: int, name: str, path: str) -> None:
+        self.name = name
+        self.path = path
+        self._snapshot = snapshot
+        self._index = index
+
+    def inode(self) -> int:
+        return self._index + 1
+
+    def is_symlink(self) -> bool:
+        return stat.S_ISLNK(self._snapshot._modes[self._index])
+
+    def is_dir(self, follow_symlinks: bool = True) -> bool:
+        return stat.S_ISDIR(self._snapshot._modes[self._index])
+
+    def is_file(self, follow_symlinks: bool = True) -> bool:
+        return stat.S_ISREG(self._snapshot._modes[self._index])
+
+    def stat(self, follow_symlinks: bool = True) -> os.stat_result:
+        return self._snapshot._stat(self._index)
+
+    def __fspath__(self) -> str:
+        return self.path
+
+
+class _SnapshotListing:
+    """The iterator returned by SnapshotBackend.scandir."""
+
+    def __init__(self, entries: List[SnapshotEntry]) -> None:
+        self._entries = iter(entries)
+
+    def __iter__(self) -> "_SnapshotListing":
+        return self
+
+    def __next__(self) -> SnapshotEntry:
+        return next(self._entries)
+
+    def close(self) -> None:
+        self._entries = iter(())
+
+    def __enter__(self) -> "_SnapshotListing":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class SnapshotBackend(FilesystemBackend):
+    """A snapshot file, mapped read-only and browsed as a filesystem.
+
+    Paths are those of the scanned tree (below ``root``). Symlinks are
+    not followed, since their targets are not kept, and files cannot be
+    opened.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._map = LocalBackend().mmap(path)
+        try:
+            self._load()
+        except (struct.error, ValueError) as e:
+            self.close()
+            raise SnapshotError(errno.EINVAL, f"Not a valid snapshot: {e}", str(path)) from e
+        self._paths: Dict[str, int] = {}
+
+    def _load(self) -> None:
+        if len(self._map) < _HEADER.size:
+            raise ValueError("file is too short")
+        (
+            magic, version, self._block, self.count, listing_count, self.created, root_length,
+            names_offset, blocks_offset, *offsets,
+        ) = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("unknown format")
+
+        view = memoryview(self._map)
+        self._view = view
+        self.root = Path(os.fsdecode(bytes(view[_HEADER.size:_HEADER.size + root_length])))
+        self._root_key = os.path.normpath(str(self.root))
+        self._names = view[names_offset:blocks_offset]
+
+        block_count = -(-self.count // self._block)
+        columns = [("blocks", "Q", 8, blocks_offset, block_count)]
+        lengths = {"entries": self.count, "listings": listing_count}
+        columns += [
+            (name, code, size, offset, lengths[length])
+            for (name, code, size, length), offset in zip(_COLUMNS, offsets)
+        ]
+        for name, code, size, offset, length in columns:
+            if offset + size * length > len(view):
+                raise ValueError(f"{name} column is truncated")
+            column = view[offset:offset + size * length].cast(code)
+            if sys.byteorder != "little":
+                # Big-endian hosts pay for a copy of each column
+                column = array(code, column.tobytes())
+                column.byteswap()
+            setattr(self, f"_{name}", column)
+
+    def close(self) -> None:
+        """Release the mapping."""
+        for name in ("_blocks", *(f"_{column[0]}" for column in _COLUMNS), "_names", "_view"):
+            column = self.__dict__.pop(name, None)
+            if isinstance(column, memoryview):
+                column.release()
+        self._map.close()
+
+    # Columns
+
+    def _children(self, index: int) -> Tuple[int, int]:
+        """Return the range of entries listed from directory index."""
+        position = bisect_left(self._listed, index)
+        if position == len(self._listed) or self._listed[position] != index:
+            return 1, 1
+        listing = self._listings[position]
+        lo = bisect_left(self._parents, listing, 1)
+        return lo, bisect_right(self._parents, listing, lo)
+
+    def _decode(self, lo: int, hi: int) -> List[bytes]:
+        """Decode the names of entries lo to hi, starting from lo's block."""
+        data = self._names
+        block = lo // self._block
+        position = self._blocks[block]
+        previous = b""
+        names = []
+        for index in range(block * self._block, hi):
+            shared, position = _read_varint(data, position)
+            length, position = _read_varint(data, position)
+            name = previous[:shared] + bytes(data[position:position + length])
+            position += length
+            if index >= lo:
+                names.append(name)
+            previous = name
+        return names
+
+    def _find(self, parent: int, name: bytes) -> Optional[int]:
+        """Binary search the (sorted) children of parent for a name."""
+        lo, hi = self._children(parent)
+        while lo < hi:
+            middle = (lo + hi) // 2
+            found = self._decode(middle, middle + 1)[0]
+            if found == name:
+                return middle
+            if found < name:
+                lo = middle + 1
+            else:
+                hi = middle
+        return None
+
+    def _index_of(self, path: PathArg) -> int:
+        """Return the entry index of a path, or raise FileNotFoundError."""
+        key = os.path.normpath(os.fspath(path))
+        index = self._paths.get(key)
+        if index is not None:
+            return index
+
+        if key == self._root_key:
+            return 0
+        relative = os.path.relpath(key, self._root_key)
+        if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+            raise FileNotFoundError(errno.ENOENT, "Not in the snapshot", key)
+
+        parent_key, name = os.path.split(key)
+        parent = self._index_of(parent_key) if parent_key != key else 0
+        if not stat.S_ISDIR(self._modes[parent]):
+            raise NotADirectoryError(errno.ENOTDIR, "Not a directory", parent_key)
+        index = self._find(parent, os.fsencode(name))
+        if index is None:
+            raise FileNotFoundError(errno.ENOENT, "No such file or directory", key)
+
+        if stat.S_ISDIR(self._modes[index]):
+            if len(self._paths) >= MAX_CACHED_PATHS:
+                self._paths.clear()
+            self._paths[key] = index
+        return index
+
+    def _stat(self, index: int) -> os.stat_result:
+        mtime_ns = self._mtimes[index]
+        seconds = mtime_ns / 1e9
+        whole = int(seconds)
+        return os.stat_result((
+            self._modes[index] & 0xFFFF, index + 1, 1, 1, 0, 0, self._sizes[index], whole, whole, whole,
+            seconds, seconds, seconds, mtime_ns, mtime_ns, mtime_ns,
+        ))
+
+    # FilesystemBackend
+
+    def scandir(self, path: PathArg) -> _SnapshotListing:
+        index = self._index_of(path)
+        mode = self._modes[index]
+        if not stat.S_ISDIR(mode):
+            raise NotADirectoryError(errno.ENOTDIR, "Not a directory", os.fspath(path))
+        if mode & UNREADABLE:
+            raise PermissionError(errno.EACCES, "Permission denied (when the snapshot was taken)", os.fspath(path))
+
+        lo, hi = self._children(index)
+        prefix = os.path.join(os.fspath(path), "")
+        entries = []
+        for offset, raw in enumerate(self._decode(lo, hi)):
+            name = os.fsdecode(raw)
+            entries.append(SnapshotEntry(self, lo + offset, name, prefix + name))
+        return _SnapshotListing(entries)
+
+    def stat(self, path: PathArg, follow_symlinks: bool = True) -> os.stat_result:
+        return self._stat(self._index_of(path))
+
+    def open(self, path: PathArg) -> IO[bytes]:
+        self._index_of(path)
+        raise OSError(errno.EOPNOTSUPP, "File contents are not kept in snapshots", os.fspath(path))
+
+    def mmap(self, path: PathArg) -> Any:
+        return self.open(path)
+
+    def describe(self) -> str:
+        """Return e.g. "/data, 1,234 entries, taken 2024-01-01 12:00"."""
+        taken = time.strftime("%Y-%m-%d %H:%M", time.localtime(self.created))
+        return f"{self.root}, {self.count:,} entries, taken {taken}"
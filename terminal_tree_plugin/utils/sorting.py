@@ -0,0 +1,67 @@
+"""Sort modes for directory listings.
+
+Keys are built from the metadata already collected by the scan, so
+sorting (or switching modes) never touches the filesystem.
+"""
+
+import re
+from typing import TYPE_CHECKING, Any, Callable, Iterable, List, Tuple
+
+if TYPE_CHECKING:
+    from .listing import EntryInfo
+
+SORT_MODES = ("name", "natural", "size", "mtime", "extension")
+
+_DIGITS = re.compile(r"(\d+)")
+
+
+def natural_key(name: str) -> Tuple[Any, ...]:
+    """Split a name into text and integer runs, so "file10" sorts after "file9"."""
+    parts = _DIGITS.split(name.lower())
+    # Odd positions are always the digit runs
+    return tuple(int(part) if i % 2 else part for i, part in enumerate(parts))
+
+
+def _extension(name: str) -> str:
+    """Return the lowercased extension of a name, without the dot."""
+    dot = name.rfind(".")
+    return name[dot + 1:].lower() if dot > 0 else ""
+
+
+def sort_key(mode: str) -> Callable[["EntryInfo"], Tuple[Any, ...]]:
+    """Return the key function for a sort mode (name is the tiebreaker)."""
+    if mode == "name":
+        return lambda e: (e.name.lower(),)
+    if mode == "natural":
+        return lambda e: natural_key(e.name)
+    if mode == "size":
+        return lambda e: (e.size or 0, e.name.lower())
+    if mode == "mtime":
+        return lambda e: (e.mtime or 0.0, e.name.lower())
+    if mode == "extension":
+        return lambda e: (_extension(e.name), e.name.lower())
+    raise ValueError(f"Unknown sort mode: {mode}")
+
+
+def sort_entries(
+    entries: Iterable["EntryInfo"],
+    mode: str = "name",
+    reverse: bool = False,
+) -> List["EntryInfo"]:
+    """Sort entries by mode, always keeping directories before files."""
+    key = sort_key(mode)
+    dirs: List["EntryInfo"] = []
+    files: List["EntryInfo"] = []
+    for entry in entries:
+        (dirs if entry.is_dir else files).append(entry)
+
+    # list.sort computes each key exactly once
+    dirs.sort(key=key, reverse=reverse)
+    files.sort(key=key, reverse=reverse)
+    return dirs + files
+
+
+def next_sort_mode(mode: str) -> str:
+    """Return the mode after the given one, wrapping around."""
+    index = SORT_MODES.index(mode) if mode in SORT_MODES else -1
+    return SORT_MODES[(index + 1) % len(SORT_MODES)]
@@ -0,0 +1,364 @@
+"""Lazy access to large CSV and TSV files.
+
+Opening a TableFile only reads a sample, to detect the encoding, the
+dialect (delimiter and quoting) and whether the first row is a header.
+build_index then finds where rows start with one pass over the bytes,
+keeping the offset of every ``ROW_STRIDE``-th row, so any row is found by
+seeking to its block and parsing at most ``ROW_STRIDE`` rows. Newlines
+inside quoted fields are not row boundaries. Parsed blocks are cached in
+a small LRU, so memory stays bounded however large the file is.
+
+column_stats makes a separate, cancellable pass that keeps the minimum,
+maximum and null count of every column whose values are all numbers.
+"""
+
+import codecs
+import csv
+import io
+import itertools
+import re
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Pattern, Type
+
+from .encoding import SAMPLE_SIZE, detect_encoding
+from .fs_backend import get_backend
+
+# Suffixes shown as tables, with the delimiter assumed when sniffing fails
+TABLE_SUFFIXES = {".csv": ",", ".tsv": "\t", ".tab": "\t"}
+
+# Delimiters the sniffer may pick
+SNIFF_DELIMITERS = ",\t;|"
+
+# Rows per indexed block
+ROW_STRIDE = 64
+
+# Bytes read per step of the index pass
+INDEX_CHUNK = 1024 * 1024
+
+# Parsed blocks kept in memory
+MAX_BLOCKS = 32
+
+# Rows of the sample kept for column widths
+SAMPLE_ROWS = 200
+
+# Values counted as missing, besides empty cells
+NULL_VALUES = {"na", "n/a", "nan", "null", "none", "-"}
+
+# Rows between progress reports of the statistics pass
+STATS_REPORT_EVERY = 50_000
+
+# Codecs whose newline and quote bytes can appear inside other characters
+_WIDE_CODECS = {"utf-16", "utf-16-le", "utf-16-be", "utf-32", "utf-32-le", "utf-32-be"}
+
+# Patterns matching n newline-terminated lines, by n
+_SKIP_PATTERNS: Dict[int, Pattern[bytes]] = {}
+
+
+def is_table_file(path: Path) -> bool:
+    """Whether a file is previewed as a table, by its suffix."""
+    return path.suffix.lower() in TABLE_SUFFIXES
+
+
+class ColumnStats:
+    """Running statistics of one column; numeric is cleared by the first non-number."""
+
+    __slots__ = ("numeric", "minimum", "maximum", "nulls", "count")
+
+    def __init__(self) -> None:
+        self.numeric = True
+        self.minimum: Optional[float] = None
+        self.maximum: Optional[float] = None
+        self.nulls = 0
+        self.count = 0
+
+
+class TableStats:
+    """Progress and results of a statistics pass, read by the UI while it runs."""
+
+    def __init__(self) -> None:
+        self.columns: List[ColumnStats] = []
+        self.rows = 0
+        self.bytes_read = 0
+        self.done = False
+
+
+def _skip_lines(count: int) -> Pattern[bytes]:
+    """Return a pattern matching count newline-terminated lines."""
+    pattern = _SKIP_PATTERNS.get(count)
+    if pattern is None:
+        pattern = _SKIP_PATTERNS[count] = re.compile(rb"(?:[^\n]*\n){%d}" % count)
+    return pattern
+
+
+def _is_number(value: str) -> bool:
+    try:
+        float(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _looks_like_header(rows: List[List[str]]) -> bool:
+    """Whether the first row names the columns: distinct labels above some numeric column.
+
+    Catches headers the csv sniffer misses when columns mix types.
+    """
+    if len(rows) < 2:
+        return False
+    first = [cell.strip() for cell in rows[0]]
+    if not all(first) or len(set(first)) < len(first) or any(_is_number(cell) for cell in first):
+        return False
+    for i in range(len(first)):
+        values = [row[i].strip() for row in rows[1:] if i < len(row) and row[i].strip()]
+        if values and all(_is_number(value) for value in values):
+            return True
+    return False
+
+
+def _excel_with(sniffed: Type[csv.Dialect]) -> Type[csv.Dialect]:
+    """Return the excel dialect with a sniffed delimiter and quote character.
+
+    The sniffer's other guesses are not trusted: it reports doublequote=False
+    for RFC 4180 files whose quoted fields span lines, for one.
+    """
+
+    class Sniffed(csv.excel):
+        delimiter = sniffed.delimiter
+        quotechar = sniffed.quotechar or '"'
+        skipinitialspace = sniffed.skipinitialspace
+
+    return Sniffed
+
+
+class TableFile:
+    """A delimited text file with a row index built on demand."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        with get_backend().open(path) as f:
+            sample = f.read(SAMPLE_SIZE)
+            self.size = f.seek(0, io.SEEK_END)
+
+        self.encoding = detect_encoding(sample)
+        if codecs.lookup(self.encoding).name in _WIDE_CODECS:
+            raise ValueError(f"{self.encoding} tables are not supported")
+
+        # Sniff whole lines only; a cut row confuses the sniffer
+        text = sample.decode(self.encoding, errors="replace")
+        if len(sample) == SAMPLE_SIZE and "\n" in text:
+            text = text[:text.rindex("\n") + 1]
+        default = TABLE_SUFFIXES.get(path.suffix.lower(), ",")
+        try:
+            self.dialect = _excel_with(csv.Sniffer().sniff(text, SNIFF_DELIMITERS))
+        except csv.Error:
+            self.dialect = csv.excel_tab if default == "\t" else csv.excel
+        try:
+            rows = list(itertools.islice(csv.reader(io.StringIO(text), self.dialect), SAMPLE_ROWS + 1))
+        except csv.Error:
+            rows = []
+        try:
+            self.has_header = csv.Sniffer().has_header(text) or _looks_like_header(rows)
+        except csv.Error:
+            self.has_header = _looks_like_header(rows)
+        self.columns = max((len(row) for row in rows), default=0)
+        if self.has_header and rows:
+            self.header = rows.pop(0)
+        else:
+            self.header = [str(i + 1) for i in range(self.columns)]
+        self.header += [""] * (self.columns - len(self.header))
+        self.sample = rows
+
+        # Offsets of every ROW_STRIDE-th row, counting the header as row 0
+        self._offsets = array("Q", [0])
+        self._lines = 0
+        self._since = 0
+        self._in_quotes = False
+        self._blocks: "OrderedDict[int, List[List[str]]]" = OrderedDict()
+        # Data rows found so far; final once indexed is set
+        self.rows = 0
+        self.indexed = False
+
+    @property
+    def delimiter(self) -> str:
+        """The detected delimiter."""
+        return self.dialect.delimiter
+
+    def build_index(
+        self,
+        cancelled: Optional[Callable[[], bool]] = None,
+        progress: Optional[Callable[[int], None]] = None,
+    ) -> bool:
+        """Find the start of every block of rows; return False if cancelled.
+
+        Rows already indexed can be read while this runs.
+        """
+        quote = self.dialect.quotechar.encode() if self.dialect.quotechar else b""
+        boundaries = re.compile(b"[\n" + re.escape(quote) + b"]" if quote else b"\n")
+        header = 1 if self.has_header else 0
+
+        with get_backend().open(self.path) as f:
+            base = 0
+            tail = b""
+            while True:
+                if cancelled and cancelled():
+                    return False
+                chunk = f.read(INDEX_CHUNK)
+                if not chunk:
+                    break
+                if quote and (self._in_quotes or quote in chunk):
+                    self._index_quoted(chunk, base, boundaries, quote)
+                else:
+                    self._index_plain(chunk, base)
+                base += len(chunk)
+                tail = chunk[-1:]
+                self.rows = max(self._lines - header, 0)
+                if progress:
+                    progress(base)
+
+        # A last row without a newline
+        lines = self._lines + (1 if tail and tail != b"\n" else 0)
+        self.rows = max(lines - header, 0)
+        self.indexed = True
+        return True
+
+    def _record(self, offset: int) -> None:
+        self._lines += 1
+        self._since += 1
+        if self._since == ROW_STRIDE:
+            self._offsets.append(offset)
+            self._since = 0
+
+    def _index_plain(self, chunk: bytes, base: int) -> None:
+        """Index a chunk without quotes, skipping whole blocks of lines at once."""
+        pos = 0
+        while True:
+            need = ROW_STRIDE - self._since
+            match = _skip_lines(need).match(chunk, pos)
+            if match is None:
+                count = chunk.count(b"\n", pos)
+                self._lines += count
+                self._since += count
+                return
+            pos = match.end()
+            self._lines += need
+            self._since = 0
+            self._offsets.append(base + pos)
+
+    def _index_quoted(self, chunk: bytes, base: int, boundaries: Pattern[bytes], quote: bytes) -> None:
+        """Index a chunk with quotes, ignoring newlines inside quoted fields."""
+        # Doubled quotes toggle twice, so only the parity matters
+        quote_byte = quote[0]
+        in_quotes = self._in_quotes
+        for match in boundaries.finditer(chunk):
+            if chunk[match.start()] == quote_byte:
+                in_quotes = not in_quotes
+            elif not in_quotes:
+                self._record(base + match.end())
+        self._in_quotes = in_quotes
+
+    def _block(self, block: int) -> List[List[str]]:
+        """Return the parsed rows of an indexed block, from the cache if possible."""
+        rows = self._blocks.get(block)
+        if rows is not None:
+            self._blocks.move_to_end(block)
+            return rows
+
+        with get_backend().open(self.path) as f:
+            f.seek(self._offsets[block])
+            text = io.TextIOWrapper(f, self.encoding, errors="replace", newline="")
+            rows = []
+            try:
+                rows.extend(itertools.islice(csv.reader(text, self.dialect), ROW_STRIDE))
+            except csv.Error as e:
+                rows.append([f"⚠ {e}"])
+            text.detach()
+
+        self._blocks[block] = rows
+        if len(self._blocks) > MAX_BLOCKS:
+            self._blocks.popitem(last=False)
+        return rows
+
+    def row(self, index: int) -> List[str]:
+        """Return a data row's cells (empty past the rows indexed so far)."""
+        if not 0 <= index < self.rows:
+            return []
+        line = index + (1 if self.has_header else 0)
+        block, offset = divmod(line, ROW_STRIDE)
+        if block >= len(self._offsets):
+            return []
+        rows = self._block(block)
+        return rows[offset] if offset < len(rows) else []
+
+    def column_stats(
+        self,
+        stats: TableStats,
+        cancelled: Optional[Callable[[], bool]] = None,
+    ) -> bool:
+        """Fill stats with the min, max and nulls of numeric columns; False if cancelled."""
+        columns = stats.columns = [ColumnStats() for _ in range(self.columns)]
+        # Columns still numeric; the others are no longer looked at
+        active = list(range(self.columns))
+
+        with get_backend().open(self.path) as f:
+            text = io.TextIOWrapper(f, self.encoding, errors="replace", newline="")
+            reader = csv.reader(text, self.dialect)
+            try:
+                if self.has_header:
+                    next(reader, None)
+                for row in reader:
+                    stats.rows += 1
+                    if stats.rows % STATS_REPORT_EVERY == 0:
+                        stats.bytes_read = f.tell()
+                        if cancelled and cancelled():
+                            return False
+                        if not active:
+                            break
+                    width = len(row)
+                    dropped = False
+                    for i in active:
+                        column = columns[i]
+                        value = row[i].strip() if i < width else ""
+                        if not value or value.lower() in NULL_VALUES:
+                            column.nulls += 1
+                            continue
+                        try:
+                            number = float(value)
+                        except ValueError:
+                            column.numeric = False
+                            dropped = True
+                            continue
+                        column.count += 1
+                        if column.minimum is None or number < column.minimum:
+                            column.minimum = number
+                        if column.maximum is None or number > column.maximum:
+                            column.maximum = number
+                    if dropped:
+                        active = [i for i in active if columns[i].numeric]
+            except csv.Error:
+                # A malformed row ends the pass; the totals so far stand
+                pass
+            text.detach()
+
+        for column in columns:
+            if not column.count:
+                column.numeric = False
+        stats.bytes_read = self.size
+        stats.done = True
+        return True
+
+
+def format_number(value: float) -> str:
+    """Format a statistic compactly, without a fraction for whole numbers."""
+    if value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return f"{value:.6g}"
+
+
+def open_table(path: Path) -> Optional[TableFile]:
+    """Open a table file, or return None if it cannot be shown as a table."""
+    try:
+        return TableFile(path)
+    except (OSError, ValueError, LookupError):
+        return None
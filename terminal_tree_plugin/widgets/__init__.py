@@ -1,7 +1,25 @@
 """Custom widgets for the terminal tree plugin."""
 
-from .file_preview import FilePreview
-from .path_input import PathInput
-from .tree_view import TreeView
+from importlib import import_module
+from typing import Any
 
-__all__ = ["FilePreview", "PathInput", "TreeView"]
\ No newline at end of file
+__all__ = ["CompareView", "DuplicatesView", "FilePreview", "JobsBar", "PathInput", "ProfileOverlay", "TreeView"]
+
+# Widgets are imported on first access so the app only pays for what it shows
+_WIDGET_MODULES = {
+    "CompareView": ".compare_view",
+    "DuplicatesView": ".duplicates_view",
+    "FilePreview": ".file_preview",
+    "JobsBar": ".jobs_bar",
+    "PathInput": ".path_input",
+    "ProfileOverlay": ".profile_overlay",
+    "TreeView": ".tree_view",
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Import a widget class on first access."""
+    if name in _WIDGET_MODULES:
+        module = import_module(_WIDGET_MODULES[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
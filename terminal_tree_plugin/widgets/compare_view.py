@@ -0,0 +1,162 @@
+"""Tree of the differences between two directories."""
+
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from rich.text import Text
+from textual import work
+from textual.widget import Widget
+from textual.widgets import Tree
+from textual.widgets.tree import TreeNode
+from textual.worker import get_current_worker
+
+from ..utils.compare import CHANGED, ERROR, LEFT_ONLY, RIGHT_ONLY, CompareEntry, CompareStats, compare_trees
+from .tree_view import TreeView
+
+# Marker, style and description per difference status
+STATUS_STYLES = {
+    CHANGED: ("✱", "yellow", "changed"),
+    LEFT_ONLY: ("−", "red", "only in left"),
+    RIGHT_ONLY: ("+", "green", "only in right"),
+    ERROR: ("⚠", "bold red", "unreadable"),
+}
+
+
+def _format_size(size: Optional[int]) -> str:
+    """Format a size the way tree labels do."""
+    if size is None:
+        return "?"
+    if size < 1024:
+        return f"{size}B"
+    if size < 1024 * 1024:
+        return f"{size // 1024}KB"
+    return f"{size // (1024 * 1024)}MB"
+
+
+class CompareView(Widget):
+    """Differences between two directory trees, shown as they are found."""
+
+    DEFAULT_CSS = """
+    CompareView {
+        width: 1fr;
+        height: 1fr;
+        border: solid $primary;
+        background: $surface;
+    }
+
+    CompareView Tree {
+        background: $surface;
+        color: $text;
+    }
+    """
+
+    # Difference nodes shown at most; the rest are only counted
+    MAX_NODES = 10_000
+
+    # Seconds between progress updates in the border title
+    PROGRESS_INTERVAL = 0.25
+
+    def __init__(self, left: Path, right: Path, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.left = left
+        self.right = right
+        self.stats = CompareStats()
+        self._tree: Optional[Tree] = None
+        # Directory nodes by path relative to both roots
+        self._dirs: Dict[str, TreeNode] = {}
+        self._shown = 0
+
+    def compose(self):
+        """Compose the tree widget."""
+        self._tree = Tree(Text(f"{self.left}  ⇄  {self.right}", style="bold blue"), id="compare_tree")
+        self._tree.show_root = True
+        self._tree.show_guides = True
+        self._dirs[""] = self._tree.root
+        yield self._tree
+
+    def on_mount(self) -> None:
+        """Start comparing."""
+        self._tree.root.expand()
+        self.border_subtitle = "− left only  + right only  ✱ changed"
+        self._show_progress()
+        self.set_interval(self.PROGRESS_INTERVAL, self._show_progress)
+        self._compare()
+
+    @work(thread=True, exclusive=True, group="compare")
+    def _compare(self) -> None:
+        """Compare the two trees on a worker, streaming differences to the UI."""
+        worker = get_current_worker()
+
+        def on_diff(entries: List[CompareEntry]) -> None:
+            if not worker.is_cancelled:
+                self.app.call_from_thread(self._add_differences, entries)
+
+        compare_trees(self.left, self.right, on_diff, lambda: worker.is_cancelled, self.stats)
+        if not worker.is_cancelled:
+            self.app.call_from_thread(self._show_progress)
+
+    def _show_progress(self) -> None:
+        """Show the comparison's progress in the border title."""
+        stats = self.stats
+        if stats.done:
+            self.border_title = (
+                f"⇄ {stats.differences:,} differences" if stats.differences else "⇄ ✅ Identical"
+            )
+            return
+
+        title = f"⇄ Comparing... {stats.files:,} files, {stats.differences:,} differences"
+        if stats.to_hash:
+            title += f", hashed {stats.hashed:,}/{stats.to_hash:,}"
+        self.border_title = title
+
+    def _dir_node(self, relative: str) -> TreeNode:
+        """Return the node of a directory containing differences, adding it if needed."""
+        node = self._dirs.get(relative)
+        if node is None:
+            parent, _, name = relative.rpartition("/")
+            # Only directories present on both sides are descended into
+            node = self._dir_node(parent).add(
+                Text.assemble(("📁 ", "bold blue"), (name, "bold yellow")),
+                data=self.left / relative,
+                expand=True,
+            )
+            self._dirs[relative] = node
+        return node
+
+    def _add_differences(self, entries: List[CompareEntry]) -> None:
+        """Add nodes for a batch of differences."""
+        for entry in entries:
+            if self._shown >= self.MAX_NODES:
+                break
+            self._shown += 1
+
+            marker, style, description = STATUS_STYLES[entry.status]
+            parent, _, name = entry.relative.rpartition("/")
+            label = Text()
+            label.append(f"{marker} ", style=style)
+            label.append("📁 " if entry.is_dir else "📄 ")
+            label.append(name or str(self.left), style=style)
+            if entry.status == CHANGED and not entry.is_dir and entry.left_size != entry.right_size:
+                label.append(
+                    f" ({_format_size(entry.left_size)} → {_format_size(entry.right_size)})", style="dim"
+                )
+            else:
+                label.append(f" ({description})", style="dim")
+
+            # Only right-only entries are missing from the left side
+            path = (self.right if entry.status == RIGHT_ONLY else self.left) / entry.relative
+            if entry.relative:
+                self._dir_node(parent).add_leaf(label, data=path)
+            else:
+                # The roots themselves could not be listed
+                self._tree.root.add_leaf(label, data=path)
+
+        if self._shown >= self.MAX_NODES:
+            self.border_subtitle = f"showing the first {self.MAX_NODES:,} differences"
+
+    def on_tree_node_selected(self, event: Tree.NodeSelected) -> None:
+        """Preview the selected file."""
+        event.stop()
+        path = event.node.data
+        if path is not None and not event.node.allow_expand and path.is_file():
+            self.post_message(TreeView.FileSelected(path))
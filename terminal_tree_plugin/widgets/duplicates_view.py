@@ -0,0 +1,123 @@
+"""Groups of files with identical content below a directory."""
+
+from pathlib import Path
+from typing import List, Optional
+
+from rich.text import Text
+from textual import work
+from textual.widget import Widget
+from textual.widgets import Tree
+from textual.worker import get_current_worker
+
+from ..utils.duplicates import DuplicateGroup, DuplicateStats, find_duplicates
+from .compare_view import _format_size
+from .tree_view import TreeView
+
+
+class DuplicatesView(Widget):
+    """Duplicate files below a directory, grouped and shown as they are confirmed."""
+
+    DEFAULT_CSS = """
+    DuplicatesView {
+        width: 1fr;
+        height: 1fr;
+        border: solid $primary;
+        background: $surface;
+    }
+
+    DuplicatesView Tree {
+        background: $surface;
+        color: $text;
+    }
+    """
+
+    # Groups shown at most; the rest are only counted
+    MAX_GROUPS = 5_000
+
+    # Seconds between progress updates (and batches of new groups)
+    PROGRESS_INTERVAL = 0.25
+
+    def __init__(self, root: Path, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.root = root
+        self.stats = DuplicateStats()
+        self._tree: Optional[Tree] = None
+        # Groups found by the worker and not yet shown
+        self._incoming: List[DuplicateGroup] = []
+        self._shown = 0
+
+    def compose(self):
+        """Compose the tree widget."""
+        self._tree = Tree(Text(f"🧬 {self.root}", style="bold blue"), id="duplicates_tree")
+        self._tree.show_root = True
+        self._tree.show_guides = True
+        yield self._tree
+
+    def on_mount(self) -> None:
+        """Start searching."""
+        self._tree.root.expand()
+        self.border_subtitle = "size × copies — reclaimable"
+        self._show_progress()
+        self.set_interval(self.PROGRESS_INTERVAL, self._show_progress)
+        self._search()
+
+    @work(thread=True, exclusive=True, group="duplicates")
+    def _search(self) -> None:
+        """Search for duplicates on a worker; groups are picked up by _show_progress."""
+        worker = get_current_worker()
+        find_duplicates(self.root, self._incoming.append, lambda: worker.is_cancelled, self.stats)
+        if not worker.is_cancelled:
+            self.app.call_from_thread(self._show_progress)
+
+    def _show_progress(self) -> None:
+        """Show new groups and the search's progress in the border title."""
+        if self._incoming:
+            # The worker keeps appending to this list, so it is drained in place
+            groups = self._incoming[:]
+            del self._incoming[:len(groups)]
+            self._add_groups(groups)
+
+        stats = self.stats
+        if stats.done:
+            self.border_title = (
+                f"🧬 {stats.groups:,} groups, {_format_size(stats.reclaimable)} reclaimable"
+                f" (read {_format_size(stats.bytes_read)} of {_format_size(stats.bytes_total)})"
+                if stats.groups
+                else "🧬 ✅ No duplicates"
+            )
+            return
+
+        title = f"🧬 {stats.stage.capitalize()}... {stats.files:,} files"
+        if stats.stage == "hashing" and stats.edge_candidates:
+            title += f", hashed {stats.hashed:,}/{stats.edge_candidates:,}"
+        if stats.groups:
+            title += f", {_format_size(stats.reclaimable)} reclaimable"
+        self.border_title = title
+
+    def _add_groups(self, groups: List[DuplicateGroup]) -> None:
+        """Add a node per group with its files as leaves."""
+        for group in groups:
+            if self._shown >= self.MAX_GROUPS:
+                break
+            self._shown += 1
+
+            label = Text()
+            label.append(f"{len(group.paths)} × {_format_size(group.size)}", style="bold yellow")
+            label.append(f" — {_format_size(group.reclaimable)} reclaimable", style="dim")
+            node = self._tree.root.add(label, data=None, expand=False)
+            for path in group.paths:
+                try:
+                    name = str(path.relative_to(self.root))
+                except ValueError:
+                    name = str(path)
+                node.add_leaf(Text.assemble("📄 ", name), data=path)
+
+        if self._shown >= self.MAX_GROUPS:
+            self.border_subtitle = f"showing the first {self.MAX_GROUPS:,} groups"
+
+    def on_tree_node_selected(self, event: Tree.NodeSelected) -> None:
+        """Preview the selected file."""
+        event.stop()
+        path = event.node.data
+        if path is not None and path.is_file():
+            self.post_message(TreeView.FileSelected(path))
@@ -1,16 +1,32 @@
 """File preview widget with syntax highlighting."""
 
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 
 from rich.console import RenderableType
 from rich.panel import Panel
 from rich.text import Text
+from textual import work
 from textual.reactive import reactive
 from textual.widget import Widget
 from textual.widgets import Static
+from textual.worker import get_current_worker
 
-from ..utils.file_utils import get_file_info, get_syntax_for_file, is_text_file, read_file_content
+from ..utils.archive import find_archive_member, split_archive_path
+from ..utils.file_utils import (
+    classify_path,
+    get_file_info,
+    get_syntax_for_file,
+    is_text_file,
+    read_file_content,
+)
+from ..utils.fs_backend import get_backend
+from ..utils.hashing import HASH_ALGORITHM, INLINE_BYTES, hash_files
+from ..utils.json_index import is_json_file, is_json_lines, open_json
+from ..utils.profiling import profiled, span
+from ..utils.tabular import is_table_file, open_table
+from .json_preview import JsonPreview
+from .table_preview import TablePreview
 
 
 class FilePreview(Widget):
@@ -38,9 +54,25 @@ class FilePreview(Widget):
     # Reactive attributes
     current_file: reactive[Optional[Path]] = reactive(None)
     
+    # JSON documents at least this large are shown as a collapsible tree
+    JSON_TREE_MIN_SIZE = 256 * 1024
+    
+    # Files smaller than this are hashed when previewed, in the worker thread
+    # rather than on the hashing pool, whose batches cannot be cancelled
+    AUTO_HASH_MAX_SIZE = INLINE_BYTES
+    
     def __init__(self, **kwargs) -> None:
         super().__init__(**kwargs)
         self._content_widget: Optional[Static] = None
+        # Algorithm of the checksum in the header
+        self.checksum_algorithm = HASH_ALGORITHM
+        # The file (and algorithm) to hash once shown, and the last that could not be
+        self._to_hash: Optional[Tuple[Path, str]] = None
+        self._unhashable: Optional[Tuple[Path, str]] = None
+        # Only metadata is available (a snapshot): no contents, no checksums
+        self.offline = False
+        # Shown instead of the static content for CSV/TSV and large JSON files
+        self._lazy_view: Optional[Widget] = None
     
     def compose(self):
         """Compose the preview widget."""
@@ -53,12 +85,66 @@ class FilePreview(Widget):
     def watch_current_file(self, new_file: Optional[Path]) -> None:
         """React to current file changes."""
         if self._content_widget:
+            if new_file and (self._show_table(new_file) or self._show_json(new_file)):
+                return
+            self._hide_lazy_view()
+            
             if new_file:
                 content = self._get_file_content(new_file)
             else:
                 content = self._get_welcome_content()
             
             self._content_widget.update(content)
+            
+            if self._to_hash is not None:
+                self._hash_file(*self._to_hash)
+                self._to_hash = None
+    
+    def _show_table(self, path: Path) -> bool:
+        """Show a CSV/TSV file in a virtual table; False if it cannot be shown as one.
+        
+        Tables are read lazily, so they have no size limit.
+        """
+        if self.offline or not is_table_file(path) or split_archive_path(path) is not None:
+            return False
+        table = open_table(path)
+        if table is None or not table.columns:
+            return False
+        self._show_lazy_view(TablePreview(table))
+        return True
+    
+    def _show_json(self, path: Path) -> bool:
+        """Show a large JSON or any JSON Lines file as a collapsible tree; False if it cannot be.
+        
+        Values are only read when expanded, so there is no size limit.
+        Smaller JSON files keep the highlighted text preview.
+        """
+        if self.offline or not is_json_file(path) or split_archive_path(path) is not None:
+            return False
+        try:
+            if not is_json_lines(path) and get_backend().stat(path).st_size < self.JSON_TREE_MIN_SIZE:
+                return False
+        except OSError:
+            return False
+        document = open_json(path)
+        if document is None:
+            return False
+        self._show_lazy_view(JsonPreview(document))
+        return True
+    
+    def _show_lazy_view(self, view: Widget) -> None:
+        """Show a view that reads the file itself in place of the static content."""
+        self._hide_lazy_view()
+        self._lazy_view = view
+        self._content_widget.display = False
+        self.mount(view)
+    
+    def _hide_lazy_view(self) -> None:
+        """Remove the table or JSON view and show the static content again."""
+        if self._lazy_view is not None:
+            self._lazy_view.remove()
+            self._lazy_view = None
+        self._content_widget.display = True
     
     def _get_welcome_content(self) -> RenderableType:
         """Get welcome content when no file is selected."""
@@ -70,14 +156,27 @@ class FilePreview(Widget):
         welcome_text.append("• File information display\n", style="green")
         welcome_text.append("• Text file content preview\n", style="green")
         welcome_text.append("• Binary file detection\n", style="green")
+        welcome_text.append("• Browsing inside zip, wheel and tar archives\n", style="green")
+        welcome_text.append("• BLAKE2 and SHA-256 checksums\n", style="green")
+        welcome_text.append("• Offline browsing of saved snapshots (--snapshot)\n", style="green")
+        welcome_text.append("• CSV/TSV files of any size as tables, with column statistics\n", style="green")
+        welcome_text.append("• Large JSON and JSON Lines files as collapsible trees\n", style="green")
         welcome_text.append("\nKeyboard shortcuts:\n", style="bold")
         welcome_text.append("• ↑/↓ - Navigate within tree\n", style="yellow")
         welcome_text.append("• ←/→ - Expand/collapse directories\n", style="yellow")
         welcome_text.append("• Enter - Open directory/file\n", style="yellow")
         welcome_text.append("• Backspace - Go to parent directory\n", style="yellow")
+        welcome_text.append("• Type a name (or / then a name) - Jump to the first match\n", style="yellow")
         welcome_text.append("• g - Edit path\n", style="yellow")
         welcome_text.append("• F5 - Refresh\n", style="yellow")
         welcome_text.append("• Ctrl+H - Toggle hidden files\n", style="yellow")
+        welcome_text.append("• s / r - Cycle sort mode / reverse order\n", style="yellow")
+        welcome_text.append("• i - Toggle .gitignore filtering\n", style="yellow")
+        welcome_text.append("• F6 - Toggle dual pane\n", style="yellow")
+        welcome_text.append("• F7 - Compare the two panes\n", style="yellow")
+        welcome_text.append("• F8 - Find duplicate files\n", style="yellow")
+        welcome_text.append("• Ctrl+K / Ctrl+Y - Checksum column / copy checksum\n", style="yellow")
+        welcome_text.append("• Insert (Ctrl+T), F9 / F10 / Del - Mark, copy / move / delete\n", style="yellow")
         welcome_text.append("• Tab - Switch panels\n", style="yellow")
         welcome_text.append("• q - Quit\n", style="yellow")
         
@@ -88,9 +187,11 @@ class FilePreview(Widget):
             padding=(1, 2),
         )
     
+    @profiled("preview.load")
     def _get_file_content(self, file_path: Path) -> RenderableType:
         """Get content for a specific file."""
-        if not file_path.exists():
+        # Archive members have virtual paths that do not exist on disk
+        if not get_backend().exists(file_path) and find_archive_member(file_path) is None:
             return Panel(
                 Text("❌ File not found", style="red"),
                 title=f"Error: {file_path.name}",
@@ -98,7 +199,9 @@ class FilePreview(Widget):
             )
         
         # Get file information
-        file_info = get_file_info(file_path)
+        algorithm = self.checksum_algorithm
+        file_info = get_file_info(file_path, algorithm)
+        checksum = file_info["checksum"]
         
         # Create header with file info
         header = Text()
@@ -107,6 +210,28 @@ class FilePreview(Widget):
         header.append(f"Size: {file_info['size']}\n", style="dim")
         header.append(f"Modified: {file_info['modified']}\n", style="dim")
         header.append(f"Permissions: {file_info['permissions']}\n", style="dim")
+        if self.offline:
+            header.append("\n")
+            header.append("📸 File contents are not kept in snapshots\n", style="yellow")
+            return Panel(
+                header,
+                title=f"📸 {file_path.name}",
+                border_style="blue",
+                padding=(1, 2),
+            )
+        if checksum:
+            header.append(f"{algorithm}: {checksum}\n", style="dim")
+        elif (
+            file_info["type"] == "file"
+            and split_archive_path(file_path) is None
+            and self._unhashable != (file_path, algorithm)
+        ):
+            if self._auto_hashed(file_path):
+                # Hashed in the background; the preview is redrawn when it is done
+                header.append(f"{algorithm}: ⏳ hashing...\n", style="dim")
+                self._to_hash = (file_path, algorithm)
+            else:
+                header.append(f"{algorithm}: Ctrl+Y to compute and copy\n", style="dim")
         header.append("\n")
         
         # Check if it's a text file
@@ -117,6 +242,8 @@ class FilePreview(Widget):
             content.append("🔒 Binary file - preview not available\n", style="yellow")
             
             # Try to show file type info
+            content.append(f"File type: {classify_path(file_path).description}\n", style="dim")
+            
             import mimetypes
             mime_type, _ = mimetypes.guess_type(str(file_path))
             if mime_type:
@@ -130,7 +257,8 @@ class FilePreview(Widget):
             )
         
         # Read text file content
-        file_content = read_file_content(file_path)
+        with span("preview.read"):
+            file_content = read_file_content(file_path)
         
         if file_content is None:
             return Panel(
@@ -140,13 +268,15 @@ class FilePreview(Widget):
             )
         
         # Get syntax highlighting
-        syntax = get_syntax_for_file(file_path, file_content)
+        with span("preview.highlight"):
+            syntax = get_syntax_for_file(file_path, file_content)
         
         if syntax:
             # Use syntax highlighting
             content_panel = Panel(
                 syntax,
                 title=f"📄 {file_path.name}",
+                subtitle=f"{algorithm} {checksum[:16]}…" if checksum else None,
                 border_style="green",
                 padding=(0, 1),
             )
@@ -165,6 +295,36 @@ class FilePreview(Widget):
         
         return content_panel
     
+    def _auto_hashed(self, path: Path) -> bool:
+        """Whether a file is small enough to hash just for being previewed."""
+        try:
+            return get_backend().stat(str(path)).st_size < self.AUTO_HASH_MAX_SIZE
+        except OSError:
+            return False
+    
+    @work(thread=True, exclusive=True, group="checksum")
+    def _hash_file(self, path: Path, algorithm: str) -> None:
+        """Hash the previewed file; small files are hashed in this thread."""
+        worker = get_current_worker()
+        digest = None
+        for _, digest in hash_files([path], algorithm, lambda: worker.is_cancelled):
+            pass
+        if not worker.is_cancelled:
+            self.app.call_from_thread(self._checksum_ready, path, algorithm, digest)
+    
+    def _checksum_ready(self, path: Path, algorithm: str, digest: Optional[str]) -> None:
+        """Redraw the preview once its file's checksum is known."""
+        if digest is None:
+            self._unhashable = (path, algorithm)
+        if self.current_file == path and self.checksum_algorithm == algorithm:
+            self.refresh_preview()
+    
+    def set_checksum_algorithm(self, algorithm: str) -> None:
+        """Show checksums of another algorithm in the header."""
+        if algorithm != self.checksum_algorithm:
+            self.checksum_algorithm = algorithm
+            self.refresh_preview()
+    
     def set_file(self, file_path: Optional[Path]) -> None:
         """Set the current file to preview."""
         self.current_file = file_path
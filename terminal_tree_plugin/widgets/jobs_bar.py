@@ -0,0 +1,117 @@
+"""Progress of background copy, move and delete jobs."""
+
+from typing import List
+
+from rich.text import Text
+from textual import work
+from textual.message import Message
+from textual.widgets import Static
+from textual.worker import get_current_worker
+
+from ..utils.file_ops import FileJob, run_job
+from .compare_view import _format_size
+
+
+def _format_rate(rate: float) -> str:
+    """Format a throughput in bytes per second."""
+    if rate >= 1024 * 1024:
+        return f"{rate / (1024 * 1024):.1f}MB/s"
+    return f"{rate / 1024:.0f}KB/s"
+
+
+class JobsBar(Static):
+    """A line per running job with its progress, throughput and time left."""
+
+    DEFAULT_CSS = """
+    JobsBar {
+        dock: bottom;
+        height: auto;
+        max-height: 6;
+        border-top: solid $primary;
+        background: $surface;
+        padding: 0 1;
+        display: none;
+    }
+
+    JobsBar.busy {
+        display: block;
+    }
+    """
+
+    class JobFinished(Message):
+        """Posted when a job has stopped, finished or cancelled."""
+
+        def __init__(self, job: FileJob) -> None:
+            self.job = job
+            super().__init__()
+
+    # Seconds between progress updates
+    REFRESH_INTERVAL = 0.25
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.jobs: List[FileJob] = []
+
+    def on_mount(self) -> None:
+        """Start refreshing the progress lines."""
+        self.set_interval(self.REFRESH_INTERVAL, self.refresh_jobs)
+
+    def start(self, job: FileJob) -> None:
+        """Run a job in the background."""
+        self.jobs.append(job)
+        self.add_class("busy")
+        self.refresh_jobs()
+        self._run(job)
+
+    def cancel_last(self) -> bool:
+        """Cancel the most recently started job; False if none is running."""
+        for job in reversed(self.jobs):
+            if not job.cancel_requested:
+                job.cancel()
+                self.refresh_jobs()
+                return True
+        return False
+
+    @work(thread=True, group="jobs")
+    def _run(self, job: FileJob) -> None:
+        """Run a job on a worker thread."""
+        worker = get_current_worker()
+        run_job(job, lambda: worker.is_cancelled)
+        self.app.call_from_thread(self._finish, job)
+
+    def _finish(self, job: FileJob) -> None:
+        """Drop a stopped job from the bar and report it."""
+        if job in self.jobs:
+            self.jobs.remove(job)
+        self.refresh_jobs()
+        self.post_message(self.JobFinished(job))
+
+    def refresh_jobs(self) -> None:
+        """Redraw the progress lines."""
+        if not self.jobs:
+            self.remove_class("busy")
+            return
+
+        text = Text()
+        for index, job in enumerate(self.jobs):
+            if index:
+                text.append("\n")
+            text.append(f"{job.describe()} ", style="bold")
+            if job.cancel_requested:
+                text.append("cancelling...", style="yellow")
+                continue
+            if not job.counted:
+                text.append(f"counting {job.total_files:,} files...", style="dim")
+                continue
+            text.append(f"{job.fraction():.0%}", style="cyan")
+            if job.total_bytes:
+                text.append(
+                    f"  {_format_size(job.done_bytes)}/{_format_size(job.total_bytes)}"
+                    f"  {_format_rate(job.throughput())}",
+                    style="dim",
+                )
+            eta = job.eta()
+            if eta is not None:
+                text.append(f"  {int(eta) // 60}:{int(eta) % 60:02d} left", style="dim")
+        text.append("  (Ctrl+X cancels)", style="dim")
+        self.update(text)
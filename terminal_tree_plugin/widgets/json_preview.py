@@ -0,0 +1,204 @@
+"""Collapsible preview of large JSON and JSON Lines files."""
+
+from typing import List, NamedTuple, Optional
+
+from rich.text import Text
+from textual import work
+from textual.timer import Timer
+from textual.widget import Widget
+from textual.widgets import Tree
+from textual.widgets.tree import TreeNode
+from textual.worker import get_current_worker
+
+from ..utils.json_index import (
+    ARRAY,
+    NUMBER,
+    OBJECT,
+    STRING,
+    JsonDocument,
+    JsonLines,
+    JsonValue,
+    Resume,
+)
+from .compare_view import _format_size
+
+# Colors of scalar values, by kind
+VALUE_STYLES = {STRING: "green", NUMBER: "yellow"}
+
+
+class _More(NamedTuple):
+    """Data of the node that loads the next page of a container (None for the records)."""
+
+    value: Optional[JsonValue]
+    resume: Resume
+
+
+class JsonPreview(Widget):
+    """A JsonDocument as a tree whose containers are read when expanded.
+
+    JSON Lines files list their records, a page at a time, below the root.
+    """
+
+    DEFAULT_CSS = """
+    JsonPreview {
+        width: 1fr;
+        height: 1fr;
+        border: solid $primary;
+        background: $surface;
+    }
+
+    JsonPreview Tree {
+        background: $surface;
+        color: $text;
+    }
+    """
+
+    # Children listed per page of an object or array, and records per page
+    PAGE_SIZE = 200
+    RECORDS_PER_PAGE = 50
+
+    # Characters of a value shown in its label
+    PREVIEW_CHARS = 80
+
+    # Seconds between updates of the line count
+    PROGRESS_INTERVAL = 0.25
+
+    def __init__(self, document: JsonDocument, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.document = document
+        self._tree: Optional[Tree] = None
+        self._progress_timer: Optional[Timer] = None
+
+    def compose(self):
+        """Compose the tree widget."""
+        document = self.document
+        if isinstance(document, JsonLines):
+            root_value = None
+            label = Text(f"📜 {document.path.name}", style="bold blue")
+        else:
+            root_value = document.root()
+            label = self._label(root_value, top=True)
+        self._tree = Tree(label, data=root_value, id="json_tree")
+        self._tree.show_root = True
+        self._tree.show_guides = True
+        yield self._tree
+
+    def on_mount(self) -> None:
+        """Open the top level, and count the records of a JSON Lines file."""
+        document = self.document
+        self.border_title = f"🧩 {document.path.name} ({_format_size(document.size)})"
+        root = self._tree.root
+        if isinstance(document, JsonLines):
+            self._show_progress()
+            self._progress_timer = self.set_interval(self.PROGRESS_INTERVAL, self._show_progress)
+            self._count()
+        elif not root.data.is_container:
+            root.allow_expand = False
+            return
+        root.expand()
+
+    def on_unmount(self) -> None:
+        """Release the file mapping."""
+        self.document.close()
+
+    @work(thread=True, exclusive=True, group="json-count")
+    def _count(self) -> None:
+        """Count the lines of a JSON Lines file on a worker."""
+        worker = get_current_worker()
+        if self.document.count_lines(lambda: worker.is_cancelled):
+            self.app.call_from_thread(self._show_progress)
+
+    def _show_progress(self) -> None:
+        """Show the number of lines counted so far."""
+        document = self.document
+        if document.counted:
+            self.border_subtitle = f"{document.lines:,} lines"
+            if self._progress_timer is not None:
+                self._progress_timer.stop()
+                self._progress_timer = None
+        else:
+            self.border_subtitle = f"{document.lines:,} lines · counting…"
+
+    def _label(self, value: JsonValue, top: bool = False) -> Text:
+        """Label a value: its key, position or line number, then a summary of it.
+
+        The top-level value has no position, and its size is the file's.
+        """
+        label = Text(no_wrap=True)
+        if value.key is not None:
+            label.append(value.key, style="bold cyan")
+            label.append(": ")
+        elif isinstance(self.document, JsonLines):
+            label.append(f"{value.index + 1:,} ", style="dim")
+        elif not top:
+            label.append(f"[{value.index:,}] ", style="dim")
+
+        if value.kind in (OBJECT, ARRAY):
+            label.append("{…}" if value.kind == OBJECT else "[…]", style="bold")
+            if not top:
+                label.append(f" {_format_size(value.end - value.start)}", style="dim")
+            label.append(f"  {self.document.preview(value, self.PREVIEW_CHARS)}", style="dim")
+        else:
+            style = VALUE_STYLES.get(value.kind, "magenta")
+            label.append(self.document.preview(value, self.PREVIEW_CHARS), style=style)
+        return label
+
+    def on_tree_node_expanded(self, event: Tree.NodeExpanded) -> None:
+        """Read a container's first page the first time it is expanded."""
+        event.stop()
+        node = event.node
+        if node.children or not node.allow_expand:
+            return
+        node.add_leaf(Text("⏳ reading…", style="dim"))
+        self._load(node, node.data, None)
+
+    def on_tree_node_selected(self, event: Tree.NodeSelected) -> None:
+        """Read the next page when its node is selected."""
+        event.stop()
+        node = event.node
+        if isinstance(node.data, _More) and node.parent is not None:
+            more = node.data
+            node.data = None
+            node.set_label(Text("⏳ reading…", style="dim"))
+            self._load(node.parent, more.value, more.resume)
+
+    @work(thread=True, group="json")
+    def _load(self, node: TreeNode, value: Optional[JsonValue], resume: Optional[Resume]) -> None:
+        """List a page of a container (or of the records) on a worker."""
+        worker = get_current_worker()
+        document = self.document
+        try:
+            if value is None:
+                children, resume = document.records(resume, self.RECORDS_PER_PAGE)
+            else:
+                children, resume = document.children(value, resume, self.PAGE_SIZE, lambda: worker.is_cancelled)
+            labels = [self._label(child) for child in children]
+            error = None
+        except (ValueError, OSError) as e:
+            children, labels, resume, error = [], [], None, str(e)
+        if not worker.is_cancelled:
+            self.app.call_from_thread(self._add_children, node, value, children, labels, resume, error)
+
+    def _add_children(
+        self,
+        node: TreeNode,
+        value: Optional[JsonValue],
+        children: List[JsonValue],
+        labels: List[Text],
+        resume: Optional[Resume],
+        error: Optional[str],
+    ) -> None:
+        """Replace the reading placeholder with a page of children and a node for the next."""
+        if node.children and node.children[-1].data is None:
+            node.children[-1].remove()
+        for child, label in zip(children, labels):
+            if child.is_container:
+                node.add(label, data=child)
+            else:
+                node.add_leaf(label, data=child)
+        if error is not None:
+            node.add_leaf(Text(f"❌ {error}", style="red"))
+        elif not node.children:
+            node.add_leaf(Text("(empty)", style="italic dim"))
+        elif resume is not None:
+            node.add_leaf(Text("… more (Enter)", style="italic dim"), data=_More(value, resume))
@@ -0,0 +1,70 @@
+"""Overlay showing live span latencies while profiling."""
+
+from rich.table import Table
+from rich.text import Text
+from textual.widgets import Static
+
+from ..utils.profiling import get_profiler
+
+
+class ProfileOverlay(Static):
+    """A panel listing p50/p99 latencies and filesystem call counts."""
+
+    DEFAULT_CSS = """
+    ProfileOverlay {
+        dock: bottom;
+        height: auto;
+        max-height: 16;
+        border: solid $warning;
+        background: $surface;
+        display: none;
+    }
+
+    ProfileOverlay.visible {
+        display: block;
+    }
+    """
+
+    REFRESH_INTERVAL = 1.0
+
+    def on_mount(self) -> None:
+        """Start refreshing the statistics."""
+        self.set_interval(self.REFRESH_INTERVAL, self.refresh_stats)
+        self.refresh_stats()
+
+    def toggle(self) -> None:
+        """Show or hide the overlay."""
+        self.toggle_class("visible")
+        self.refresh_stats()
+
+    def refresh_stats(self) -> None:
+        """Redraw the statistics table from the active profiler."""
+        if not self.has_class("visible"):
+            return
+
+        profiler = get_profiler()
+        if profiler is None:
+            self.update(Text("Profiling is disabled (start with --profile)", style="dim"))
+            return
+
+        table = Table(title="⏱ Profile", expand=True, box=None)
+        table.add_column("Span", style="bold")
+        table.add_column("Count", justify="right")
+        table.add_column("p50", justify="right")
+        table.add_column("p99", justify="right", style="yellow")
+        table.add_column("Total", justify="right", style="dim")
+
+        stats = profiler.stats()
+        for name in sorted(stats, key=lambda n: stats[n]["total_ms"], reverse=True):
+            s = stats[name]
+            table.add_row(
+                name,
+                str(s["count"]),
+                f"{s['p50_ms']:.2f}ms",
+                f"{s['p99_ms']:.2f}ms",
+                f"{s['total_ms']:.0f}ms",
+            )
+
+        calls = ", ".join(f"{k}={v}" for k, v in sorted(profiler.fs_calls.items()))
+        table.caption = f"fs calls: {calls or 'none'}"
+        self.update(table)
@@ -0,0 +1,171 @@
+"""Virtual table preview of large CSV and TSV files."""
+
+from bisect import bisect_left, bisect_right
+from typing import List, Optional, Tuple
+
+from rich.segment import Segment
+from rich.style import Style
+from rich.text import Text
+from textual import work
+from textual.geometry import Size
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+from textual.timer import Timer
+from textual.worker import get_current_worker
+
+from ..utils.tabular import TableFile, TableStats, format_number
+
+# Names of the usual delimiters, for the title
+DELIMITER_NAMES = {",": "comma", "\t": "tab", ";": "semicolon", "|": "pipe", " ": "space"}
+
+
+class TablePreview(ScrollView, can_focus=True):
+    """Rows and columns of a TableFile; only the cells in view are read and drawn.
+
+    The header, and the statistics once known, stay pinned at the top and
+    the row numbers on the left. ←/→ move by whole columns.
+    """
+
+    DEFAULT_CSS = """
+    TablePreview {
+        width: 1fr;
+        height: 1fr;
+        border: solid $primary;
+        background: $surface;
+    }
+    """
+
+    # Widest a column is drawn; longer values are cut with an ellipsis
+    MAX_COLUMN_WIDTH = 30
+    MIN_COLUMN_WIDTH = 3
+
+    # Seconds between progress updates of the index and statistics passes
+    PROGRESS_INTERVAL = 0.25
+
+    def __init__(self, table: TableFile, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.table = table
+        self.stats = TableStats()
+        # Widths from the header and the sample, and where each column starts
+        self._widths = [
+            max([len(name)] + [len(row[i]) for row in table.sample if i < len(row)])
+            for i, name in enumerate(table.header)
+        ]
+        self._starts: List[int] = []
+        self._body_width = 0
+        self._layout()
+        self._gutter = 0
+        self._progress_timer: Optional[Timer] = None
+
+    def _layout(self) -> None:
+        """Clamp the column widths and place the columns."""
+        self._widths = [min(max(width, self.MIN_COLUMN_WIDTH), self.MAX_COLUMN_WIDTH) for width in self._widths]
+        self._starts = []
+        x = 0
+        for width in self._widths:
+            self._starts.append(x)
+            x += width + 1
+        self._body_width = x
+
+    def on_mount(self) -> None:
+        """Start indexing the file."""
+        table = self.table
+        delimiter = DELIMITER_NAMES.get(table.delimiter, table.delimiter)
+        self.border_title = f"📊 {table.path.name} ({delimiter}-separated, {table.encoding})"
+        self._show_progress()
+        self._progress_timer = self.set_interval(self.PROGRESS_INTERVAL, self._show_progress)
+        self._scan()
+
+    @work(thread=True, exclusive=True, group="table")
+    def _scan(self) -> None:
+        """Index the rows, then compute column statistics, on a worker."""
+        worker = get_current_worker()
+        if self.table.build_index(lambda: worker.is_cancelled):
+            self.table.column_stats(self.stats, lambda: worker.is_cancelled)
+        if not worker.is_cancelled:
+            self.app.call_from_thread(self._show_progress)
+
+    def _show_progress(self) -> None:
+        """Grow the scrollable area with the rows found and show the passes' progress."""
+        table, stats = self.table, self.stats
+        self._gutter = len(f"{table.rows:,}")
+        self.virtual_size = Size(self._gutter + 1 + self._body_width, table.rows + len(self._pinned()))
+
+        subtitle = f"{table.rows:,} rows × {table.columns} columns"
+        if not table.indexed:
+            subtitle += " · indexing…"
+        elif not stats.done:
+            percent = 100 * stats.bytes_read // max(table.size, 1)
+            subtitle += f" · statistics {percent}%"
+        elif self._progress_timer is not None:
+            self._progress_timer.stop()
+            self._progress_timer = None
+            # Numeric columns may hold wider values than the sample did
+            for _, cells, _ in self._pinned()[1:]:
+                self._widths = [max(width, len(cell)) for width, cell in zip(self._widths, cells)]
+            self._layout()
+            self.virtual_size = Size(self._gutter + 1 + self._body_width, self.virtual_size.height)
+        self.border_subtitle = subtitle
+        self.refresh()
+
+    def _pinned(self) -> List[Tuple[str, List[str], str]]:
+        """Return the lines kept at the top: the header, then min/max/nulls of numeric columns."""
+        lines = [("", self.table.header, "bold")]
+        columns = self.stats.columns if self.stats.done else []
+        if any(column.numeric for column in columns):
+            for label, value in (
+                ("min", lambda column: format_number(column.minimum)),
+                ("max", lambda column: format_number(column.maximum)),
+                ("null", lambda column: f"{column.nulls:,}"),
+            ):
+                cells = [value(column) if column.numeric else "" for column in columns]
+                lines.append((label, cells, "dim cyan"))
+        return lines
+
+    def render_line(self, y: int) -> Strip:
+        """Draw one line: pinned lines first, then the rows in view."""
+        scroll_x, scroll_y = self.scroll_offset
+        width = self.size.width
+        pinned = self._pinned()
+        if y < len(pinned):
+            label, cells, style = pinned[y]
+        else:
+            index = scroll_y + y - len(pinned)
+            if index >= self.table.rows:
+                return Strip.blank(width, self.rich_style)
+            label, cells, style = f"{index + 1:,}", self.table.row(index), ""
+
+        gutter = Strip([Segment(label.rjust(self._gutter) + "│", Style(dim=True))])
+        available = max(width - self._gutter - 1, 0)
+        body = self._render_cells(cells, style, scroll_x, available)
+        return Strip.join([gutter, body]).apply_style(self.rich_style).extend_cell_length(width, self.rich_style)
+
+    def _render_cells(self, cells: List[str], style: str, scroll_x: int, available: int) -> Strip:
+        """Draw the columns that overlap [scroll_x, scroll_x + available)."""
+        if not self._starts or not available:
+            return Strip([])
+        first = max(bisect_right(self._starts, scroll_x) - 1, 0)
+        last = bisect_left(self._starts, scroll_x + available)
+
+        text = Text(no_wrap=True, end="")
+        for i in range(first, last):
+            value = cells[i] if i < len(cells) else ""
+            cell = Text(" ".join(value.split()) if "\n" in value or "\t" in value else value, style=style)
+            cell.truncate(self._widths[i], overflow="ellipsis", pad=True)
+            text.append_text(cell)
+            text.append("│", style="dim")
+
+        offset = scroll_x - self._starts[first]
+        return Strip(text.render(self.app.console)).crop(offset, offset + available)
+
+    def action_scroll_right(self) -> None:
+        """Scroll to the next column."""
+        i = bisect_right(self._starts, self.scroll_x)
+        if i < len(self._starts):
+            self.scroll_to(x=self._starts[i], animate=False)
+
+    def action_scroll_left(self) -> None:
+        """Scroll to the previous column."""
+        i = bisect_left(self._starts, self.scroll_x) - 1
+        if i >= 0:
+            self.scroll_to(x=self._starts[i], animate=False)
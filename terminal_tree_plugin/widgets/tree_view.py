@@ -1,17 +1,133 @@
 """Tree view widget for filesystem navigation."""
 
+import os
+import stat
+import time
+from bisect import bisect_left
 from pathlib import Path
-from typing import Dict, List, Optional, Set
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 
 from rich.text import Text
-from textual import events
+from textual import events, work
 from textual.message import Message
 from textual.reactive import reactive
 from textual.widget import Widget
 from textual.widgets import Tree
+from textual.widgets.tree import NodeID, TreeNode, UnknownNodeID
+from textual.worker import get_current_worker
 
-from ..utils.file_utils import get_file_info
-from ..utils.path_utils import is_hidden
+from ..utils import file_types
+from ..utils.archive import (
+    find_archive_member,
+    is_archive_name,
+    read_archive_listing,
+    split_archive_path,
+)
+from ..utils.file_types import FileType, classify_many
+from ..utils.fs_backend import get_backend
+from ..utils.fs_monitor import FilesystemTimeout, get_monitor
+from ..utils.git_status import (
+    GitStatusMap,
+    find_repo_root,
+    git_index_path,
+    load_git_status,
+)
+from ..utils.ignore import IgnoreFilter
+from ..utils.listing import (
+    DirectoryListing,
+    EntryInfo,
+    ProbeFilter,
+    get_listing_cache,
+    read_listing,
+)
+from ..utils.node_store import ARCHIVE, DIRECTORY, FILE, NodeStore
+from ..utils.profiling import profiled, span
+from ..utils.sorting import next_sort_mode
+
+if TYPE_CHECKING:
+    # Imported when checksums are first needed: hashing pulls in multiprocessing
+    from ..utils.hashing import DirectoryHashStats
+
+
+# Icon and style per content category; text files keep the suffix icons
+CATEGORY_ICONS = {
+    file_types.EXECUTABLE: ("⚙️ ", "bold red"),
+    file_types.IMAGE: ("🖼️ ", "magenta"),
+    file_types.AUDIO: ("🎵 ", "magenta"),
+    file_types.VIDEO: ("🎬 ", "magenta"),
+    file_types.ARCHIVE: ("📦 ", "yellow"),
+    file_types.DOCUMENT: ("📕 ", "red"),
+    file_types.DATABASE: ("🗄️ ", "cyan"),
+    file_types.BINARY: ("📄 ", "dim"),
+    file_types.SPECIAL: ("🔌 ", "dim"),
+}
+
+# Styles for git status markers
+GIT_STATUS_STYLES = {
+    "M": "yellow",
+    "A": "green",
+    "D": "red",
+    "R": "cyan",
+    "?": "green",
+    "!": "dim",
+    "U": "bold red",
+}
+
+
+class _DirectoryPage:
+    """The visible entries of a loaded directory node and the shown window.
+    
+    Only ``entries[start:end]`` have nodes; the rest are summarised by
+    "earlier" and "more" nodes.
+    """
+    
+    def __init__(self, listing: DirectoryListing, entries: Tuple[EntryInfo, ...]) -> None:
+        self.listing = listing
+        self.entries = entries
+        self.start = 0
+        self.end = 0
+        self.earlier_node: Optional[TreeNode] = None
+        self.more_node: Optional[TreeNode] = None
+        self._positions: Optional[Dict[str, int]] = None
+    
+    def position(self, name: str) -> Optional[int]:
+        """Return the index of an entry among the visible entries."""
+        if self._positions is None:
+            self._positions = {entry.name: i for i, entry in enumerate(self.entries)}
+        return self._positions.get(name)
+    
+    def find(self, prefix: str) -> Optional[int]:
+        """Return the index of the first visible entry matching a typed prefix.
+        
+        Prefix matches come from a bisect over the listing's sorted name
+        index; if there are none, the first entry containing the text is used.
+        """
+        names, ordered = self.listing.name_index()
+        lo = bisect_left(names, prefix)
+        hi = bisect_left(names, prefix[:-1] + chr(ord(prefix[-1]) + 1), lo)
+        
+        best: Optional[int] = None
+        for entry in ordered[lo:hi]:
+            index = self.position(entry.name)
+            if index is not None and (best is None or index < best):
+                best = index
+        if best is not None:
+            return best
+        
+        for index, entry in enumerate(self.entries):
+            if prefix in entry.name.lower():
+                return index
+        return None
+
+
+class _ScanStream:
+    """Progress of a directory scan being streamed into a node."""
+    
+    def __init__(self, progress_node: TreeNode) -> None:
+        self.progress_node = progress_node
+        self.count = 0
+        self.shown = 0
+        self.done = False
 
 
 class TreeView(Widget):
@@ -39,31 +155,121 @@ class TreeView(Widget):
     class DirectoryChanged(Message):
         """Posted when the current directory changes."""
         
-        def __init__(self, path: Path) -> None:
+        def __init__(self, path: Path, tree_view: Optional["TreeView"] = None) -> None:
             self.path = path
+            self.tree_view = tree_view
             super().__init__()
+        
+        @property
+        def control(self) -> Optional["TreeView"]:
+            """The tree view that changed directory."""
+            return self.tree_view
     
     class FileSelected(Message):
         """Posted when a file is selected."""
         
-        def __init__(self, path: Path) -> None:
+        def __init__(self, path: Path, tree_view: Optional["TreeView"] = None) -> None:
             self.path = path
+            self.tree_view = tree_view
             super().__init__()
+        
+        @property
+        def control(self) -> Optional["TreeView"]:
+            """The tree view the file was selected in."""
+            return self.tree_view
+    
+    # Show this many entries per directory page
+    MAX_ENTRIES = 50
+    
+    # Seconds after the last keystroke before a type-ahead prefix resets
+    TYPEAHEAD_TIMEOUT = 1.0
+    
+    # Listings larger than this are sorted on a worker thread
+    SORT_IN_WORKER_THRESHOLD = 20_000
+    
+    # Seconds of node inserts per streamed batch, so input stays responsive
+    FRAME_BUDGET = 0.008
+    
+    # Seconds between checks of .git/index for changes
+    GIT_POLL_INTERVAL = 2.0
+    
+    # Collapsed subtrees idle this long are released (seconds)
+    EVICT_AFTER = 300.0
+    
+    # Collapsed subtrees are also released while the tree has more nodes
+    NODE_BUDGET = 20_000
+    
+    # Seconds between eviction passes
+    EVICT_CHECK_INTERVAL = 10.0
+    
+    # The node store is compacted when the tree is rebuilt past this many entries
+    STORE_COMPACT_AT = 200_000
+    
+    # Hex digits of a checksum shown in labels
+    CHECKSUM_DIGITS = 12
+    
+    # Seconds between checksum label updates and directory hash progress
+    CHECKSUM_INTERVAL = 0.25
     
     # Reactive attributes
     current_path: reactive[Path] = reactive(Path.cwd())
     show_hidden: reactive[bool] = reactive(False)
+    sort_mode: reactive[str] = reactive("name")
+    sort_reverse: reactive[bool] = reactive(False)
+    respect_ignore: reactive[bool] = reactive(False)
+    # Algorithm of the checksum column, or None when it is hidden
+    checksum_algorithm: reactive[Optional[str]] = reactive(None)
     
     def __init__(
         self,
         start_path: Optional[Path] = None,
         show_hidden: bool = False,
+        sort_mode: str = "name",
+        sort_reverse: bool = False,
+        respect_ignore: bool = False,
+        excludes: Sequence[str] = (),
+        git_status: bool = True,
+        evict_after: Optional[float] = None,
+        node_budget: Optional[int] = None,
         **kwargs,
     ) -> None:
-        self._expanded_dirs: Set[Path] = set()
+        # Nodes hold store IDs; paths are built from them when needed
+        self._store = NodeStore()
+        self._expanded_dirs: Set[int] = set()
+        self._evict_after = self.EVICT_AFTER if evict_after is None else evict_after
+        self._node_budget = self.NODE_BUDGET if node_budget is None else node_budget
+        # Collapse time of each collapsed, still-loaded directory node
+        self._collapsed_at: Dict[NodeID, float] = {}
+        # Nodes whose children were released and must be rebuilt on expand
+        self._evicted: Set[NodeID] = set()
+        # Visible entries of each loaded directory node
+        self._pages: Dict[NodeID, _DirectoryPage] = {}
+        # Scans currently streaming into a node
+        self._streams: Dict[NodeID, _ScanStream] = {}
+        self._typeahead = ""
+        self._typeahead_at = 0.0
+        # Whether the prefix was started with "/" (kept until Enter or Escape)
+        self._searching = False
         self._tree: Optional[Tree] = None
+        # Shared with every other view, so each directory is scanned once
+        self._listings = get_listing_cache()
+        # Excludes are relative to the directory the tree was opened at
+        self._ignore = IgnoreFilter(excludes, start_path or Path.cwd())
+        self._git_enabled = git_status
+        self._git_map: Optional[GitStatusMap] = None
+        self._git_index_mtime: Optional[int] = None
+        # Checksums of shown files, with the size and mtime they were taken at
+        self._checksums: Dict[Tuple[Path, str], Tuple[Optional[int], Optional[float], str]] = {}
+        # Progress of the directory being hashed for copying, and its name
+        self._dir_hash: Optional["DirectoryHashStats"] = None
+        self._dir_hash_name = ""
+        # Entries marked for copy, move or delete
+        self._marked: Set[int] = set()
         super().__init__(**kwargs)
         self.show_hidden = show_hidden
+        self.sort_mode = sort_mode
+        self.sort_reverse = sort_reverse
+        self.respect_ignore = respect_ignore
         self.current_path = start_path or Path.cwd()
     
     def compose(self):
@@ -78,18 +284,55 @@ class TreeView(Widget):
         if self._tree:
             self._populate_tree()
             self._tree.focus()
+        
+        if self._git_enabled:
+            self._load_git_status(self.current_path, force=True)
+            self.set_interval(self.GIT_POLL_INTERVAL, self._poll_git_status)
+        
+        self.set_interval(self.EVICT_CHECK_INTERVAL, self._evict_collapsed)
     
     def watch_current_path(self, new_path: Path) -> None:
         """React to current path changes."""
+        # Marks are only kept while their entries are in view
+        self._marked.clear()
+        self.border_subtitle = None
         if self._tree:
             self._populate_tree()
-            self.post_message(self.DirectoryChanged(new_path))
+            self.post_message(self.DirectoryChanged(new_path, self))
+            
+            # A new status run is only needed when leaving the repository
+            git_root = self._git_map.root if self._git_map else None
+            if self._git_enabled and (git_root is None or git_root not in (new_path, *new_path.parents)):
+                self._load_git_status(new_path, force=True)
     
     def watch_show_hidden(self, show_hidden: bool) -> None:
         """React to show_hidden changes."""
         if self._tree:
-            self._populate_tree()
+            self._refilter_pages()
+    
+    def watch_sort_mode(self, sort_mode: str) -> None:
+        """React to sort mode changes."""
+        self._reorder()
     
+    def watch_sort_reverse(self, sort_reverse: bool) -> None:
+        """React to sort direction changes."""
+        self._reorder()
+    
+    def watch_respect_ignore(self, respect_ignore: bool) -> None:
+        """React to the ignore filter being toggled."""
+        self._reorder()
+    
+    def watch_checksum_algorithm(self, algorithm: Optional[str]) -> None:
+        """Show, switch or hide the checksum column."""
+        self.workers.cancel_group(self, "checksum")
+        if not self._tree:
+            return
+        self._relabel_tree()
+        if algorithm is not None:
+            for node, page in self._loaded_pages():
+                self._hash_shown(node, page, page.start, page.end)
+    
+    @profiled("tree.populate")
     def _populate_tree(self) -> None:
         """Populate the tree with filesystem data."""
         if not self._tree:
@@ -97,12 +340,22 @@ class TreeView(Widget):
         
         try:
             # Clear existing tree
+            self.workers.cancel_group(self, "classify")
+            self.workers.cancel_group(self, "checksum")
+            self.workers.cancel_group(self, "scan")
+            self.workers.cancel_group(self, "sort")
+            self._streams.clear()
             self._tree.clear()
+            self._collapsed_at.clear()
+            self._evicted.clear()
+            self._pages.clear()
+            if len(self._store) > self.STORE_COMPACT_AT:
+                self._compact_store()
             
             # Set root label
             root_label = self._get_path_label(self.current_path)
             self._tree.root.set_label(root_label)
-            self._tree.root.data = self.current_path
+            self._tree.root.data = self._store.intern_path(self.current_path)
             
             # Add children to root
             self._add_children(self._tree.root, self.current_path)
@@ -113,34 +366,107 @@ class TreeView(Widget):
         except Exception as e:
             # If there's an error, at least show the root
             self._tree.root.set_label(f"❌ Error: {e}")
-            self._tree.root.data = self.current_path
+            self._tree.root.data = self._store.intern_path(self.current_path)
+    
+    def _compact_store(self) -> None:
+        """Forget the store entries of nodes no longer in the tree.
+        
+        Only expanded directories and marks outlive the tree's nodes, so
+        their IDs are the ones carried over.
+        """
+        moved = self._store.compact(self._expanded_dirs | self._marked)
+        self._expanded_dirs = {moved[node_id] for node_id in self._expanded_dirs}
+        self._marked = {moved[node_id] for node_id in self._marked}
     
     def _get_path_label(self, path: Path) -> Text:
-        """Get a formatted label for a path."""
+        """Get a formatted label for a path that is not a listed entry.
+        
+        The path is stat'ed through the filesystem monitor.
+        """
+        stalled = False
+        size: Optional[int] = None
+        try:
+            st = get_monitor().call(None, get_backend().stat, str(path))
+            is_dir = stat.S_ISDIR(st.st_mode)
+            size = st.st_size
+        except FilesystemTimeout:
+            is_dir = path == self.current_path
+            stalled = True
+        except OSError:
+            # Directories inside archives only exist in the archive's index
+            member = find_archive_member(path)
+            is_dir = member is not None and member.is_dir
+        
+        # Handle root directory case
+        text = self._format_label(path.name or str(path), is_dir, size, path=path)
+        if stalled:
+            text.append(" ⏳", style="yellow")
+        return text
+    
+    def _get_entry_label(
+        self,
+        item_id: int,
+        entry: EntryInfo,
+        file_type: Optional[FileType] = None,
+        marked: bool = False,
+        path: Optional[Path] = None,
+    ) -> Text:
+        """Get a formatted label for a listed entry from its cached metadata.
+        
+        The entry's full path is only built (unless given) for the checksum
+        column and git markers.
+        """
+        if path is None and (self.checksum_algorithm is not None or self._git_map is not None):
+            path = self._store.path(item_id)
+        return self._format_label(entry.name, entry.is_dir, entry.size, file_type, marked, path, entry)
+    
+    @profiled("tree.label")
+    def _format_label(
+        self,
+        name: str,
+        is_dir: bool,
+        size: Optional[int],
+        file_type: Optional[FileType] = None,
+        marked: bool = False,
+        path: Optional[Path] = None,
+        entry: Optional[EntryInfo] = None,
+    ) -> Text:
+        """Build a node label.
+        
+        A classified content type picks the icon and colour for non-text
+        files; the checksum and git marker need the entry's path.
+        """
         text = Text()
         
-        if path.is_dir():
+        if marked:
+            text.append("● ", style="bold magenta")
+        
+        if is_dir:
             # Directory icon and name
             text.append("📁 ", style="bold blue")
-            # Handle root directory case
-            display_name = path.name if path.name else str(path)
-            text.append(display_name, style="bold blue")
+            text.append(name, style="bold blue")
         else:
             # File icon and name
-            if path.suffix.lower() in {".py", ".js", ".html", ".css", ".json"}:
-                text.append("📄 ", style="green")
-            elif path.suffix.lower() in {".txt", ".md", ".rst"}:
-                text.append("📝 ", style="yellow")
-            elif path.suffix.lower() in {".jpg", ".png", ".gif", ".svg"}:
-                text.append("🖼️ ", style="magenta")
+            category_icon = CATEGORY_ICONS.get(file_type.category) if file_type else None
+            if category_icon:
+                icon, style = category_icon
+                text.append(icon, style=style)
+                text.append(name, style=style)
             else:
-                text.append("📄 ", style="white")
-            
-            text.append(path.name, style="white")
+                suffix = os.path.splitext(name)[1].lower()
+                if suffix in {".py", ".js", ".html", ".css", ".json"}:
+                    text.append("📄 ", style="green")
+                elif suffix in {".txt", ".md", ".rst"}:
+                    text.append("📝 ", style="yellow")
+                elif suffix in {".jpg", ".png", ".gif", ".svg"}:
+                    text.append("🖼️ ", style="magenta")
+                else:
+                    text.append("📄 ", style="white")
+                
+                text.append(name, style="white")
             
-            # Add file size (simplified to avoid errors)
-            try:
-                size = path.stat().st_size
+            # Add file size (not available on degraded mounts)
+            if size is not None:
                 if size < 1024:
                     size_str = f"{size}B"
                 elif size < 1024 * 1024:
@@ -148,49 +474,87 @@ class TreeView(Widget):
                 else:
                     size_str = f"{size // (1024 * 1024)}MB"
                 text.append(f" ({size_str})", style="dim")
-            except Exception:
-                pass
+            
+            if self.checksum_algorithm is not None and entry is not None and path is not None:
+                checksum = self._checksums.get((path, self.checksum_algorithm))
+                if checksum is not None and checksum[:2] == (entry.size, entry.mtime):
+                    text.append(f" #{checksum[2][:self.CHECKSUM_DIGITS]}", style="cyan")
+        
+        if self._git_map is not None and path is not None:
+            self._append_git_marker(text, path, is_dir)
         
         return text
     
-    def _add_children(self, node, path: Path) -> None:
-        """Add child nodes to a tree node."""
-        if not path.is_dir():
+    def _append_git_marker(self, text: Text, path: Path, is_dir: bool) -> None:
+        """Append the git status marker (or a dirty dot for directories)."""
+        status = self._git_map.lookup(path)
+        if status:
+            text.append(f" {status}", style=GIT_STATUS_STYLES.get(status, "dim"))
+        elif is_dir and self._git_map.is_dirty(path):
+            text.append(" ●", style="yellow")
+    
+    def _cached_listing(self, path: Path, dev: int, degraded: bool) -> Optional[DirectoryListing]:
+        """Return the cached listing of a directory if it is still current."""
+        listing = self._listings.get(path)
+        
+        # Degraded mounts trust the cache rather than pay for another stat
+        if listing is not None and (
+            degraded or get_monitor().call(dev, get_backend().stat, str(path)).st_mtime_ns == listing.mtime_ns
+        ):
+            return listing
+        return None
+    
+    @profiled("tree.add_children")
+    def _add_children(self, node, path: Path, restore: bool = False) -> None:
+        """Add child nodes to a tree node.
+        
+        Cached listings are shown at once; otherwise the directory is
+        scanned on a worker and streamed in (see _stream_listing).
+        Archives and directories inside them are listed from the archive's
+        index instead.
+        """
+        location = split_archive_path(path)
+        if location is not None:
+            self._add_archive_children(node, path, location[0], restore)
+            return
+        
+        monitor = get_monitor()
+        dev = monitor.device_of(path)
+        if dev is None:
+            node.add("⏳ Not responding", data=None)
             return
         
+        # Slow mounts get a d_type-only listing: no sizes, no child probes
+        degraded = monitor.is_degraded(dev)
+        
         try:
-            # Get directory contents
-            items = list(path.iterdir())
-            
-            # Filter hidden files if needed
-            if not self.show_hidden:
-                items = [item for item in items if not is_hidden(item)]
+            with span("tree.list_dir"):
+                # Ignore files are read on the worker too
+                matcher = (
+                    monitor.call(dev, self._ignore.matcher_for, path)
+                    if self.respect_ignore
+                    else None
+                )
+                listing = self._cached_listing(path, dev, degraded)
             
-            # Limit items to prevent overwhelming the display
-            items = items[:50]  # Show max 50 items
+            if degraded:
+                node.set_label(self._get_path_label(path).append(" 🐢 slow mount", style="dim"))
             
-            # Sort: directories first, then files, both alphabetically
-            items.sort(key=lambda x: (not x.is_dir(), x.name.lower()))
+            if listing is not None:
+                self._show_listing(node, listing, restore)
+                return
             
-            # Add items to tree
-            for item in items:
-                try:
-                    label = self._get_path_label(item)
-                    child_node = node.add(label, data=item)
-                    
-                    # If it's a directory, add a placeholder to make it expandable
-                    if item.is_dir():
-                        try:
-                            # Quick check if directory has contents (avoid full iteration)
-                            has_contents = any(x for x, _ in zip(item.iterdir(), range(1)))
-                            if has_contents:
-                                child_node.add("📂 Loading...", data=None)
-                        except (PermissionError, OSError):
-                            child_node.add("🔒 Protected", data=None)
-                except Exception:
-                    # Skip problematic items
-                    continue
+            # Entries the matcher ignores are listed but never opened
+            stream = self._streams[node.id] = _ScanStream(
+                node.add(Text("⏳ Scanning...", style="dim"), data=None)
+            )
+            skip_probe = matcher.is_ignored if matcher else None
+            self._stream_listing(node, stream, path, dev, not degraded, skip_probe, restore)
+            self.set_timer(monitor.timeout, lambda: self._check_stream(stream, dev))
         
+        except FilesystemTimeout:
+            # Keep a placeholder so expanding again retries the listing
+            node.add("⏳ Not responding", data=None)
         except (PermissionError, OSError):
             # Add error node
             node.add("❌ Permission denied", data=None)
@@ -198,16 +562,660 @@ class TreeView(Widget):
             # Add generic error node
             node.add(f"❌ Error: {str(e)[:50]}", data=None)
     
+    def _add_archive_children(self, node: TreeNode, path: Path, archive: Path, restore: bool) -> None:
+        """Add child nodes for an archive or a directory inside one."""
+        monitor = get_monitor()
+        try:
+            # The archive's directory was listed, so its device is known
+            dev = monitor.device_of(archive.parent)
+            mtime_ns = monitor.call(dev, get_backend().stat, str(archive)).st_mtime_ns
+        except FilesystemTimeout:
+            node.add("⏳ Not responding", data=None)
+            return
+        except OSError:
+            node.add("❌ Error", data=None)
+            return
+        
+        listing = self._listings.get(path)
+        if listing is not None and listing.mtime_ns == mtime_ns:
+            self._show_listing(node, listing, restore)
+            return
+        
+        node.add(Text("⏳ Reading archive...", style="dim"), data=None)
+        self._load_archive_listing(node, path, restore)
+    
+    @work(thread=True, group="scan")
+    def _load_archive_listing(self, node: TreeNode, path: Path, restore: bool) -> None:
+        """Read an archive's index on a worker and list one of its directories."""
+        worker = get_current_worker()
+        try:
+            with span("tree.archive_index"):
+                listing = self._listings.load(path, read_archive_listing, path)
+        except OSError as e:
+            listing = None
+            error = str(e)
+        
+        if worker.is_cancelled:
+            return
+        if listing is None:
+            self.app.call_from_thread(self._finish_archive, node, None, f"❌ {error[:50]}", restore)
+        else:
+            self.app.call_from_thread(self._finish_archive, node, listing, None, restore)
+    
+    def _finish_archive(
+        self,
+        node: TreeNode,
+        listing: Optional[DirectoryListing],
+        error: Optional[str],
+        restore: bool,
+    ) -> None:
+        """Replace the reading placeholder with an archive listing (or an error)."""
+        if not self._is_attached(node):
+            # The tree was rebuilt (e.g. navigation) while reading
+            return
+        
+        node.remove_children()
+        if listing is None:
+            node.add(error, data=None)
+        else:
+            self._show_listing(node, listing, restore)
+    
+    @work(thread=True, group="scan")
+    def _stream_listing(
+        self,
+        node: TreeNode,
+        stream: "_ScanStream",
+        path: Path,
+        dev: int,
+        detailed: bool,
+        skip_probe: Optional[ProbeFilter],
+        restore: bool,
+    ) -> None:
+        """Scan a directory on a worker, handing batches of entries to the UI.
+        
+        call_from_thread waits for each batch to be handled, so the scan
+        never runs more than one batch ahead of the display.
+        """
+        worker = get_current_worker()
+        monitor = get_monitor()
+        start = time.perf_counter()
+        
+        def on_batch(batch: List[EntryInfo]) -> None:
+            if not stream.count:
+                # Time to the first batch is this mount's latency sample
+                monitor.record(dev, time.perf_counter() - start)
+            if not worker.is_cancelled:
+                self.app.call_from_thread(self._receive_batch, node, stream, batch)
+        
+        try:
+            listing = self._listings.load(path, read_listing, path, detailed, skip_probe, on_batch)
+        except OSError as e:
+            if not worker.is_cancelled:
+                self.app.call_from_thread(self._finish_stream, node, stream, None, e, restore)
+            return
+        
+        if not worker.is_cancelled:
+            self.app.call_from_thread(self._finish_stream, node, stream, listing, None, restore)
+    
+    def _receive_batch(self, node: TreeNode, stream: "_ScanStream", batch: List[EntryInfo]) -> None:
+        """Show the first screenful of a streamed scan and update its progress.
+        
+        At most FRAME_BUDGET seconds of node inserts are done per batch.
+        """
+        if self._streams.get(node.id) is not stream:
+            return
+        
+        stream.count += len(batch)
+        
+        deadline = time.perf_counter() + self.FRAME_BUDGET
+        screenful = max(self.size.height, 1)
+        path = self._store.path(node.data)
+        for entry in batch:
+            if stream.shown >= screenful or time.perf_counter() > deadline:
+                break
+            if entry.hidden and not self.show_hidden:
+                continue
+            self._add_entry_node(node, path, entry, restore=False)
+            stream.shown += 1
+        
+        # Keep the progress node last
+        stream.progress_node.remove()
+        stream.progress_node = node.add_leaf(
+            Text(f"⏳ Scanning... {stream.count:,} entries", style="dim"), data=None
+        )
+    
+    def _check_stream(self, stream: "_ScanStream", dev: int) -> None:
+        """Flag a scan that has produced nothing within the monitor's timeout."""
+        if stream.count or stream.done:
+            return
+        get_monitor().record_timeout(dev)
+        # The label matches the retry placeholder, so expanding again rescans
+        stream.progress_node.set_label("⏳ Not responding")
+    
+    def _finish_stream(
+        self,
+        node: TreeNode,
+        stream: "_ScanStream",
+        listing: Optional[DirectoryListing],
+        error: Optional[OSError],
+        restore: bool,
+    ) -> None:
+        """Replace the streamed preview with the sorted listing (or an error)."""
+        stream.done = True
+        if self._streams.get(node.id) is not stream:
+            return
+        del self._streams[node.id]
+        
+        cursor = self._tree.cursor_node
+        cursor_id = cursor.data if cursor is not None and cursor.parent is node else None
+        
+        node.remove_children()
+        if listing is None:
+            node.add("❌ Permission denied" if isinstance(error, PermissionError) else "❌ Error", data=None)
+            return
+        
+        self._show_listing(node, listing, restore)
+        if cursor_id is not None:
+            self.call_after_refresh(self._move_cursor_to, cursor_id)
+    
+    def _show_listing(self, node: TreeNode, listing: DirectoryListing, restore: bool = False) -> None:
+        """Add nodes for a listing, sorting large ones off the UI thread."""
+        if (
+            len(listing) > self.SORT_IN_WORKER_THRESHOLD
+            and not listing.has_order(self.sort_mode, self.sort_reverse)
+        ):
+            node.add("⏳ Sorting...", data=None)
+            self._sort_in_background(node, listing, restore)
+            return
+        
+        self._add_entry_nodes(node, listing, restore)
+    
+    @work(thread=True, group="sort")
+    def _sort_in_background(self, node: TreeNode, listing: DirectoryListing, restore: bool) -> None:
+        """Sort a large listing on a worker, then add its nodes."""
+        worker = get_current_worker()
+        listing.sorted_entries(self.sort_mode, self.sort_reverse)
+        if not worker.is_cancelled:
+            self.app.call_from_thread(self._finish_sort, node, listing, restore)
+    
+    def _finish_sort(self, node: TreeNode, listing: DirectoryListing, restore: bool) -> None:
+        """Replace the sorting placeholder once a background sort is done."""
+        if not self._is_attached(node):
+            # The node was removed (e.g. navigation) while sorting
+            return
+        
+        node.remove_children()
+        self._show_listing(node, listing, restore)
+    
+    def _is_attached(self, node: TreeNode) -> bool:
+        """Whether a node is still part of the tree.
+        
+        Node IDs are reused once Tree.clear() has run, so only the chain of
+        parents up to the current root tells a live node from a removed one.
+        """
+        root = self._tree.root
+        while node is not root:
+            parent = node.parent
+            if parent is None or not any(child is node for child in parent.children):
+                return False
+            node = parent
+        return True
+    
+    def _add_entry_nodes(self, node: TreeNode, listing: DirectoryListing, restore: bool = False) -> None:
+        """Add nodes for the first page of a listing's visible entries.
+        
+        With restore, previously expanded subdirectories whose listings are
+        cached are rebuilt and expanded again.
+        """
+        entries = self._visible_entries(listing)
+        page = self._pages[node.id] = _DirectoryPage(listing, entries)
+        self._add_page(node, page, restore)
+        
+        # Sniff file contents in the background (not on degraded mounts)
+        if listing.detailed and any(
+            not entry.is_dir and entry.name not in listing.file_types for entry in entries
+        ):
+            self._classify_directory(node, page)
+    
+    def _visible_entries(self, listing: DirectoryListing) -> Tuple[EntryInfo, ...]:
+        """Return a listing's entries in display order, without the filtered ones.
+        
+        Listings keep every entry, so filters only apply here.
+        """
+        with span("tree.sort"):
+            # Sort: directories first, then files, using the cached sort keys
+            entries = listing.sorted_entries(self.sort_mode, self.sort_reverse)
+        
+        # Filter hidden files if needed
+        if not self.show_hidden:
+            entries = tuple(entry for entry in entries if not entry.hidden)
+        
+        # Filter ignored entries; their subtrees are never opened
+        if self.respect_ignore:
+            is_ignored = self._ignore.matcher_for(listing.path).is_ignored
+            entries = tuple(entry for entry in entries if not is_ignored(entry.name, entry.is_dir))
+        
+        return entries
+    
+    def _loaded_pages(self) -> Iterator[Tuple[TreeNode, _DirectoryPage]]:
+        """Yield each loaded directory node with its page."""
+        root = self._tree.root
+        for node_id, page in list(self._pages.items()):
+            try:
+                # Tree.clear() replaces the root without unregistering the old one
+                node = root if node_id == root.id else self._tree.get_node_by_id(node_id)
+            except UnknownNodeID:
+                continue
+            yield node, page
+    
+    @profiled("tree.refilter")
+    def _refilter_pages(self) -> None:
+        """Apply a changed hidden-file filter to every loaded directory.
+        
+        Only the nodes of entries that appear or disappear are added or
+        removed, from the cached listings, so expansions are kept and the
+        filesystem is not touched. Scans still streaming apply the filter
+        when they finish.
+        """
+        cursor = self._tree.cursor_node
+        cursor_id = cursor.data if cursor is not None else None
+        
+        for node, page in self._loaded_pages():
+            self._refilter_page(node, page, self._visible_entries(page.listing))
+        
+        # Forget the pages and scans of removed nodes
+        tree_nodes = self._tree._tree_nodes
+        self._pages = {node_id: page for node_id, page in self._pages.items() if node_id in tree_nodes}
+        self._streams = {node_id: stream for node_id, stream in self._streams.items() if node_id in tree_nodes}
+        
+        if self._marked:
+            # Marks are only kept while their entries are in view
+            self._marked = {node_id for node_id in self._marked if self._is_shown(node_id)}
+            self.border_subtitle = f"{len(self._marked):,} marked" if self._marked else None
+        if cursor_id is not None:
+            self.call_after_refresh(self._move_cursor_to, cursor_id)
+    
+    def _refilter_page(self, node: TreeNode, page: _DirectoryPage, entries: Tuple[EntryInfo, ...]) -> None:
+        """Show a new selection of a page's listing, keeping the nodes of entries in both.
+        
+        The window keeps its place: it starts and ends before the same
+        entries as it did, or at the very start or end of the listing.
+        """
+        old = page.entries
+        rank = page.listing.sort_ranks(self.sort_mode, self.sort_reverse)
+        ranks = [rank[entry.name] for entry in entries]
+        
+        def boundary(index: int) -> int:
+            if index >= len(old):
+                return len(entries)
+            return bisect_left(ranks, rank[old[index].name]) if index else 0
+        
+        start, end = boundary(page.start), boundary(page.end)
+        wanted = {entry.name for entry in entries[start:end]}
+        shown: Dict[str, TreeNode] = {}
+        for child in list(node.children):
+            if child is page.earlier_node or child is page.more_node:
+                continue
+            name = self._store.name(child.data) if child.data is not None else None
+            if name in wanted:
+                shown[name] = child
+            else:
+                child.remove()
+        
+        page.entries = entries
+        page._positions = None
+        page.start, page.end = start, end
+        
+        # Insert the new nodes from the end, each before its successor
+        path = page.listing.path
+        types_by_name = page.listing.file_types
+        successor = page.more_node
+        for entry in reversed(entries[start:end]):
+            child = shown.get(entry.name)
+            if child is None:
+                child = self._add_entry_node(
+                    node, path, entry, True, types_by_name.get(entry.name), before=successor
+                )
+            successor = child
+        
+        if start and page.earlier_node is None:
+            page.earlier_node = node.add_leaf(Text(), data=None, before=0)
+        elif not start and page.earlier_node is not None:
+            page.earlier_node.remove()
+            page.earlier_node = None
+        if page.earlier_node is not None:
+            page.earlier_node.set_label(Text(f"… {start:,} earlier", style="dim"))
+        
+        remaining = len(entries) - end
+        if remaining and page.more_node is None:
+            page.more_node = node.add_leaf(Text(), data=None)
+        elif not remaining and page.more_node is not None:
+            page.more_node.remove()
+            page.more_node = None
+        if page.more_node is not None:
+            page.more_node.set_label(Text(f"… {remaining:,} more", style="dim"))
+        
+        if len(shown) < end - start:
+            if self.checksum_algorithm is not None:
+                self._hash_shown(node, page, start, end)
+            if page.listing.detailed and any(
+                not entry.is_dir and entry.name not in types_by_name for entry in entries[start:end]
+            ):
+                self._classify_directory(node, page)
+    
+    def _is_shown(self, node_id: int) -> bool:
+        """Whether an entry passes the filters of its loaded directory."""
+        listing = self._listings.get(self._store.path(self._store.parent(node_id)))
+        entry = listing.get(self._store.name(node_id)) if listing else None
+        return entry is not None and (self.show_hidden or not entry.hidden)
+    
+    def _add_page(self, node: TreeNode, page: _DirectoryPage, restore: bool = False) -> None:
+        """Add nodes for the page after the shown window."""
+        if page.more_node is not None:
+            page.more_node.remove()
+            page.more_node = None
+        
+        # Limit items to prevent overwhelming the display
+        start = page.end
+        end = min(page.end + self.MAX_ENTRIES, len(page.entries))
+        types_by_name = page.listing.file_types
+        for entry in page.entries[page.end:end]:
+            self._add_entry_node(node, page.listing.path, entry, restore, types_by_name.get(entry.name))
+        page.end = end
+        
+        if self.checksum_algorithm is not None:
+            self._hash_shown(node, page, start, end)
+        
+        remaining = len(page.entries) - page.end
+        if remaining:
+            page.more_node = node.add_leaf(Text(f"… {remaining:,} more", style="dim"), data=None)
+    
+    def _show_window(self, node: TreeNode, page: _DirectoryPage, start: int) -> None:
+        """Rebuild a directory's children to show the page window from start."""
+        end = page.end
+        node.remove_children()
+        page.earlier_node = page.more_node = None
+        
+        page.start = page.end = max(0, start)
+        if page.start:
+            page.earlier_node = node.add_leaf(Text(f"… {page.start:,} earlier", style="dim"), data=None)
+        
+        # Keep the pages after start that were already shown
+        while page.end < max(end, page.start + 1):
+            self._add_page(node, page, restore=True)
+    
+    @work(thread=True, group="classify")
+    def _classify_directory(self, node: TreeNode, page: _DirectoryPage) -> None:
+        """Classify a directory's files by content, in display order.
+        
+        Labels are updated chunk by chunk as results arrive.
+        """
+        worker = get_current_worker()
+        listing = page.listing
+        paths = [
+            listing.path / entry.name
+            for entry in page.entries
+            if not entry.is_dir and entry.name not in listing.file_types
+        ]
+        
+        def on_chunk(chunk: Dict[Path, FileType]) -> None:
+            if not worker.is_cancelled:
+                self.app.call_from_thread(self._apply_file_types, node, page, chunk)
+        
+        with span("tree.classify"):
+            classify_many(paths, on_chunk, lambda: worker.is_cancelled)
+    
+    def _apply_file_types(self, node: TreeNode, page: _DirectoryPage, chunk: Dict[Path, FileType]) -> None:
+        """Store classified types and relabel the affected nodes."""
+        types_by_name = page.listing.file_types
+        for path, file_type in chunk.items():
+            types_by_name[path.name] = file_type
+        self._relabel_shown(node, page, chunk)
+    
+    def _relabel_shown(self, node: TreeNode, page: _DirectoryPage, paths: Iterable[Path]) -> None:
+        """Relabel the nodes of a page's entries that are currently shown."""
+        if self._pages.get(node.id) is not page or not self._is_attached(node):
+            # Results arrived after the directory was evicted or rebuilt
+            return
+        # Shown entries map directly to child positions
+        offset = page.start - (1 if page.earlier_node is not None else 0)
+        children = node.children
+        types_by_name = page.listing.file_types
+        for path in paths:
+            index = page.position(path.name)
+            if index is None or not page.start <= index < page.end:
+                continue
+            if not 0 <= index - offset < len(children):
+                continue
+            child = children[index - offset]
+            if child.data is not None and self._store.name(child.data) == path.name:
+                label = self._get_entry_label(
+                    child.data,
+                    page.entries[index],
+                    types_by_name.get(path.name),
+                    child.data in self._marked,
+                    path,
+                )
+                child.set_label(label)
+    
+    def _hash_shown(self, node: TreeNode, page: _DirectoryPage, start: int, end: int) -> None:
+        """Checksum the files among a page's entries[start:end] that have none yet."""
+        if not page.listing.detailed:
+            # Archives and degraded mounts only get checksums on request
+            return
+        algorithm = self.checksum_algorithm
+        entries = [
+            entry
+            for entry in page.entries[start:end]
+            if not entry.is_dir
+            and not entry.is_symlink
+            and (self._checksums.get((page.listing.path / entry.name, algorithm)) or (None, None))[:2]
+            != (entry.size, entry.mtime)
+        ]
+        if entries:
+            self._hash_entries(node, page, entries, algorithm)
+    
+    @work(thread=True, group="checksum")
+    def _hash_entries(
+        self,
+        node: TreeNode,
+        page: _DirectoryPage,
+        entries: List[EntryInfo],
+        algorithm: str,
+    ) -> None:
+        """Hash files on the hashing pool, updating their labels in batches."""
+        from ..utils.hashing import hash_files
+        
+        worker = get_current_worker()
+        by_path = {page.listing.path / entry.name: entry for entry in entries}
+        chunk: Dict[Path, Tuple[EntryInfo, str]] = {}
+        reported_at = time.monotonic()
+        
+        for path, digest in hash_files(list(by_path), algorithm, lambda: worker.is_cancelled):
+            if digest is not None:
+                chunk[path] = (by_path[path], digest)
+            now = time.monotonic()
+            if chunk and now - reported_at >= self.CHECKSUM_INTERVAL:
+                self.app.call_from_thread(self._apply_checksums, node, page, algorithm, chunk)
+                chunk = {}
+                reported_at = now
+        
+        if chunk and not worker.is_cancelled:
+            self.app.call_from_thread(self._apply_checksums, node, page, algorithm, chunk)
+    
+    def _apply_checksums(
+        self,
+        node: TreeNode,
+        page: _DirectoryPage,
+        algorithm: str,
+        chunk: Dict[Path, Tuple[EntryInfo, str]],
+    ) -> None:
+        """Store checksums and relabel the affected nodes."""
+        for path, (entry, digest) in chunk.items():
+            self._checksums[path, algorithm] = (entry.size, entry.mtime, digest)
+        if algorithm == self.checksum_algorithm:
+            self._relabel_shown(node, page, chunk)
+    
+    def _is_more_node(self, node: TreeNode) -> bool:
+        """Whether a node is the "… N more" entry of a paged directory."""
+        parent = node.parent
+        page = self._pages.get(parent.id) if parent is not None else None
+        return page is not None and page.more_node is node
+    
+    def _is_earlier_node(self, node: TreeNode) -> bool:
+        """Whether a node is the "… N earlier" entry of a paged directory."""
+        parent = node.parent
+        page = self._pages.get(parent.id) if parent is not None else None
+        return page is not None and page.earlier_node is node
+    
+    def _add_entry_node(
+        self,
+        node: TreeNode,
+        path: Path,
+        entry: EntryInfo,
+        restore: bool,
+        file_type: Optional[FileType] = None,
+        before: Optional[TreeNode] = None,
+    ) -> TreeNode:
+        """Add the node for one entry, last or before another child."""
+        # Archives expand like directories; their own members report
+        # has_children=False, so nested archives stay leaves
+        archive = not entry.is_dir and entry.has_children is None and is_archive_name(entry.name)
+        kind = DIRECTORY if entry.is_dir else ARCHIVE if archive else FILE
+        item_id = self._store.intern(node.data, entry.name, kind)
+        label = self._get_entry_label(item_id, entry, file_type, item_id in self._marked)
+        
+        if kind == FILE:
+            return node.add_leaf(label, data=item_id, before=before)
+        
+        child_node = node.add(label, data=item_id, before=before)
+        
+        child_listing = (
+            self._listings.get(path / entry.name) if restore and item_id in self._expanded_dirs else None
+        )
+        if child_listing is not None:
+            self._show_listing(child_node, child_listing, restore)
+            child_node.expand()
+        elif not entry.readable:
+            # Placeholder children make the directory expandable
+            child_node.add("🔒 Protected", data=None)
+        elif entry.has_children is not False:
+            # Unprobed directories (degraded mounts) are assumed non-empty
+            child_node.add("📂 Loading...", data=None)
+        return child_node
+    
+    def _poll_git_status(self) -> None:
+        """Reload git status if the repository's index changed."""
+        monitor = get_monitor()
+        if monitor.is_degraded(monitor.device_of(self.current_path)):
+            return
+        self._load_git_status(self.current_path, force=False)
+    
+    @work(thread=True, exclusive=True, group="git")
+    def _load_git_status(self, path: Path, force: bool) -> None:
+        """Find the repository for a path and run one batched git status."""
+        root = find_repo_root(path)
+        if root is None:
+            if self._git_map is not None:
+                self.app.call_from_thread(self._apply_git_status, None, None)
+            return
+        
+        try:
+            mtime = git_index_path(root).stat().st_mtime_ns
+        except OSError:
+            mtime = None
+        
+        same_repo = self._git_map is not None and self._git_map.root == root
+        if not force and same_repo and mtime == self._git_index_mtime:
+            return
+        
+        status_map = load_git_status(root)
+        self.app.call_from_thread(self._apply_git_status, status_map, mtime)
+    
+    def _apply_git_status(self, status_map: Optional[GitStatusMap], mtime: Optional[int]) -> None:
+        """Store a new status map and redraw the labels."""
+        self._git_map = status_map
+        self._git_index_mtime = mtime
+        self._relabel_tree()
+    
+    def _relabel_tree(self) -> None:
+        """Rebuild the labels of every loaded node from cached metadata."""
+        if not self._tree:
+            return
+        
+        root = self._tree.root
+        if root.data is not None:
+            root.set_label(self._get_path_label(self.current_path))
+        
+        stack = list(root.children)
+        while stack:
+            node = stack.pop()
+            if node.data is not None:
+                self._relabel_node(node)
+                stack.extend(node.children)
+    
+    def _relabel_node(self, node: TreeNode) -> None:
+        """Rebuild one node's label from its cached listing entry."""
+        path = self._store.path(node.data)
+        listing = self._listings.get(path.parent)
+        entry = listing.get(path.name) if listing else None
+        if entry is not None:
+            file_type = listing.file_types.get(path.name)
+            node.set_label(self._get_entry_label(node.data, entry, file_type, node.data in self._marked, path))
+    
+    def _reorder(self) -> None:
+        """Re-order the tree from the cached listings without filesystem access."""
+        if not self._tree:
+            return
+        
+        root = self._tree.root
+        listing = self._listings.get(self.current_path) if root.data is not None else None
+        if listing is None:
+            return
+        
+        cursor = self._tree.cursor_node
+        cursor_id = cursor.data if cursor else None
+        
+        self.workers.cancel_group(self, "scan")
+        self.workers.cancel_group(self, "sort")
+        self._streams.clear()
+        root.remove_children()
+        self._collapsed_at.clear()
+        self._evicted.clear()
+        self._pages.clear()
+        self._show_listing(root, listing, restore=True)
+        
+        if cursor_id is not None:
+            self.call_after_refresh(self._move_cursor_to, cursor_id)
+    
+    def _move_cursor_to(self, node_id: int) -> None:
+        """Move the cursor to the visible node of a store entry, if there is one."""
+        if not self._tree:
+            return
+        
+        stack = [self._tree.root]
+        while stack:
+            node = stack.pop()
+            if node.data == node_id:
+                self._tree.cursor_line = node.line
+                return
+            if node.is_expanded:
+                stack.extend(node.children)
+    
+    @profiled("tree.expand")
     def on_tree_node_expanded(self, event: Tree.NodeExpanded) -> None:
         """Handle tree node expansion."""
         node = event.node
-        path = node.data
+        node_id = node.data
         
-        if path and path.is_dir():
+        if node_id is not None and node.allow_expand:
             # Check if this node has placeholder children (empty nodes)
             has_placeholder = False
             for child in node.children:
-                if child.data is None and ("Loading..." in str(child.label) or "Protected" in str(child.label)):
+                if child.data is None and any(
+                    marker in str(child.label)
+                    for marker in ("Loading...", "Protected", "Not responding")
+                ):
                     has_placeholder = True
                     break
             
@@ -220,37 +1228,94 @@ class TreeView(Widget):
                     # If removal fails, clear the children list manually
                     node._children.clear()
                 
-                # Add actual children
-                self._add_children(node, path)
+                # Add actual children; released subtrees get their
+                # expanded descendants back
+                restore = node.id in self._evicted
+                self._evicted.discard(node.id)
+                self._add_children(node, self._store.path(node_id), restore)
             
             # Remember expanded state
-            self._expanded_dirs.add(path)
+            self._expanded_dirs.add(node_id)
+            self._collapsed_at.pop(node.id, None)
     
     def on_tree_node_collapsed(self, event: Tree.NodeCollapsed) -> None:
         """Handle tree node collapse."""
         node = event.node
-        path = node.data
+        node_id = node.data
         
-        if path:
+        if node_id is not None:
             # Remove from expanded set
-            self._expanded_dirs.discard(path)
+            self._expanded_dirs.discard(node_id)
+            if node is not self._tree.root:
+                self._collapsed_at[node.id] = time.monotonic()
+    
+    def _evict_collapsed(self) -> None:
+        """Release collapsed subtrees that are idle or over the node budget.
+        
+        Each released directory keeps a Loading placeholder and is rebuilt
+        from the listing cache when expanded again.
+        """
+        if not self._tree or not self._collapsed_at:
+            return
+        
+        now = time.monotonic()
+        # Private, but the only O(1) way to count the tree's nodes
+        node_count = len(self._tree._tree_nodes)
+        
+        # Oldest collapse first
+        for node_id, collapsed_at in sorted(self._collapsed_at.items(), key=lambda item: item[1]):
+            idle = now - collapsed_at >= self._evict_after
+            if not idle and node_count <= self._node_budget:
+                break
+            
+            del self._collapsed_at[node_id]
+            try:
+                node = self._tree.get_node_by_id(node_id)
+            except UnknownNodeID:
+                # Already released with an ancestor
+                continue
+            if node.is_expanded or node_id in self._streams:
+                continue
+            
+            before = len(self._tree._tree_nodes)
+            node.remove_children()
+            node.add("📂 Loading...", data=None)
+            self._evicted.add(node_id)
+            # Its page would otherwise be refiltered back into the tree
+            self._pages.pop(node_id, None)
+            node_count -= before - len(self._tree._tree_nodes)
+        
+        # Forget the pages of released nodes
+        tree_nodes = self._tree._tree_nodes
+        self._pages = {node_id: page for node_id, page in self._pages.items() if node_id in tree_nodes}
     
     def on_tree_node_selected(self, event: Tree.NodeSelected) -> None:
         """Handle tree node selection."""
         node = event.node
-        path = node.data
         
-        if path:
-            if path.is_dir():
+        if node.data is not None:
+            # Paths are only built for the entry acted on
+            path = self._store.path(node.data)
+            if node.allow_expand:
                 # Change current directory
                 self.current_path = path
             else:
                 # Select file for preview
-                self.post_message(self.FileSelected(path))
+                self.post_message(self.FileSelected(path, self))
+        elif self._is_more_node(node):
+            # Load the next page of a large directory
+            self._add_page(node.parent, self._pages[node.parent.id])
+        elif self._is_earlier_node(node):
+            # Load the previous page, keeping the cursor next to where it was
+            page = self._pages[node.parent.id]
+            previous = page.entries[page.start - 1]
+            self._show_window(node.parent, page, page.start - self.MAX_ENTRIES)
+            previous_id = self._store.intern(node.parent.data, previous.name)
+            self.call_after_refresh(self._move_cursor_to, previous_id)
     
     def navigate_to(self, path: Path) -> None:
         """Navigate to a specific path."""
-        if path.is_dir():
+        if get_backend().is_dir(path):
             self.current_path = path
         else:
             # Navigate to parent directory and select file
@@ -265,22 +1330,297 @@ class TreeView(Widget):
     
     def refresh_tree(self) -> None:
         """Refresh the tree view."""
+        self._listings.invalidate()
+        self._ignore.invalidate()
         self._populate_tree()
+        
+        if self._git_enabled:
+            self._load_git_status(self.current_path, force=True)
     
     def toggle_hidden(self) -> None:
         """Toggle showing hidden files."""
         self.show_hidden = not self.show_hidden
     
+    def toggle_ignored(self) -> None:
+        """Toggle hiding entries matched by ignore files and excludes."""
+        self.respect_ignore = not self.respect_ignore
+        self.notify(f"Ignore files: {'on' if self.respect_ignore else 'off'}")
+    
+    def cycle_sort_mode(self) -> None:
+        """Switch to the next sort mode."""
+        self.sort_mode = next_sort_mode(self.sort_mode)
+        self.notify(f"Sort: {self.sort_mode}{' (reversed)' if self.sort_reverse else ''}")
+    
+    def toggle_sort_order(self) -> None:
+        """Switch between ascending and descending order."""
+        self.sort_reverse = not self.sort_reverse
+        self.notify(f"Sort: {self.sort_mode}{' (reversed)' if self.sort_reverse else ''}")
+    
+    def toggle_mark(self) -> None:
+        """Mark or unmark the entry under the cursor, then move down."""
+        node = self._tree.cursor_node if self._tree else None
+        node_id = node.data if node is not None else None
+        if node_id is None or node is self._tree.root:
+            return
+        if node_id in self._marked:
+            self._marked.discard(node_id)
+        else:
+            self._marked.add(node_id)
+        self._relabel_node(node)
+        self.border_subtitle = f"{len(self._marked):,} marked" if self._marked else None
+        self._tree.action_cursor_down()
+    
+    def selected_paths(self) -> List[Path]:
+        """Return the marked entries, or the one under the cursor if none are."""
+        if self._marked:
+            return sorted(self._store.path(node_id) for node_id in self._marked)
+        node = self._tree.cursor_node if self._tree else None
+        if node is None or node is self._tree.root or node.data is None:
+            return []
+        return [self._store.path(node.data)]
+    
+    def clear_marks(self) -> None:
+        """Unmark every entry."""
+        marked, self._marked = self._marked, set()
+        self.border_subtitle = None
+        if marked and self._tree:
+            self._relabel_tree()
+    
+    def reload(self, changed: Iterable[Path] = ()) -> None:
+        """Show changes made by the application, rescanning the changed directories."""
+        for path in changed:
+            self._listings.invalidate(path)
+        self._populate_tree()
+    
+    def cycle_checksums(self) -> None:
+        """Show the checksum column, switch its algorithm, or hide it."""
+        from ..utils.hashing import HASH_ALGORITHMS
+        
+        order = (None, *HASH_ALGORITHMS)
+        self.checksum_algorithm = order[(order.index(self.checksum_algorithm) + 1) % len(order)]
+        self.notify(f"Checksums: {self.checksum_algorithm or 'off'}")
+    
+    def copy_checksum(self) -> None:
+        """Copy the checksum of the file or directory under the cursor.
+        
+        Files are hashed on the hashing pool unless their digest is cached;
+        directories get one digest over their whole contents, with progress
+        in the border. Asking again while a directory is hashed cancels it.
+        """
+        if self._dir_hash is not None:
+            self.cancel_dir_hash()
+            return
+        
+        node = self._tree.cursor_node if self._tree else None
+        if node is None or node.data is None:
+            return
+        path = self._store.path(node.data)
+        location = split_archive_path(path)
+        if location is not None and location[1]:
+            self.notify("Checksums are not available inside archives", severity="warning")
+            return
+        
+        from ..utils.hashing import HASH_ALGORITHM, DirectoryHashStats
+        
+        algorithm = self.checksum_algorithm or HASH_ALGORITHM
+        if node.allow_expand and location is None:
+            self._dir_hash = DirectoryHashStats()
+            self._dir_hash_name = path.name or str(path)
+            self._show_dir_hash_progress()
+            self._hash_directory(path, algorithm, self._dir_hash)
+        else:
+            self._checksum_file(path, algorithm)
+    
+    def cancel_dir_hash(self) -> None:
+        """Stop hashing a directory."""
+        if self._dir_hash is None:
+            return
+        self.workers.cancel_group(self, "dir_hash")
+        self._dir_hash = None
+        self.border_subtitle = None
+        self.notify("Checksum cancelled")
+    
+    @work(thread=True, exclusive=True, group="copy_checksum")
+    def _checksum_file(self, path: Path, algorithm: str) -> None:
+        """Hash one file for copying."""
+        from ..utils.hashing import hash_files
+        
+        worker = get_current_worker()
+        digest = None
+        for _, digest in hash_files([path], algorithm, lambda: worker.is_cancelled):
+            pass
+        if not worker.is_cancelled:
+            self.app.call_from_thread(self._copy_digest, path, algorithm, digest)
+    
+    @work(thread=True, exclusive=True, group="dir_hash")
+    def _hash_directory(self, path: Path, algorithm: str, stats: "DirectoryHashStats") -> None:
+        """Hash a directory's contents for copying."""
+        from ..utils.hashing import hash_directory
+        
+        worker = get_current_worker()
+        digest = hash_directory(path, algorithm, lambda: worker.is_cancelled, stats)
+        if not worker.is_cancelled:
+            self.app.call_from_thread(self._finish_dir_hash, path, algorithm, stats, digest)
+    
+    def _show_dir_hash_progress(self) -> None:
+        """Show how far the directory hash has got in the border, until it ends."""
+        stats = self._dir_hash
+        if stats is None:
+            return
+        if not stats.listed:
+            progress = f"listing {stats.files:,} files"
+        else:
+            percent = stats.bytes_hashed * 100 // stats.bytes_total if stats.bytes_total else 100
+            progress = f"{percent}% ({stats.hashed:,}/{stats.files:,} files)"
+        self.border_subtitle = f"# {self._dir_hash_name}: {progress} — Ctrl+Y to cancel"
+        self.set_timer(self.CHECKSUM_INTERVAL, self._show_dir_hash_progress)
+    
+    def _finish_dir_hash(
+        self,
+        path: Path,
+        algorithm: str,
+        stats: "DirectoryHashStats",
+        digest: Optional[str],
+    ) -> None:
+        """Copy a directory's digest once it is done."""
+        if self._dir_hash is not stats:
+            # Cancelled (and maybe restarted) in the meantime
+            return
+        self._dir_hash = None
+        self.border_subtitle = None
+        if digest is None:
+            self.notify(f"{stats.errors:,} files in {path.name} could not be read", severity="error")
+            return
+        self._copy_digest(path, algorithm, digest)
+    
+    def _copy_digest(self, path: Path, algorithm: str, digest: Optional[str]) -> None:
+        """Put a digest on the clipboard and show it."""
+        if digest is None:
+            self.notify(f"Could not read {path.name}", severity="error")
+            return
+        # The clipboard is not available in older Textual releases
+        copy_to_clipboard = getattr(self.app, "copy_to_clipboard", None)
+        if copy_to_clipboard is not None:
+            copy_to_clipboard(digest)
+        self.notify(f"{algorithm} of {path.name or path}:\n{digest}", title="Checksum copied")
+    
     def on_key(self, event: events.Key) -> None:
         """Handle key events."""
         # Only handle keys that are specific to TreeView
         # Let application handle backspace, f5, ctrl+h via BINDINGS
-        if event.key == "enter":
+        if self._searching and self._handle_search_key(event):
+            # Search keys must not also trigger bindings
+            event.prevent_default()
+            event.stop()
+        elif event.character == "/":
+            self._searching = True
+            self._set_typeahead("")
+            event.prevent_default()
+            event.stop()
+        elif event.key == "enter":
             # Handle enter key to navigate into directories
             if self._tree and self._tree.cursor_node:
                 node = self._tree.cursor_node
-                path = node.data
-                if path and path.is_dir():
-                    self.current_path = path
+                if node.data is not None and node.allow_expand:
+                    self.current_path = self._store.path(node.data)
                     event.prevent_default()
-        # Let the Tree widget handle arrow keys for navigation within the tree 
\ No newline at end of file
+        elif event.key == "escape" and self._dir_hash is not None:
+            self.cancel_dir_hash()
+            event.stop()
+        elif event.is_printable and event.character and self._handle_typeahead(event.character):
+            # Type-ahead keys must not also trigger bindings
+            event.prevent_default()
+            event.stop()
+        # Let the Tree widget handle arrow keys for navigation within the tree
+    
+    def _handle_typeahead(self, character: str) -> bool:
+        """Extend the type-ahead prefix and jump to the first matching sibling.
+        
+        A new prefix never starts with a key the application binds, so
+        single-key shortcuts keep working; once typing, every key counts.
+        Names starting with a bound key are reached with "/" instead.
+        """
+        now = time.monotonic()
+        typing = self._typeahead and now - self._typeahead_at < self.TYPEAHEAD_TIMEOUT
+        if not typing:
+            if character == " " or character in self._bound_keys():
+                return False
+            self._typeahead = ""
+        
+        self._typeahead_at = now
+        self.set_timer(self.TYPEAHEAD_TIMEOUT, self._clear_typeahead)
+        self._set_typeahead(self._typeahead + character.lower())
+        return True
+    
+    def _handle_search_key(self, event: events.Key) -> bool:
+        """Edit a prefix started with "/"; returns whether the key was used.
+        
+        Enter and Escape end the search where the cursor is, and any other
+        key that does not edit the prefix ends it and keeps its usual action.
+        """
+        if event.key in ("enter", "escape"):
+            self._end_search()
+        elif event.key == "backspace":
+            self._set_typeahead(self._typeahead[:-1])
+        elif event.is_printable and event.character:
+            self._set_typeahead(self._typeahead + event.character.lower())
+        else:
+            self._end_search()
+            return False
+        return True
+    
+    def _set_typeahead(self, prefix: str) -> None:
+        """Show a new prefix and jump to its first match."""
+        self._typeahead = prefix
+        self.border_title = f"🔎 {prefix}"
+        if prefix:
+            self._jump_to_prefix(prefix)
+    
+    def _end_search(self) -> None:
+        """Leave a search started with "/"."""
+        self._searching = False
+        self._typeahead = ""
+        self.border_title = None
+    
+    def _bound_keys(self) -> Set[str]:
+        """Return the single-character keys bound by the application."""
+        keys: Set[str] = set()
+        for binding in self.app.BINDINGS:
+            key = binding[0] if isinstance(binding, tuple) else binding.key
+            keys.update(k.strip() for k in key.split(",") if len(k.strip()) == 1)
+        return keys
+    
+    def _clear_typeahead(self) -> None:
+        """Reset the prefix once typing has paused."""
+        if not self._searching and time.monotonic() - self._typeahead_at >= self.TYPEAHEAD_TIMEOUT:
+            self._typeahead = ""
+            self.border_title = None
+    
+    def _jump_to_prefix(self, prefix: str) -> None:
+        """Move the cursor to the first sibling of the cursor node matching prefix.
+        
+        Pages of the directory are only loaded up to the matching entry.
+        """
+        if not self._tree:
+            return
+        
+        cursor = self._tree.cursor_node
+        parent = cursor.parent if cursor is not None and cursor.parent is not None else self._tree.root
+        page = self._pages.get(parent.id)
+        if page is None:
+            return
+        
+        index = page.find(prefix)
+        if index is None:
+            self.app.bell()
+            return
+        
+        # Only the page holding the match gets nodes
+        if page.end <= index < page.end + self.MAX_ENTRIES:
+            self._add_page(parent, page)
+        elif not page.start <= index < page.end:
+            page.end = 0
+            self._show_window(parent, page, index - index % self.MAX_ENTRIES)
+        
+        match_id = self._store.intern(parent.data, page.entries[index].name)
+        self.call_after_refresh(self._move_cursor_to, match_id)
\ No newline at end of file